@@ -1,13 +1,16 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
-import pandas as pd
-import shutil
+import numpy as np
 import sys
 import os
-import joblib
-import uuid
+import json
+import asyncio
+import time
+import zipfile
 import uvicorn
 from dotenv import load_dotenv
 from datetime import datetime
@@ -22,8 +25,14 @@ sys.path.insert(0, backend_dir)
 sys.path.insert(0, project_root)
 
 from services.llm_service import LoanExplainerService
-from services.pdf_parser import extract_loan_data_from_pdf
-from services.signature_detector import detect_signature_in_pdf
+from services.template_explainer import template_explanation
+from services.loan_model import LoanScorer
+from services.upload_store import UploadStore
+from services.application_repository import create_application_repository
+from services.bulk_pipeline import get_process_pool, shutdown_process_pool, parse_application_pdf, LLM_CONCURRENCY
+from services.lazy_explanations import LazyExplanations
+from services.bulk_jobs import JobManager, job_events
+from services.register_import import RESULT_COLUMNS, register_kind, score_register
 
 load_dotenv()
 
@@ -38,43 +47,112 @@ app.add_middleware(
 )
 
 llm_service = LoanExplainerService()
+upload_store = UploadStore()
 
-# Load ML model and scaler with proper paths
-def load_model():
-    model_path = os.path.join(backend_dir, 'ml_models', 'loan_status_predictor.pkl')
-    print(f"Loading model from: {model_path}")
+# eager: explain during evaluate/upload, lazy: return the decision and metrics
+# right away and explain on first read or from the background queue,
+# batch: like lazy, but the background queue goes through the Message Batches API
+EXPLANATION_MODE = os.getenv('EXPLANATION_MODE', 'eager').lower()
+
+# llm: explanation from the LLM (following EXPLANATION_MODE), fast: local
+# rule-based assessment in the same format, no LLM call. Overridable per
+# request with ?tier=
+EXPLANATION_TIERS = ('llm', 'fast')
+EXPLANATION_TIER = os.getenv('EXPLANATION_TIER', 'llm').lower()
+
+@app.on_event("startup")
+async def start_workers():
+    lazy_explanations.start()
+
+@app.on_event("shutdown")
+async def stop_workers():
+    await bulk_jobs.shutdown()
+    shutdown_process_pool()
+    await lazy_explanations.stop()
+    await llm_service.aclose()
+    if hasattr(applications, "close"):
+        applications.close()
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Running LLM streams, referenced so they finish even after the client goes away
+stream_tasks = set()
+
+def sse_response(head_events, llm_events=None, on_done=None):
+# Server-sent events: head_events are sent immediately, then the (event, data)
+# pairs from llm_events. The LLM stream runs in its own task, so on_done
+# still persists the final text if the client disconnects mid-stream.
     
-    if not os.path.exists(model_path):
-        model_path = os.path.join(backend_dir, 'loan_status_predictor.pkl')
-        print(f"Trying alternative: {model_path}")
+    queue = asyncio.Queue()
     
-    if os.path.exists(model_path):
-        print(f"Model found at: {model_path}")
-        return joblib.load(model_path)
-    else:
-        raise FileNotFoundError(f"Model not found at {model_path}")
-
-def load_scaler():
-    scaler_path = os.path.join(backend_dir, 'ml_models', 'vector.pkl')
-    print(f"Loading scaler from: {scaler_path}")
+    async def pump():
+        try:
+            if llm_events is not None:
+                async for event, data in llm_events:
+                    if event == "done" and on_done is not None:
+                        data = on_done(data)
+                    await queue.put((event, data))
+        except Exception as e:
+            print(f"Error streaming response: {str(e)}")
+            await queue.put(("error", {"detail": str(e)}))
+        finally:
+            await queue.put(None)
     
-    if not os.path.exists(scaler_path):
-        scaler_path = os.path.join(backend_dir, 'vector.pkl')
-        print(f"Trying alternative: {scaler_path}")
+    task = asyncio.create_task(pump())
+    stream_tasks.add(task)
+    task.add_done_callback(stream_tasks.discard)
     
-    if os.path.exists(scaler_path):
-        print(f"Scaler found at: {scaler_path}")
-        return joblib.load(scaler_path)
-    else:
-        raise FileNotFoundError(f"Scaler not found at {scaler_path}")
+    async def events():
+        for event, data in head_events:
+            yield sse_event(event, data)
+        while (item := await queue.get()) is not None:
+            yield sse_event(*item)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Load ML model and scaler, served by MODEL_ENGINE
+scorer = LoanScorer.load()
+
+applications = create_application_repository()
+lazy_explanations = LazyExplanations(llm_service, applications, use_batches=EXPLANATION_MODE == 'batch',
+                                     on_ready=lambda record: refresh_upload_result(record))
+
+def explanation_tier(tier):
+# Requested tier, or the configured default
+    
+    tier = (tier or EXPLANATION_TIER).lower()
+    if tier not in EXPLANATION_TIERS:
+        raise HTTPException(status_code=400, detail=f"tier must be one of: {', '.join(EXPLANATION_TIERS)}")
+    return tier
 
-# Load model and scaler
-model = load_model()
-scaler = load_scaler()
+async def explain_or_defer(loan_data, prediction, tier='llm'):
+# Explanation fields for a new record, deferred in lazy mode
+    
+    if tier == 'fast':
+        return {**template_explanation(loan_data, prediction), "explanation_status": "ready"}
+    
+    if EXPLANATION_MODE in ('lazy', 'batch'):
+        return {
+            "explanation": None,
+            "metrics": llm_service.explanation_metrics(loan_data),
+            "explanation_status": "pending"
+        }
+    
+    explanation_data = await llm_service.generate_explanation_async(loan_data, prediction)
+    return {**explanation_data, "explanation_status": explanation_status(explanation_data)}
 
-num_cols = ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount', 'Loan_Amount_Term']
+def explanation_status(explanation_data):
+# "fallback" when the LLM failed and the local assessment was returned instead
+    return "fallback" if explanation_data.get("fallback") else "ready"
 
-applications_db = {}
+def schedule_explanation(application_uuid, explanation_status):
+    if explanation_status == "pending":
+        lazy_explanations.enqueue(application_uuid)
 
 class LoanApproval(BaseModel):
     Gender: float
@@ -89,6 +167,9 @@ class LoanApproval(BaseModel):
     Credit_History: float
     Property_Area: float
     
+class BatchLoanApproval(BaseModel):
+    applications: List[LoanApproval]
+
 class QuestionRequest(BaseModel):
     application_id: str
     question: str
@@ -98,16 +179,18 @@ class OfficerNote(BaseModel):
     note: str
     officer_name: str
 
+class StatusUpdate(BaseModel):
+    application_id: str
+    status: str
+
 @app.post("/predict")
 async def predict_loan_status(application: LoanApproval):
 # Basic endpoint for ML prediction only
     
     try:
-        input_data = pd.DataFrame([application.dict()])
-        input_data[num_cols] = scaler.transform(input_data[num_cols])
-        result = model.predict(input_data)
+        prediction = await run_in_threadpool(predict_application, application.dict())
 
-        if result[0] == 1:
+        if prediction == "Approved":
             return {'Loan Status': "Approved"}
         else:
             return {'Loan Status': "Not Approved"}
@@ -115,67 +198,125 @@ async def predict_loan_status(application: LoanApproval):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
     
+def predict_batch(records):
+# Score many applications with a single scaler.transform and predict_proba call
+    
+    return scorer.predict_batch(records)
+
+def predict_application(loan_data):
+# Single application prediction, returns "Approved" or "Rejected"
+    
+    decisions, _ = predict_batch([loan_data])
+    return str(decisions[0])
+
+@app.post("/api/loan/predict-batch")
+async def predict_loan_status_batch(batch: BatchLoanApproval):
+# Vectorized scoring for bulk re-scoring jobs, response is columnar
+    
+    try:
+        if not batch.applications:
+            return {"count": 0, "decisions": [], "approval_probabilities": []}
+        
+        records = [application.dict() for application in batch.applications]
+        decisions, approval_probabilities = await run_in_threadpool(predict_batch, records)
+        
+        return {
+            "count": len(records),
+            "decisions": decisions.tolist(),
+            "approval_probabilities": np.round(approval_probabilities, 4).tolist()
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
+
 @app.post("/api/loan/evaluate")
-async def evaluate_with_explanation(application: LoanApproval):
-# Enhanced endpoint with ML prediction + LLM explanation
+async def evaluate_with_explanation(application: LoanApproval, tier: Optional[str] = None):
+# Enhanced endpoint with ML prediction + LLM explanation (?tier=fast for the local assessment)
+    
+    tier = explanation_tier(tier)
     
     try:
         # Get ML prediction
-        input_data = pd.DataFrame([application.dict()])
-        input_data[num_cols] = scaler.transform(input_data[num_cols])
-        result = model.predict(input_data)
-        
-        prediction = "Approved" if result[0] == 1 else "Rejected"
+        prediction = await run_in_threadpool(predict_application, application.dict())
     
-        # Generate LLM explanation
-        explanation_data = llm_service.generate_explanation(
-            application.dict(),
-            prediction
-        )
+        # Generate LLM explanation (or defer it in lazy mode)
+        explanation_data = await explain_or_defer(application.dict(), prediction, tier)
         
-        application_id = str(uuid.uuid4())
-        applications_db[application_id] = {
+        application_id = applications.insert({
             "data": application.dict(),
             "prediction": prediction,
             "explanation": explanation_data["explanation"],
             "metrics": explanation_data.get("metrics", {}),
+            "explanation_status": explanation_data["explanation_status"],
             "status": "pending_review",
             "created_at": datetime.now().isoformat(),
             "officer_notes": []
-        }
+        })
+        schedule_explanation(application_id, explanation_data["explanation_status"])
         
         return {
             "application_id": application_id,
             "decision": prediction,
             "explanation": explanation_data["explanation"],
             "metrics": explanation_data.get("metrics", {}),
+            "explanation_status": explanation_data["explanation_status"],
             "application_data": application.dict()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     
+@app.post("/api/loan/evaluate/stream")
+async def evaluate_with_explanation_stream(application: LoanApproval):
+# Streaming /api/loan/evaluate (SSE): "decision" immediately, then "metrics",
+# "delta" explanation chunks and "done" once the explanation is stored
+    
+    try:
+        loan_data = application.dict()
+        prediction = await run_in_threadpool(predict_application, loan_data)
+        
+        application_id = applications.insert({
+            "data": loan_data,
+            "prediction": prediction,
+            "explanation": None,
+            "metrics": {},
+            "explanation_status": "streaming",
+            "status": "pending_review",
+            "created_at": datetime.now().isoformat(),
+            "officer_notes": []
+        })
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    
+    def on_done(explanation_data):
+        applications.update_fields(
+            application_id,
+            explanation=explanation_data["explanation"],
+            metrics=explanation_data.get("metrics", {}),
+            explanation_status=explanation_status(explanation_data)
+        )
+        return {"application_id": application_id, **explanation_data}
+    
+    return sse_response(
+        [("decision", {"application_id": application_id, "decision": prediction, "application_data": loan_data})],
+        llm_service.stream_explanation(loan_data, prediction),
+        on_done
+    )
+    
 @app.post("/api/loan/ask")
 async def ask_question(request: QuestionRequest):
 # Endpoint for loan officer to ask questions about application
     
     try:
-        # Retrieve application context (check both UUID and original ID)
-        context = None
-        if request.application_id in applications_db:
-            context = applications_db[request.application_id]
-        else:
-            # Search by application ID
-            for app_id, app_data in applications_db.items():
-                if app_data.get('original_application_id') == request.application_id:
-                    context = app_data
-                    break
+        # Retrieve application context (UUID or original ID), explaining it first if deferred
+        context = await lazy_explanations.ensure(request.application_id)
         
         if not context:
             raise HTTPException(status_code=404, detail="Application not found")
     
         # Generate answer using LLM
-        answer = llm_service.answer_question(
+        answer = await llm_service.answer_question_async(
             request.question,
             context
         )
@@ -190,22 +331,138 @@ async def ask_question(request: QuestionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     
+@app.post("/api/loan/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+# Streaming /api/loan/ask (SSE): "delta" answer chunks then "done"
+    
+    context = await lazy_explanations.ensure(request.application_id)
+    
+    if not context:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    def on_done(answer_data):
+        return {"question": request.question, **answer_data}
+    
+    return sse_response([], llm_service.stream_answer(request.question, context), on_done)
+    
 @app.get("/api/loan/status/{application_id}")
 async def get_application_status(application_id: str):
 # Endpoint to retrieve application details
     
-    if application_id in applications_db:
-        return applications_db[application_id]
-    
-    for app_id, app_data in applications_db.items():
-        if app_data.get('original_application_id') == application_id:
-            return app_data
+    # First read of a deferred explanation generates it
+    app_data = await lazy_explanations.ensure(application_id)
+    if app_data is not None:
+        return app_data
     
     raise HTTPException(status_code=404, detail="Application not found")
 
+def store_application(processed, filename):
+# Store a processed upload, indexed by UUID, original application ID and filename
+    
+    return applications.insert({
+        "applicant_name": processed["applicant_name"],
+        "original_application_id": processed["application_id"],
+        "data": processed["loan_data"],
+        "prediction": processed["prediction"],
+        "explanation": processed["explanation"],
+        "metrics": processed["metrics"],
+        "explanation_status": processed.get("explanation_status", "ready"),
+        "has_signature": True,
+        "signature_confidence": processed["signature_confidence"],
+        "filename": filename,
+        "content_hash": processed.get("content_hash"),
+        "missing_fields": processed.get("missing_fields", []),
+        "status": "pending_review",
+        "created_at": datetime.now().isoformat(),
+        "officer_notes": []
+    })
+
+def store_explained(processed, filename):
+# Store a newly explained upload. When a stored template or fallback for the
+# same document was explained again, its application is updated instead.
+    
+    application_uuid, record = applications.get_with_id(processed["application_id"])
+    if record is not None and record.get("content_hash") == processed.get("content_hash"):
+        applications.update_fields(
+            application_uuid,
+            explanation=processed["explanation"],
+            metrics=processed["metrics"],
+            explanation_status=processed["explanation_status"]
+        )
+    else:
+        application_uuid = store_application(processed, filename)
+    schedule_explanation(application_uuid, processed["explanation_status"])
+    return application_uuid
+
+def reusable_result(processed, tier):
+# Whether the stored result for an identical PDF answers a request for this tier.
+# LLM fallbacks, interrupted streams, and fast-tier templates when the LLM tier
+# is asked for are explained again. Pending explanations are reused, the stored
+# result is refreshed when LazyExplanations fills them in.
+    
+    if not processed["has_signature"]:
+        return True
+    status = processed.get("explanation_status", "ready")
+    if status == "pending":
+        return True
+    if status != "ready":
+        return False
+    return tier == 'fast' or processed.get("explanation_tier", "llm") == 'llm'
+
+def refresh_upload_result(record):
+# Deferred explanation finished: update the stored result of the PDF it came from
+    
+    content_hash = record.get("content_hash")
+    processed = upload_store.get_result(content_hash) if content_hash else None
+    if processed is not None and processed.get("application_id") == record.get("original_application_id"):
+        upload_store.put_result(content_hash, {
+            **processed,
+            "explanation": record["explanation"],
+            "metrics": record["metrics"],
+            "explanation_status": record["explanation_status"]
+        })
+
+def restore_duplicate(processed, filename):
+# Resubmitted identical PDF: reuse the stored result, re-insert it if the app was restarted
+    
+    if processed["has_signature"] and processed["application_id"] not in applications:
+        application_uuid = store_application(processed, filename)
+        schedule_explanation(application_uuid, processed.get("explanation_status", "ready"))
+
+def upload_response(processed):
+# Response body for a single processed upload
+    
+    if not processed["has_signature"]:
+        return {
+            "application_id": "N/A",
+            "applicant_name": "Unknown",
+            "decision": "rejected",
+            "signature_verified": False,
+            "signature_confidence": processed["signature_confidence"],
+            "income": 0,
+            "loan_amount": 0,
+            "explanation": "**Document Incomplete - Missing Signature**\n\nThe application cannot be processed because the document lacks a valid signature. Please request the applicant to sign and resubmit the application."
+        }
+    
+    loan_data = processed["loan_data"]
+    
+    return {
+        "application_id": processed["application_id"],
+        "applicant_name": processed["applicant_name"],
+        "decision": processed["prediction"].lower(),
+        "signature_verified": True,
+        "signature_confidence": processed["signature_confidence"],
+        "income": loan_data.get('ApplicantIncome', 0),
+        "loan_amount": loan_data.get('LoanAmount', 0) * 1000,
+        "explanation": processed["explanation"],
+        "metrics": processed["metrics"],
+        "explanation_status": processed.get("explanation_status", "ready"),
+        "missing_fields": processed.get("missing_fields", [])
+    }
+
 @app.post("/api/loan/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
-# Endpoint to upload and process loan application PDF
+async def upload_pdf(file: UploadFile = File(...), tier: Optional[str] = None):
+# Endpoint to upload and process loan application PDF (?tier=fast for the local assessment)
     
     print(f"\n{'='*70}")
     print(f" RECEIVED PDF UPLOAD: {file.filename}")
@@ -215,129 +472,170 @@ async def upload_pdf(file: UploadFile = File(...)):
         # Validate file type
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+        tier = explanation_tier(tier)
         
-        # Create upload folder
-        upload_folder = "uploads"
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder)
-            print(f"Created upload folder: {upload_folder}")
-        
-        # Save uploaded file
-        file_path = os.path.join(upload_folder, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Save uploaded file, content-addressed by SHA-256
+        content_hash, file_path, pdf_bytes = await upload_store.save(file)
         
         print(f"Saved file to: {file_path}")
         
-        # Step 1: Check for signature
-        print(f"Step 1: Check signature")
-        has_signature, sig_confidence = detect_signature_in_pdf(file_path)
-        
-        print(f"Signature Detection Results")
-        print(f"Verified: {has_signature}")
-        print(f"Confidence: {sig_confidence}")
-        
-        if not has_signature:
-            print(f"No signature detected (confidence: {sig_confidence:.2f}%)")
-            return {
-                "application_id": "N/A",
-                "applicant_name": "Unknown",
-                "decision": "rejected",
-                "signature_verified": False,
-                "signature_confidence": sig_confidence,
-                "income": 0,
-                "loan_amount": 0,
-                "explanation": "**Document Incomplete - Missing Signature**\n\nThe application cannot be processed because the document lacks a valid signature. Please request the applicant to sign and resubmit the application."
-            }
-        
-        print(f"Signature detected (confidence: {sig_confidence:.2f}%)")
-        
-        # Step 2: Extract data from PDF
-        print(f"Step 2: Extracting data from PDF")
-        loan_data, applicant_name, application_id = extract_loan_data_from_pdf(file_path)
-        print(f"Extracted data for: {applicant_name} (ID: {application_id})")
-        
-        # Step 3: Process with ML model
-        print(f"Step3: Running ML prediction")
-        input_data = pd.DataFrame([loan_data])
+        processed = upload_store.get_result(content_hash)
         
-        # Scale the data
-        input_data[num_cols] = scaler.transform(input_data[num_cols])
-        
-        # Get prediction
-        result = model.predict(input_data)
-        prediction = "Approved" if result[0] == 1 else "Rejected"
-        
-        print(f"ML Prediction: {prediction}")
+        if processed is not None and reusable_result(processed, tier):
+            print(f"Identical document already processed, returning stored result")
+            restore_duplicate(processed, file.filename)
+        else:
+            processed = await process_single_upload(pdf_bytes, file_path, file.filename, content_hash, tier,
+                                                    classified=processed)
+            upload_store.put_result(content_hash, processed)
         
-        # Step 4: Generate LLM explanation
-        print(f"Step 4: Generating risk assessment")
-        explanation_data = llm_service.generate_explanation(loan_data, prediction)
-        print(f"Generated assessment ({len(explanation_data['explanation'])} chars)")
+        return upload_response(processed)
         
-        # Step 5: Store application
-        application_uuid = str(uuid.uuid4())
-        applications_db[application_uuid] = {
-            "applicant_name": applicant_name,
-            "original_application_id": application_id,
-            "data": loan_data,
-            "prediction": prediction,
-            "explanation": explanation_data["explanation"],
-            "metrics": explanation_data.get("metrics", {}),
-            "has_signature": has_signature,
-            "signature_confidence": sig_confidence,
-            "filename": file.filename,
-            "status": "pending_review",
-            "created_at": datetime.now().isoformat(),
-            "officer_notes": []
-        }
-        
-        # Store by original application_id
-        applications_db[application_id] = applications_db[application_uuid]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+
+async def classify_upload(pdf_bytes, file_path, content_hash):
+# Signature check, extraction and prediction for a new document, no explanation yet
+    
+    # Steps 1-2: Check signature and extract data, PDF is parsed once in a worker process
+    print(f"Step 1: Check signature")
+    loop = asyncio.get_running_loop()
+    parsed = await loop.run_in_executor(get_process_pool(), parse_application_pdf, pdf_bytes, file_path)
+    has_signature = parsed["has_signature"]
+    sig_confidence = parsed["signature_confidence"]
+    
+    print(f"Signature Detection Results")
+    print(f"Verified: {has_signature}")
+    print(f"Confidence: {sig_confidence}")
+    
+    if not has_signature:
+        print(f"No signature detected (confidence: {sig_confidence:.2f}%)")
+        return {"has_signature": False, "signature_confidence": sig_confidence, "content_hash": content_hash}
+    
+    print(f"Signature detected (confidence: {sig_confidence:.2f}%)")
+    
+    # Step 2: Extracted data from PDF
+    loan_data = parsed["loan_data"]
+    applicant_name = parsed["applicant_name"]
+    application_id = parsed["application_id"]
+    print(f"Extracted data for: {applicant_name} (ID: {application_id})")
+    if parsed["missing_fields"]:
+        print(f"Missing fields (defaults used): {', '.join(parsed['missing_fields'])}")
+    
+    # Step 3: Process with ML model
+    print(f"Step3: Running ML prediction")
+    prediction = await run_in_threadpool(predict_application, loan_data)
+    
+    print(f"ML Prediction: {prediction}")
+    
+    return {**parsed, "prediction": prediction, "content_hash": content_hash}
+
+async def process_single_upload(pdf_bytes, file_path, filename, content_hash, tier='llm', classified=None):
+# Signature check, extraction, prediction and explanation for a new document.
+# classified: stored result of an earlier upload, only the explanation is redone
+    
+    processed = classified or await classify_upload(pdf_bytes, file_path, content_hash)
+    if not processed["has_signature"]:
+        return processed
+    
+    # Step 4: Generate LLM explanation (or defer it in lazy mode)
+    print(f"Step 4: Generating risk assessment")
+    explanation_data = await explain_or_defer(processed["loan_data"], processed["prediction"], tier)
+    print(f"Assessment: {explanation_data['explanation_status']}")
+    
+    processed = {
+        **processed,
+        "explanation": explanation_data["explanation"],
+        "metrics": explanation_data.get("metrics", {}),
+        "explanation_status": explanation_data["explanation_status"],
+        "explanation_tier": tier
+    }
+    
+    # Step 5: Store application
+    application_uuid = store_explained(processed, filename)
+    
+    print(f"Stored application: {application_uuid}")
+    
+    print(f"\n{'='*70}")
+    print(f"Passed! Application processed: {processed['prediction']}")
+    print(f"{'='*70}\n")
+    
+    return processed
+
+@app.post("/api/loan/upload-pdf/stream")
+async def upload_pdf_stream(file: UploadFile = File(...)):
+# Streaming /api/loan/upload-pdf (SSE): "decision" with the upload response as
+# soon as the PDF is scored, then explanation "delta" chunks and "done"
+    
+    try:
+        if not file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        print(f"Stored application: {application_uuid}")
+        content_hash, file_path, pdf_bytes = await upload_store.save(file)
+        processed = upload_store.get_result(content_hash)
         
-        print(f"\n{'='*70}")
-        print(f"Passed! Application processed: {prediction}")
-        print(f"{'='*70}\n")
+        duplicate = processed is not None and reusable_result(processed, 'llm')
         
-        return {
-            "application_id": application_id,
-            "applicant_name": applicant_name,
-            "decision": prediction.lower(),
-            "signature_verified": has_signature,
-            "signature_confidence": sig_confidence,
-            "income": loan_data.get('ApplicantIncome', 0),
-            "loan_amount": loan_data.get('LoanAmount', 0) * 1000,
-            "explanation": explanation_data["explanation"],
-            "metrics": explanation_data.get("metrics", {})
-        }
+        if duplicate:
+            restore_duplicate(processed, file.filename)
+            if processed.get("explanation_status") == "pending":
+                record = await lazy_explanations.ensure(processed["application_id"])
+                processed = {**processed, "explanation": record["explanation"], "metrics": record["metrics"],
+                             "explanation_status": record["explanation_status"]}
+        elif processed is None:
+            processed = await classify_upload(pdf_bytes, file_path, content_hash)
+            if not processed["has_signature"]:
+                upload_store.put_result(content_hash, processed)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+    
+    # Unsigned or already processed: nothing left to generate
+    if not processed["has_signature"] or duplicate:
+        response = upload_response(processed)
+        return sse_response([
+            ("decision", response),
+            ("done", {"explanation": response["explanation"], "metrics": response.get("metrics", {})})
+        ])
+    
+    processed = {**processed, "explanation": None, "metrics": {}, "explanation_status": "streaming",
+                 "explanation_tier": 'llm'}
+    application_uuid = store_explained(processed, file.filename)
+    
+    def on_done(explanation_data):
+        processed.update(
+            explanation=explanation_data["explanation"],
+            metrics=explanation_data.get("metrics", {}),
+            explanation_status=explanation_status(explanation_data)
+        )
+        applications.update_fields(
+            application_uuid,
+            explanation=processed["explanation"],
+            metrics=processed["metrics"],
+            explanation_status=processed["explanation_status"]
+        )
+        upload_store.put_result(content_hash, processed)
+        return {"application_id": processed["application_id"], **explanation_data}
+    
+    return sse_response(
+        [("decision", upload_response(processed))],
+        llm_service.stream_explanation(processed["loan_data"], processed["prediction"]),
+        on_done
+    )
 
 @app.post("/api/loan/add-note")
 async def add_officer_note(note_request: OfficerNote):
 # Add officer notes to an application
     
     try:
-        # Find application
-        app_data = None
-        if note_request.application_id in applications_db:
-            app_data = applications_db[note_request.application_id]
-        else:
-            # Search by original ID
-            for app_id, data in applications_db.items():
-                if data.get('original_application_id') == note_request.application_id:
-                    app_data = data
-                    break
-        
-        if not app_data:
-            raise HTTPException(status_code=404, detail="Application not found")
-        
         # Add note
         new_note = {
             "note": note_request.note,
@@ -345,10 +643,8 @@ async def add_officer_note(note_request: OfficerNote):
             "timestamp": datetime.now().isoformat()
         }
         
-        if "officer_notes" not in app_data:
-            app_data["officer_notes"] = []
-        
-        app_data["officer_notes"].append(new_note)
+        if applications.add_note(note_request.application_id, new_note) is None:
+            raise HTTPException(status_code=404, detail="Application not found")
         
         return {
             "success": True,
@@ -361,26 +657,41 @@ async def add_officer_note(note_request: OfficerNote):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding note: {str(e)}")
 
+@app.post("/api/loan/update-status")
+async def update_application_status(status_update: StatusUpdate):
+# Officer review status change (e.g. pending_review -> reviewed)
+    
+    app_data = applications.update_status(status_update.application_id, status_update.status)
+    if app_data is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    return {
+        "success": True,
+        "application_id": status_update.application_id,
+        "status": app_data["status"]
+    }
+
+@app.delete("/api/loan/{application_id}")
+async def delete_application(application_id: str):
+# Remove an application from the store
+    
+    if applications.delete(application_id) is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    return {"success": True, "application_id": application_id}
+
 @app.post("/api/loan/alternative-terms/{application_id}")
 async def get_alternative_terms(application_id: str):
 # Get alternative loan terms for rejected applications
     
     try:
-        
-        app_data = None
-        if application_id in applications_db:
-            app_data = applications_db[application_id]
-        else:
-            for app_id, data in applications_db.items():
-                if data.get('original_application_id') == application_id:
-                    app_data = data
-                    break
+        app_data = applications.get(application_id)
         
         if not app_data:
             raise HTTPException(status_code=404, detail="Application not found")
         
         # Generate alternative suggestions
-        suggestions = llm_service.suggest_alternative_terms(
+        suggestions = await llm_service.suggest_alternative_terms_async(
             app_data['data'],
             app_data['prediction']
         )
@@ -401,190 +712,327 @@ async def get_analytics_summary():
 # Analytics summary for dashboard
     
     try:
-        total_apps = len([app for app in applications_db.values() if 'prediction' in app])
-        
-        if total_apps == 0:
-            return {
-                "total_applications": 0,
-                "approval_rate": 0.0,
-                "rejection_rate": 0.0,
-                "average_income": 0.0,
-                "average_loan_amount": 0.0,
-                "pending_review": 0
-            }
-        
-        approved = len([app for app in applications_db.values() if app.get('prediction') == 'Approved'])
-        rejected = len([app for app in applications_db.values() if app.get('prediction') == 'Rejected'])
-        pending = len([app for app in applications_db.values() if app.get('status') == 'pending_review'])
-        
-        incomes = [app['data'].get('ApplicantIncome', 0) for app in applications_db.values() if 'data' in app]
-        loan_amounts = [app['data'].get('LoanAmount', 0) * 1000 for app in applications_db.values() if 'data' in app]
-        
-        return {
-            "total_applications": total_apps,
-            "approved": approved,
-            "rejected": rejected,
-            "approval_rate": round((approved / total_apps * 100), 2) if total_apps > 0 else 0,
-            "rejection_rate": round((rejected / total_apps * 100), 2) if total_apps > 0 else 0,
-            "average_income": round(sum(incomes) / len(incomes), 2) if incomes else 0,
-            "average_loan_amount": round(sum(loan_amounts) / len(loan_amounts), 2) if loan_amounts else 0,
-            "pending_review": pending
-        }
+        # Running aggregates, O(1) in the number of applications
+        return applications.summary()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating analytics: {str(e)}")
 
-@app.post("/api/loan/upload-bulk")
-async def upload_bulk_pdfs(files: List[UploadFile] = File(...)):
-# Bulk upload and process multiple loan application PDFs (max50)
+async def save_bulk_files(files, tier='llm'):
+# Save every upload during the request, the job reads them afterwards
     
-    print(f"\n{'='*70}")
-    print(f"RECEIVED BULK UPLOAD: {len(files)} files")
-    print(f"{'='*70}")
+    items = []
+    for file in files:
+        if not file.filename.endswith('.pdf'):
+            items.append({"filename": file.filename, "error": "Only PDF files are allowed"})
+            continue
+        
+        # Content-addressed by SHA-256
+        content_hash, file_path, pdf_bytes = await upload_store.save(file)
+        items.append({
+            "filename": file.filename,
+            "content_hash": content_hash,
+            "file_path": file_path,
+            "pdf_bytes": pdf_bytes,
+            "tier": tier
+        })
     
-    results = []
-    upload_folder = "uploads"
+    return items
+
+async def process_bulk_item(item):
+# One file through the pipeline: parse in a worker process, predict, then explain
     
-    if not os.path.exists(upload_folder):
-        os.makedirs(upload_folder)
+    filename = item["filename"]
+    if "error" in item:
+        return {
+            "filename": filename,
+            "status": "error",
+            "message": item["error"]
+        }
     
-    for file in files:
-        try:
-            # Validate file type
-            if not file.filename.endswith('.pdf'):
-                results.append({
-                    "filename": file.filename,
-                    "status": "error",
-                    "message": "Only PDF files are allowed"
-                })
-                continue
-            
-            # Save uploaded file
-            file_path = os.path.join(upload_folder, file.filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            print(f"\n📄 Processing: {file.filename}")
-            
-            # Check signature
-            has_signature, sig_confidence = detect_signature_in_pdf(file_path)
-            
-            if not has_signature:
-                results.append({
-                    "filename": file.filename,
-                    "status": "incomplete",
-                    "message": "Missing signature",
-                    "signature_confidence": sig_confidence
-                })
-                continue
-            
-            # Extract data
-            loan_data, applicant_name, application_id = extract_loan_data_from_pdf(file_path)
+    content_hash = item["content_hash"]
+    print(f"\n📄 Processing: {filename}")
+    
+    processed = upload_store.get_result(content_hash)
+    tier = item["tier"]
+    
+    if processed is not None and reusable_result(processed, tier):
+        print(f"{filename}: identical document already processed")
+        restore_duplicate(processed, filename)
+    else:
+        if processed is None:
+            # Check signature and extract data (CPU-bound, process pool, PDF parsed once)
+            loop = asyncio.get_running_loop()
+            processed = await loop.run_in_executor(
+                get_process_pool(), parse_application_pdf, item["pdf_bytes"], item["file_path"]
+            )
+            processed["content_hash"] = content_hash
             
-            # ML prediction
-            input_data = pd.DataFrame([loan_data])
-            input_data[num_cols] = scaler.transform(input_data[num_cols])
-            result = model.predict(input_data)
-            prediction = "Approved" if result[0] == 1 else "Rejected"
+            if processed["has_signature"]:
+                # ML prediction
+                processed["prediction"] = await run_in_threadpool(predict_application, processed["loan_data"])
+        
+        if processed["has_signature"]:
+            loan_data = processed["loan_data"]
+            prediction = processed["prediction"]
             
-            # Generate explanation
-            explanation_data = llm_service.generate_explanation(loan_data, prediction)
+            # Generate explanation (I/O-bound, limited concurrency), deferred in lazy mode.
+            # The fast tier runs locally and skips the LLM queue.
+            if tier == 'fast':
+                explanation_data = await explain_or_defer(loan_data, prediction, 'fast')
+            else:
+                async with bulk_llm_semaphore:
+                    explanation_data = await explain_or_defer(loan_data, prediction)
             
-            # Store application
-            application_uuid = str(uuid.uuid4())
-            applications_db[application_uuid] = {
-                "applicant_name": applicant_name,
-                "original_application_id": application_id,
-                "data": loan_data,
-                "prediction": prediction,
+            processed = {
+                **processed,
                 "explanation": explanation_data["explanation"],
                 "metrics": explanation_data.get("metrics", {}),
-                "has_signature": has_signature,
-                "signature_confidence": sig_confidence,
-                "filename": file.filename,
-                "status": "pending_review",
-                "created_at": datetime.now().isoformat(),
-                "officer_notes": []
+                "explanation_status": explanation_data["explanation_status"],
+                "explanation_tier": tier
             }
             
-            applications_db[application_id] = applications_db[application_uuid]
-            
-            results.append({
-                "filename": file.filename,
-                "status": "success",
-                "application_id": application_id,
-                "applicant_name": applicant_name,
-                "decision": prediction.lower(),
-                "income": loan_data.get('ApplicantIncome', 0),
-                "loan_amount": loan_data.get('LoanAmount', 0) * 1000,
-                "signature_confidence": sig_confidence
-            })
-            
-            print(f"{file.filename}: {prediction}")
-            
-        except Exception as e:
-            print(f"Error processing {file.filename}: {str(e)}")
-            results.append({
-                "filename": file.filename,
-                "status": "error",
-                "message": str(e)
-            })
-    
-    # Summary
-    successful = len([r for r in results if r['status'] == 'success'])
-    approved = len([r for r in results if r.get('decision') == 'approved'])
-    rejected = len([r for r in results if r.get('decision') == 'rejected'])
+            # Store application
+            store_explained(processed, filename)
+            print(f"{filename}: {prediction}")
+        
+        upload_store.put_result(content_hash, processed)
+    
+    if not processed["has_signature"]:
+        return {
+            "filename": filename,
+            "status": "incomplete",
+            "message": "Missing signature",
+            "signature_confidence": processed["signature_confidence"]
+        }
+    
+    loan_data = processed["loan_data"]
+    
+    return {
+        "filename": filename,
+        "status": "success",
+        "application_id": processed["application_id"],
+        "applicant_name": processed["applicant_name"],
+        "decision": processed["prediction"].lower(),
+        "income": loan_data.get('ApplicantIncome', 0),
+        "loan_amount": loan_data.get('LoanAmount', 0) * 1000,
+        "signature_confidence": processed["signature_confidence"],
+        "missing_fields": processed.get("missing_fields", [])
+    }
+
+# Shared across jobs so the LLM sees at most LLM_CONCURRENCY bulk calls
+bulk_llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+bulk_jobs = JobManager(process_bulk_item)
+
+@app.post("/api/loan/upload-bulk")
+async def upload_bulk_pdfs(files: List[UploadFile] = File(...), tier: Optional[str] = None):
+# Bulk upload and process multiple loan application PDFs (max50), waits for the
+# whole batch. Prefer /api/jobs/bulk-upload for large batches.
+    
+    print(f"\n{'='*70}")
+    print(f"RECEIVED BULK UPLOAD: {len(files)} files")
+    print(f"{'='*70}")
+    
+    job = bulk_jobs.submit(await save_bulk_files(files, explanation_tier(tier)))
+    
+    # The job keeps running if this client disconnects
+    summary = await job.wait()
     
     print(f"\n{'='*70}")
     print(f"BULK PROCESSING COMPLETE")
-    print(f"   Total: {len(files)} | Success: {successful} | Approved: {approved} | Rejected: {rejected}")
+    print(f"   Total: {summary['total_files']} | Success: {summary['successful']} | Approved: {summary['approved']} | Rejected: {summary['rejected']}")
     print(f"{'='*70}\n")
     
     return {
-        "total_files": len(files),
-        "successful": successful,
-        "failed": len(files) - successful,
-        "approved": approved,
-        "rejected": rejected,
-        "results": results
+        "status": job.status,
+        "total_files": summary["total_files"],
+        "successful": summary["successful"],
+        "failed": summary["total_files"] - summary["successful"],
+        "approved": summary["approved"],
+        "rejected": summary["rejected"],
+        "results": job.results
+    }
+
+@app.post("/api/jobs/bulk-upload", status_code=202)
+async def submit_bulk_job(files: List[UploadFile] = File(...), tier: Optional[str] = None):
+# Start a background bulk job and return its ID right away.
+# Poll /api/jobs/{job_id} or follow /api/jobs/{job_id}/events.
+# ?tier=fast explains with the local assessment so the job runs at model speed.
+    
+    job = bulk_jobs.submit(await save_bulk_files(files, explanation_tier(tier)))
+    print(f"Submitted bulk job {job.id} with {len(files)} files")
+    
+    return {"job_id": job.id, "status": job.status, "total_files": len(job.items)}
+
+@app.post("/api/loan/upload-register")
+async def upload_register(file: UploadFile = File(...), format: str = "ndjson"):
+# Score a CSV/XLSX application register (one application per row), streamed
+# back chunk by chunk as it is read, without LLM explanations. Rows are not
+# stored as applications. format=ndjson gives one result per line then a
+# summary line (or an error line if the register breaks part way), format=csv
+# gives the columns of python -m services.register_import and aborts the
+# response on such an error.
+    
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    try:
+        kind = register_kind(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    print(f"Importing register {file.filename}")
+    results = score_register(file.file, kind, scorer)
+    counts = {"rows": 0, "Approved": 0, "Rejected": 0}
+    
+    def next_chunk():
+        # Read, score and serialize one chunk (worker thread), None when done
+        result = next(results, None)
+        if result is None:
+            return None
+        
+        header = counts["rows"] == 0
+        counts["rows"] += len(result)
+        for decision, count in result["decision"].value_counts().items():
+            counts[decision] += int(count)
+        
+        if format == "csv":
+            return result.to_csv(header=header, index=False)
+        result = result.assign(
+            event="result",
+            missing_fields=result["missing_fields"].map(lambda missing: missing.split(";") if missing else [])
+        )
+        return result[["event", *RESULT_COLUMNS]].to_json(orient="records", lines=True)
+    
+    # The first chunk is read before responding so an unreadable register is a 400
+    start = time.perf_counter()
+    try:
+        first = await run_in_threadpool(next_chunk)
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read register: {e}")
+    
+    async def lines():
+        chunk = first
+        try:
+            while chunk is not None:
+                yield chunk
+                chunk = await run_in_threadpool(next_chunk)
+        except Exception as e:
+            # Rows already sent stand, the client learns where the register broke
+            print(f"Register {file.filename} failed after {counts['rows']} rows: {e}")
+            if format == "csv":
+                # No room for an error row in CSV: abort the response so the
+                # client sees an incomplete transfer, not a short but valid file
+                raise
+            yield json.dumps({"event": "error", "rows": counts["rows"], "message": str(e)}) + "\n"
+            return
+        
+        elapsed = time.perf_counter() - start
+        print(f"Register {file.filename}: {counts['rows']} rows in {elapsed:.1f}s")
+        if format == "ndjson":
+            yield json.dumps({
+                "event": "summary",
+                "rows": counts["rows"],
+                "approved": counts["Approved"],
+                "rejected": counts["Rejected"],
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_minute": round(counts["rows"] / elapsed * 60) if elapsed else None
+            }) + "\n"
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(lines(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/jobs")
+async def list_jobs():
+# Recent bulk jobs, newest first, without per-file results
+    
+    return {"jobs": bulk_jobs.list()}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+# Progress counters plus per-file status and partial results
+    
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job.snapshot()
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, format: str = "ndjson"):
+# Per-file results as they finish, then the final job summary.
+# format=ndjson gives one JSON object per line, format=sse gives server-sent events.
+    
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or sse")
+    
+    async def events():
+        async for event, data in job_events(job):
+            if format == "sse":
+                yield sse_event(event, data)
+            else:
+                yield json.dumps({"event": event, **data}, default=str) + "\n"
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+# Stop a running job, files already processed keep their results
+    
+    job = bulk_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {"job_id": job.id, "status": "cancelling" if not job.finished else job.status}
+
+@app.get("/api/llm/cache-stats")
+async def get_llm_cache_stats():
+# Hit/miss counters for the explanation and alternative-terms cache,
+# API token usage including Anthropic prompt-cache reads and writes,
+# and the LLM governor's limits and circuit breaker state
+    
+    return {
+        **llm_service.cache.stats(),
+        "deferred_explanations": lazy_explanations.stats(),
+        "token_usage": llm_service.usage_stats(),
+        "governor": llm_service.governor.stats()
     }
 
 @app.get("/api/applications/list")
-async def list_applications(status: Optional[str] = None, limit: int = 50):
-# List all applications with optional filtering
+async def list_applications(status: Optional[str] = None, review_status: Optional[str] = None,
+                            limit: int = 50, cursor: Optional[str] = None):
+# List uploaded applications newest first, one page at a time.
+# status filters on the decision (Approved/Rejected), review_status on the
+# officer workflow status. Pass next_cursor back as cursor for the next page.
     
     try:
-        apps_list = []
+        limit = max(1, min(limit, 500))
+        records, next_cursor, total = applications.list_page(
+            decision=status, status=review_status, limit=limit, cursor=cursor
+        )
         
-        for app_id, app_data in applications_db.items():
-            if 'prediction' not in app_data:
-                continue
-            
-            if len(app_id) > 20:
-                continue
-            
-            if status and app_data.get('prediction', '').lower() != status.lower():
-                continue
-            
-            apps_list.append({
-                "application_id": app_data.get('original_application_id', app_id),
-                "applicant_name": app_data.get('applicant_name', 'Unknown'),
-                "decision": app_data.get('prediction', 'Unknown'),
-                "income": app_data.get('data', {}).get('ApplicantIncome', 0),
-                "loan_amount": app_data.get('data', {}).get('LoanAmount', 0) * 1000,
-                "created_at": app_data.get('created_at', ''),
-                "status": app_data.get('status', 'pending_review'),
-                "signature_confidence": app_data.get('signature_confidence', 0)
-            })
-        
-        # Sort by created_at
-        apps_list.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        apps_list = [{
+            "application_id": app_data['original_application_id'],
+            "applicant_name": app_data.get('applicant_name', 'Unknown'),
+            "decision": app_data.get('prediction', 'Unknown'),
+            "income": app_data.get('data', {}).get('ApplicantIncome', 0),
+            "loan_amount": app_data.get('data', {}).get('LoanAmount', 0) * 1000,
+            "created_at": app_data.get('created_at', ''),
+            "status": app_data.get('status', 'pending_review'),
+            "signature_confidence": app_data.get('signature_confidence', 0)
+        } for app_data in records]
         
         return {
-            "applications": apps_list[:limit],
-            "total": len(apps_list)
+            "applications": apps_list,
+            "total": total,
+            "next_cursor": next_cursor
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing applications: {str(e)}")
 
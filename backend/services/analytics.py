@@ -0,0 +1,195 @@
+import math
+
+class QuantileSketch:
+    # Log-bucketed quantile sketch (DDSketch style) with bounded relative error.
+    # Supports insert, delete and merge, and answers quantiles in O(buckets)
+    # independent of how many values were added.
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value, weight=1):
+        # Non-positive values share the zero bucket (incomes and amounts are >= 0)
+        if value <= 0:
+            self.zero_count += weight
+        else:
+            key = self._key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + weight
+            if self.buckets[key] == 0:
+                del self.buckets[key]
+        self.count += weight
+
+    def remove(self, value):
+        self.add(value, weight=-1)
+
+    def merge(self, other):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        if self.count <= 0:
+            return 0.0
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Midpoint of the bucket in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class LoanAggregates:
+    # Running dashboard aggregates kept in step with the application store,
+    # so the analytics summary never has to scan every record.
+
+    def __init__(self):
+        self.total = 0
+        self.approved = 0
+        self.rejected = 0
+        self.pending = 0
+        self.with_data = 0
+        self.income_sum = 0.0
+        self.loan_amount_sum = 0.0
+        self.income_sketch = QuantileSketch()
+        self.loan_amount_sketch = QuantileSketch()
+        self.listed = {}  # (decision, status) -> uploaded applications, for list totals
+
+    def add(self, record, sign=1):
+        if 'prediction' in record:
+            self.total += sign
+        if record.get('prediction') == 'Approved':
+            self.approved += sign
+        elif record.get('prediction') == 'Rejected':
+            self.rejected += sign
+        if record.get('status') == 'pending_review':
+            self.pending += sign
+        self._count_listed(record, record.get('status'), sign)
+
+        if 'data' in record:
+            income = record['data'].get('ApplicantIncome', 0)
+            loan_amount = record['data'].get('LoanAmount', 0) * 1000
+            self.with_data += sign
+            self.income_sum += sign * income
+            self.loan_amount_sum += sign * loan_amount
+            self.income_sketch.add(income, weight=sign)
+            self.loan_amount_sketch.add(loan_amount, weight=sign)
+
+    def remove(self, record):
+        self.add(record, sign=-1)
+
+    def change_status(self, old_status, new_status, record=None):
+        if old_status == 'pending_review':
+            self.pending -= 1
+        if new_status == 'pending_review':
+            self.pending += 1
+        if record is not None:
+            self._count_listed(record, old_status, -1)
+            self._count_listed(record, new_status, 1)
+
+    def _count_listed(self, record, status, sign):
+        # Only uploaded applications appear in /api/applications/list
+        if not record.get('original_application_id') or 'prediction' not in record:
+            return
+        key = (record['prediction'].lower(), status)
+        self.listed[key] = self.listed.get(key, 0) + sign
+        if self.listed[key] == 0:
+            del self.listed[key]
+
+    def listed_total(self, decision=None, status=None):
+        return sum(
+            count for (listed_decision, listed_status), count in self.listed.items()
+            if (decision is None or listed_decision == decision.lower())
+            and (status is None or listed_status == status)
+        )
+
+    def merge(self, other):
+        # Combine aggregates from another worker or shard
+        self.total += other.total
+        self.approved += other.approved
+        self.rejected += other.rejected
+        self.pending += other.pending
+        self.with_data += other.with_data
+        self.income_sum += other.income_sum
+        self.loan_amount_sum += other.loan_amount_sum
+        self.income_sketch.merge(other.income_sketch)
+        self.loan_amount_sketch.merge(other.loan_amount_sketch)
+        for key, count in other.listed.items():
+            self.listed[key] = self.listed.get(key, 0) + count
+            if self.listed[key] == 0:
+                del self.listed[key]
+
+    def summary(self):
+
+        if self.total == 0:
+            return {
+                "total_applications": 0,
+                "approval_rate": 0.0,
+                "rejection_rate": 0.0,
+                "average_income": 0.0,
+                "average_loan_amount": 0.0,
+                "pending_review": 0
+            }
+
+        return {
+            "total_applications": self.total,
+            "approved": self.approved,
+            "rejected": self.rejected,
+            "approval_rate": round((self.approved / self.total * 100), 2),
+            "rejection_rate": round((self.rejected / self.total * 100), 2),
+            "average_income": round(self.income_sum / self.with_data, 2) if self.with_data else 0,
+            "average_loan_amount": round(self.loan_amount_sum / self.with_data, 2) if self.with_data else 0,
+            "median_income": round(self.income_sketch.quantile(0.5), 2),
+            "median_loan_amount": round(self.loan_amount_sketch.quantile(0.5), 2),
+            "p90_income": round(self.income_sketch.quantile(0.9), 2),
+            "p90_loan_amount": round(self.loan_amount_sketch.quantile(0.9), 2),
+            "pending_review": self.pending
+        }
+
+    @classmethod
+    def from_records(cls, records):
+        aggregates = cls()
+        for record in records:
+            aggregates.add(record)
+        return aggregates
+
+
+def check_aggregates(aggregates, records):
+    # Recompute from scratch and return the fields that disagree (empty = consistent)
+    expected = LoanAggregates.from_records(records)
+    mismatches = {}
+
+    for field in ('total', 'approved', 'rejected', 'pending', 'with_data'):
+        if getattr(aggregates, field) != getattr(expected, field):
+            mismatches[field] = (getattr(aggregates, field), getattr(expected, field))
+
+    for field in ('income_sum', 'loan_amount_sum'):
+        if not math.isclose(getattr(aggregates, field), getattr(expected, field), rel_tol=1e-9, abs_tol=1e-6):
+            mismatches[field] = (getattr(aggregates, field), getattr(expected, field))
+
+    if aggregates.listed != expected.listed:
+        mismatches['listed'] = (aggregates.listed, expected.listed)
+
+    for field in ('income_sketch', 'loan_amount_sketch'):
+        actual_sketch = getattr(aggregates, field)
+        expected_sketch = getattr(expected, field)
+        if (actual_sketch.buckets != expected_sketch.buckets
+                or actual_sketch.zero_count != expected_sketch.zero_count):
+            mismatches[field] = "bucket counts differ"
+
+    return mismatches
@@ -0,0 +1,728 @@
+import base64
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from services.analytics import LoanAggregates, check_aggregates
+
+APPLICATION_STORE = os.getenv('APPLICATION_STORE', 'sqlite').lower()
+APPLICATION_DB_PATH = os.getenv('APPLICATION_DB_PATH', 'applications.sqlite3')
+
+# Group commit: max writes per transaction and max wait before committing
+APPLICATION_DB_BATCH_SIZE = int(os.getenv('APPLICATION_DB_BATCH_SIZE', 256))
+APPLICATION_DB_FLUSH_MS = float(os.getenv('APPLICATION_DB_FLUSH_MS', 50))
+
+# Attempts per batch before the writer falls back to committing its writes one by one
+APPLICATION_DB_WRITE_RETRIES = int(os.getenv('APPLICATION_DB_WRITE_RETRIES', 5))
+
+def encode_cursor(created_at, application_uuid):
+    # Opaque page cursor: position of the last item returned
+    raw = json.dumps([created_at, application_uuid], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, application_uuid = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(created_at), str(application_uuid)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def is_listed(record):
+    # Uploaded applications with a decision, as shown by /api/applications/list
+    return bool(record.get('original_application_id')) and 'prediction' in record
+
+
+class ListIndex:
+    # Newest-first listing index. Keeps (created_at, uuid) keys sorted, with
+    # one list per (decision, status) filter combination, so a filtered page
+    # is a bisect to the cursor plus a slice of the page size.
+
+    def __init__(self):
+        self._lists = {}  # (decision or None, status or None) -> sorted keys
+
+    def _filters(self, record, status):
+        decision = record['prediction'].lower()
+        return [(None, None), (decision, None), (None, status), (decision, status)]
+
+    def add(self, application_uuid, record, status=None):
+        key = (record.get('created_at', ''), application_uuid)
+        for name in self._filters(record, status if status is not None else record.get('status')):
+            keys = self._lists.setdefault(name, [])
+            # Records mostly arrive in created_at order, so this is usually an append
+            if not keys or keys[-1] < key:
+                keys.append(key)
+            else:
+                bisect.insort(keys, key)
+
+    def remove(self, application_uuid, record, status=None):
+        key = (record.get('created_at', ''), application_uuid)
+        for name in self._filters(record, status if status is not None else record.get('status')):
+            keys = self._lists.get(name, [])
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+
+    def page(self, decision=None, status=None, limit=50, cursor=None):
+        # Returns (uuids newest first, next cursor or None)
+        keys = self._lists.get((decision.lower() if decision else None, status), [])
+        end = bisect.bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys)
+        start = max(0, end - limit)
+
+        page = keys[start:end][::-1]
+        next_cursor = encode_cursor(*page[-1]) if start > 0 and page else None
+        return [application_uuid for _, application_uuid in page], next_cursor
+
+
+class ApplicationRepository:
+    # In-memory application store. Each record is kept once under its UUID,
+    # with secondary indexes so lookups by the PDF's original application ID
+    # or by uploaded filename are O(1) instead of a scan over every record.
+    # Dashboard aggregates are updated on every write, so records must be
+    # changed through insert/update_status/delete rather than in place.
+
+    def __init__(self):
+        self._records = {}          # uuid -> record
+        self._by_original_id = {}   # original_application_id -> uuid
+        self._by_filename = {}      # filename -> uuid
+        self._listing = ListIndex()
+        self.aggregates = LoanAggregates()
+
+    def insert(self, record):
+        application_uuid = str(uuid.uuid4())
+        self._records[application_uuid] = record
+        self.aggregates.add(record)
+        if is_listed(record):
+            self._listing.add(application_uuid, record)
+
+        # Latest upload wins when an ID or filename is reused
+        original_id = record.get('original_application_id')
+        if original_id:
+            self._by_original_id[original_id] = application_uuid
+        filename = record.get('filename')
+        if filename:
+            self._by_filename[filename] = application_uuid
+
+        return application_uuid
+
+    def get(self, application_id):
+        # Accepts either the UUID or the original application ID
+        application_uuid = self._resolve(application_id)
+        return self._records.get(application_uuid) if application_uuid else None
+
+    def get_with_id(self, application_id):
+        # (uuid, record), or (None, None) when not found
+        application_uuid = self._resolve(application_id)
+        record = self._records.get(application_uuid) if application_uuid else None
+        return (application_uuid, record) if record is not None else (None, None)
+
+    def get_by_filename(self, filename):
+        application_uuid = self._by_filename.get(filename)
+        return self._records.get(application_uuid) if application_uuid else None
+
+    def add_note(self, application_id, note):
+        record = self.get(application_id)
+        if record is None:
+            return None
+
+        record.setdefault("officer_notes", []).append(note)
+        return record
+
+    def update_fields(self, application_id, **fields):
+        # Plain fields such as explanation and metrics, not decision or status
+        record = self.get(application_id)
+        if record is None:
+            return None
+
+        record.update(fields)
+        return record
+
+    def update_status(self, application_id, status):
+        application_uuid = self._resolve(application_id)
+        record = self._records.get(application_uuid) if application_uuid else None
+        if record is None:
+            return None
+
+        self.aggregates.change_status(record.get('status'), status, record)
+        if is_listed(record):
+            self._listing.remove(application_uuid, record)
+            self._listing.add(application_uuid, record, status=status)
+        record['status'] = status
+        return record
+
+    def delete(self, application_id):
+        application_uuid = self._resolve(application_id)
+        if application_uuid is None:
+            return None
+
+        record = self._records.pop(application_uuid)
+        self.aggregates.remove(record)
+        if is_listed(record):
+            self._listing.remove(application_uuid, record)
+
+        original_id = record.get('original_application_id')
+        if self._by_original_id.get(original_id) == application_uuid:
+            del self._by_original_id[original_id]
+        filename = record.get('filename')
+        if self._by_filename.get(filename) == application_uuid:
+            del self._by_filename[filename]
+
+        return record
+
+    def _resolve(self, application_id):
+        if application_id in self._records:
+            return application_id
+        return self._by_original_id.get(application_id)
+
+    def list_page(self, decision=None, status=None, limit=50, cursor=None):
+        # Newest first, returns (records, next cursor, total matching)
+        uuids, next_cursor = self._listing.page(decision, status, limit, cursor)
+        total = self.aggregates.listed_total(decision, status)
+        return [self._records[application_uuid] for application_uuid in uuids], next_cursor, total
+
+    def summary(self):
+        return self.aggregates.summary()
+
+    def check_consistency(self):
+        # Full recompute, for tests and debugging only
+        return check_aggregates(self.aggregates, self._records.values())
+
+    def values(self):
+        return self._records.values()
+
+    def __contains__(self, application_id):
+        return self.get(application_id) is not None
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SQLiteApplicationRepository:
+    # Durable application store on SQLite (WAL mode), safe to share between
+    # uvicorn workers. Writes go through a single writer thread that groups
+    # them into one transaction per batch (group commit), so a bulk upload
+    # pays one fsync per batch rather than per file. Records waiting to be
+    # committed stay in an in-memory overlay so reads see their own writes.
+    # Aggregates are persisted as counters and sketch buckets updated in the
+    # same transactions, so the summary never scans the applications table.
+    # A batch that fails to commit is retried with backoff, then committed one
+    # write at a time. Writes that still fail stay readable from the overlay
+    # and are reported by flush() and write_errors().
+
+    def __init__(self, path=APPLICATION_DB_PATH, batch_size=APPLICATION_DB_BATCH_SIZE,
+                 flush_interval=APPLICATION_DB_FLUSH_MS / 1000, write_retries=APPLICATION_DB_WRITE_RETRIES):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_retries = write_retries
+        self._failed_writes = []        # (uuid, operation, error) not committed
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._version = 0
+        self._pending = {}              # uuid -> (version, record or None if deleted)
+        self._pending_original_id = {}  # original_application_id -> uuid
+        self._pending_filename = {}     # filename -> uuid
+        self._pending_delta = LoanAggregates()
+
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS applications (
+                uuid TEXT PRIMARY KEY,
+                original_application_id TEXT,
+                filename TEXT,
+                prediction TEXT,
+                status TEXT,
+                created_at TEXT,
+                record TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_applications_original_id ON applications (original_application_id);
+            CREATE INDEX IF NOT EXISTS idx_applications_filename ON applications (filename);
+            CREATE INDEX IF NOT EXISTS idx_applications_created ON applications (created_at, uuid);
+            CREATE INDEX IF NOT EXISTS idx_applications_decision
+                ON applications (prediction COLLATE NOCASE, created_at, uuid);
+            CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status, created_at, uuid);
+            CREATE TABLE IF NOT EXISTS officer_notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                uuid TEXT,
+                note TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_officer_notes_uuid ON officer_notes (uuid);
+            CREATE TABLE IF NOT EXISTS aggregate_counters (name TEXT PRIMARY KEY, value REAL);
+            CREATE TABLE IF NOT EXISTS aggregate_buckets (
+                metric TEXT,
+                bucket INTEGER,
+                count INTEGER,
+                PRIMARY KEY (metric, bucket)
+            );
+        """)
+        conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name="application-writer", daemon=True)
+        self._writer.start()
+
+    def _connection(self):
+        # One connection per thread, WAL lets readers run alongside the writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Write path
+
+    def _stage(self, application_uuid, record, op):
+        with self._lock:
+            self._version += 1
+            self._pending[application_uuid] = (self._version, record)
+            self._queue.put((self._version, application_uuid, op))
+
+    def insert(self, record):
+        application_uuid = str(uuid.uuid4())
+        record = dict(record)
+        record.setdefault("officer_notes", [])
+
+        with self._lock:
+            if record.get('original_application_id'):
+                self._pending_original_id[record['original_application_id']] = application_uuid
+            if record.get('filename'):
+                self._pending_filename[record['filename']] = application_uuid
+            self._pending_delta.add(record)
+
+        self._stage(application_uuid, record, ("insert", record))
+        return application_uuid
+
+    def add_note(self, application_id, note):
+        application_uuid, record = self._lookup(application_id)
+        if record is None:
+            return None
+
+        record = {**record, "officer_notes": record.get("officer_notes", []) + [note]}
+        self._stage(application_uuid, record, ("note", note))
+        return record
+
+    def update_fields(self, application_id, **fields):
+        # Plain fields such as explanation and metrics, not decision or status
+        application_uuid, record = self._lookup(application_id)
+        if record is None:
+            return None
+
+        record = {**record, **fields}
+        self._stage(application_uuid, record, ("fields", fields))
+        return record
+
+    def update_status(self, application_id, status):
+        application_uuid, record = self._lookup(application_id)
+        if record is None:
+            return None
+
+        old_status = record.get('status')
+        with self._lock:
+            self._pending_delta.change_status(old_status, status, record)
+        self._stage(application_uuid, {**record, "status": status}, ("status", old_status, status, record))
+        return {**record, "status": status}
+
+    def delete(self, application_id):
+        application_uuid, record = self._lookup(application_id)
+        if record is None:
+            return None
+
+        with self._lock:
+            self._pending_delta.remove(record)
+        self._stage(application_uuid, None, ("delete", record))
+        return record
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                self._queue.task_done()
+                return
+
+            # Group commit: collect more writes until the batch fills or the interval passes
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._commit_with_retry(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _commit_with_retry(self, batch, attempts=None):
+        attempts = max(1, self.write_retries if attempts is None else attempts)
+        delay = 0.05
+        for attempt in range(attempts):
+            try:
+                self._commit_batch(batch)
+                return
+            except Exception as e:
+                error = e
+                print(f"Error writing application batch ({len(batch)} writes, attempt {attempt + 1}): {str(e)}")
+                if attempt + 1 < attempts:
+                    time.sleep(delay)
+                    delay = min(delay * 2, 2.0)
+
+        if len(batch) > 1:
+            # Isolate the writes that cannot be committed from the rest of the batch
+            for item in batch:
+                self._commit_with_retry([item], attempts=1)
+            return
+
+        _, application_uuid, op = batch[0]
+        with self._lock:
+            self._failed_writes.append((application_uuid, op[0], str(error)))
+        print(f"Application write not committed: {op[0]} {application_uuid}: {str(error)}")
+
+    def _commit_batch(self, batch):
+        conn = self._connection()
+        # delta is what the tables hold after this batch, estimated is what was staged into the overlay
+        delta = LoanAggregates()
+        estimated = LoanAggregates()
+
+        with conn:
+            # Take the write lock before reading stored statuses, so another writer cannot change them in between
+            conn.execute("BEGIN IMMEDIATE")
+            for _, application_uuid, op in batch:
+                kind = op[0]
+                if kind == "insert":
+                    record = op[1]
+                    stored = {k: v for k, v in record.items() if k not in ("status", "officer_notes")}
+                    conn.execute(
+                        "INSERT OR REPLACE INTO applications VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (application_uuid, record.get('original_application_id'), record.get('filename'),
+                         record.get('prediction'), record.get('status'), record.get('created_at', ''),
+                         json.dumps(stored, default=str))
+                    )
+                    for note in record.get("officer_notes", []):
+                        conn.execute("INSERT INTO officer_notes (uuid, note) VALUES (?, ?)",
+                                     (application_uuid, json.dumps(note)))
+                    delta.add(record)
+                    estimated.add(record)
+                elif kind == "note":
+                    conn.execute("INSERT INTO officer_notes (uuid, note) VALUES (?, ?)",
+                                 (application_uuid, json.dumps(op[1])))
+                elif kind == "fields":
+                    # json_set per field: values are replaced as given, None included
+                    paths = []
+                    for name, value in op[1].items():
+                        paths.extend([f'$."{name}"', json.dumps(value, default=str)])
+                    assignments = ", ".join("?, json(?)" for _ in op[1])
+                    conn.execute(f"UPDATE applications SET record = json_set(record, {assignments}) WHERE uuid = ?",
+                                 (*paths, application_uuid))
+                elif kind == "status":
+                    stored = self._stored_record(conn, application_uuid)
+                    conn.execute("UPDATE applications SET status = ? WHERE uuid = ?", (op[2], application_uuid))
+                    if stored is not None:
+                        delta.change_status(stored['status'], op[2], stored)
+                    estimated.change_status(op[1], op[2], op[3])
+                elif kind == "delete":
+                    stored = self._stored_record(conn, application_uuid)
+                    conn.execute("DELETE FROM applications WHERE uuid = ?", (application_uuid,))
+                    conn.execute("DELETE FROM officer_notes WHERE uuid = ?", (application_uuid,))
+                    if stored is not None:
+                        delta.remove(stored)
+                    estimated.remove(op[1])
+
+            self._apply_aggregate_delta(conn, delta)
+
+        # Committed: drop overlay entries that have not been rewritten since
+        with self._lock:
+            for version, application_uuid, _ in batch:
+                entry = self._pending.get(application_uuid)
+                if entry is not None and entry[0] == version:
+                    del self._pending[application_uuid]
+                    record = entry[1] or {}
+                    if self._pending_original_id.get(record.get('original_application_id')) == application_uuid:
+                        del self._pending_original_id[record['original_application_id']]
+                    if self._pending_filename.get(record.get('filename')) == application_uuid:
+                        del self._pending_filename[record['filename']]
+            self._pending_delta.merge(_negated(estimated))
+
+    def _stored_record(self, conn, application_uuid):
+        # The committed row as this transaction sees it, None if another writer deleted it
+        row = conn.execute("SELECT status, record FROM applications WHERE uuid = ?", (application_uuid,)).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row[1])
+        record["status"] = row[0]
+        return record
+
+    def _apply_aggregate_delta(self, conn, delta):
+        for name, value in _aggregate_counters(delta).items():
+            if value:
+                conn.execute(
+                    "INSERT INTO aggregate_counters VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, value)
+                )
+        for metric, sketch in (("income", delta.income_sketch), ("loan_amount", delta.loan_amount_sketch)):
+            for bucket, count in sketch.buckets.items():
+                if count:
+                    conn.execute(
+                        "INSERT INTO aggregate_buckets VALUES (?, ?, ?) "
+                        "ON CONFLICT(metric, bucket) DO UPDATE SET count = count + excluded.count",
+                        (metric, bucket, count)
+                    )
+
+    def flush(self):
+        # Block until every queued write is committed. Raises RuntimeError if
+        # any write could not be committed since the last flush.
+        self._queue.join()
+        failed = self.write_errors(clear=True)
+        if failed:
+            application_uuid, kind, error = failed[0]
+            raise RuntimeError(f"{len(failed)} application writes not committed, first: {kind} {application_uuid}: {error}")
+
+    def write_errors(self, clear=False):
+        # (uuid, operation, error) for writes that could not be committed
+        with self._lock:
+            failed = list(self._failed_writes)
+            if clear:
+                self._failed_writes.clear()
+        return failed
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        failed = self.write_errors()
+        if failed:
+            print(f"Warning: {len(failed)} application writes were not committed")
+
+    # Read path
+
+    def _lookup(self, application_id):
+        with self._lock:
+            application_uuid = (application_id if application_id in self._pending
+                                else self._pending_original_id.get(application_id))
+            if application_uuid is not None and application_uuid in self._pending:
+                record = self._pending[application_uuid][1]
+                # A pending delete of the newest record for an original ID uncovers the older ones
+                if record is not None or application_uuid == application_id:
+                    return application_uuid, record
+
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT uuid, status, record FROM applications WHERE uuid = ? "
+            "UNION ALL SELECT * FROM (SELECT uuid, status, record FROM applications "
+            "WHERE original_application_id = ? ORDER BY created_at DESC)",
+            (application_id, application_id)
+        )
+        for row in rows:
+            with self._lock:
+                entry = self._pending.get(row[0])
+            if entry is None:
+                return row[0], self._load(conn, row)
+            if entry[1] is not None:
+                return row[0], entry[1]
+        return None, None
+
+    def _load(self, conn, row):
+        return self._load_many(conn, [row])[0]
+
+    def _load_many(self, conn, rows):
+        # Records for (uuid, status, record) rows, with their notes in one query
+        notes = {}
+        if rows:
+            placeholders = ", ".join("?" * len(rows))
+            for application_uuid, note in conn.execute(
+                f"SELECT uuid, note FROM officer_notes WHERE uuid IN ({placeholders}) ORDER BY id",
+                [row[0] for row in rows]
+            ):
+                notes.setdefault(application_uuid, []).append(json.loads(note))
+
+        records = []
+        for application_uuid, status, record_json in rows:
+            record = json.loads(record_json)
+            record["status"] = status
+            record["officer_notes"] = notes.get(application_uuid, [])
+            records.append(record)
+        return records
+
+    def get(self, application_id):
+        return self._lookup(application_id)[1]
+
+    def get_with_id(self, application_id):
+        # (uuid, record), or (None, None) when not found
+        return self._lookup(application_id)
+
+    def get_by_filename(self, filename):
+        with self._lock:
+            application_uuid = self._pending_filename.get(filename)
+            if application_uuid in self._pending:
+                return self._pending[application_uuid][1]
+
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT uuid, status, record FROM applications WHERE filename = ? ORDER BY created_at DESC LIMIT 1",
+            (filename,)
+        ).fetchone()
+        return self._load(conn, row) if row else None
+
+    def values(self):
+        # Streams committed rows, then records still waiting in the overlay
+        with self._lock:
+            pending = dict(self._pending)
+
+        conn = self._connection()
+        cursor = conn.execute("SELECT uuid, status, record FROM applications")
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            yield from self._load_many(conn, [row for row in rows if row[0] not in pending])
+
+        for _, record in pending.values():
+            if record is not None:
+                yield record
+
+    def list_page(self, decision=None, status=None, limit=50, cursor=None):
+        # Newest first, returns (records, next cursor, total matching).
+        # Walks the (filter, created_at, uuid) indexes from the cursor, merging
+        # in records that are still waiting for the writer.
+        position = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            pending = dict(self._pending)
+
+        def matches(record):
+            return (is_listed(record)
+                    and (decision is None or record['prediction'].lower() == decision.lower())
+                    and (status is None or record.get('status') == status))
+
+        candidates = [
+            ((record.get('created_at', ''), application_uuid), record)
+            for application_uuid, (_, record) in pending.items()
+            if record is not None and matches(record)
+            and (position is None or (record.get('created_at', ''), application_uuid) < position)
+        ]
+
+        where = ["original_application_id IS NOT NULL", "original_application_id != ''", "prediction IS NOT NULL"]
+        params = []
+        if decision:
+            where.append("prediction = ? COLLATE NOCASE")
+            params.append(decision)
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if position:
+            where.append("(created_at, uuid) < (?, ?)")
+            params.extend(position)
+
+        conn = self._connection()
+        # Over-fetch by the overlay size, rows it shadows are skipped
+        rows = conn.execute(
+            f"SELECT uuid, status, record, created_at FROM applications WHERE {' AND '.join(where)} "
+            "ORDER BY created_at DESC, uuid DESC LIMIT ?",
+            (*params, limit + 1 + len(pending))
+        ).fetchall()
+        rows = [row for row in rows if row[0] not in pending]
+        for row, record in zip(rows, self._load_many(conn, [row[:3] for row in rows])):
+            candidates.append(((row[3], row[0]), record))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        page = candidates[:limit]
+        next_cursor = encode_cursor(*page[-1][0]) if len(candidates) > limit and page else None
+        return [record for _, record in page], next_cursor, self.aggregates.listed_total(decision, status)
+
+    def _stored_aggregates(self):
+        conn = self._connection()
+        aggregates = LoanAggregates()
+        counters = dict(conn.execute("SELECT name, value FROM aggregate_counters"))
+        _load_aggregate_counters(aggregates, counters)
+        for metric, bucket, count in conn.execute("SELECT metric, bucket, count FROM aggregate_buckets"):
+            sketch = aggregates.income_sketch if metric == "income" else aggregates.loan_amount_sketch
+            if count:
+                sketch.buckets[bucket] = count
+        return aggregates
+
+    @property
+    def aggregates(self):
+        aggregates = self._stored_aggregates()
+        with self._lock:
+            aggregates.merge(self._pending_delta)
+        return aggregates
+
+    def summary(self):
+        return self.aggregates.summary()
+
+    def check_consistency(self):
+        # Full recompute, for tests and debugging only
+        self.flush()
+        return check_aggregates(self._stored_aggregates(), self.values())
+
+    def __contains__(self, application_id):
+        return self.get(application_id) is not None
+
+    def __len__(self):
+        return int(self.aggregates.total)
+
+
+def _aggregate_counters(aggregates):
+    return {
+        "total": aggregates.total,
+        "approved": aggregates.approved,
+        "rejected": aggregates.rejected,
+        "pending": aggregates.pending,
+        "with_data": aggregates.with_data,
+        "income_sum": aggregates.income_sum,
+        "loan_amount_sum": aggregates.loan_amount_sum,
+        "income_zero": aggregates.income_sketch.zero_count,
+        "income_count": aggregates.income_sketch.count,
+        "loan_amount_zero": aggregates.loan_amount_sketch.zero_count,
+        "loan_amount_count": aggregates.loan_amount_sketch.count,
+        **{f"listed|{decision}|{status or ''}": count for (decision, status), count in aggregates.listed.items()}
+    }
+
+def _load_aggregate_counters(aggregates, counters):
+    for name in ("total", "approved", "rejected", "pending", "with_data"):
+        setattr(aggregates, name, int(counters.get(name, 0)))
+    aggregates.income_sum = counters.get("income_sum", 0.0)
+    aggregates.loan_amount_sum = counters.get("loan_amount_sum", 0.0)
+    aggregates.income_sketch.zero_count = int(counters.get("income_zero", 0))
+    aggregates.income_sketch.count = int(counters.get("income_count", 0))
+    aggregates.loan_amount_sketch.zero_count = int(counters.get("loan_amount_zero", 0))
+    aggregates.loan_amount_sketch.count = int(counters.get("loan_amount_count", 0))
+    for name, value in counters.items():
+        if name.startswith("listed|") and value:
+            _, decision, status = name.split("|", 2)
+            aggregates.listed[(decision, status or None)] = int(value)
+
+def _negated(aggregates):
+    negated = LoanAggregates()
+    _load_aggregate_counters(negated, {name: -value for name, value in _aggregate_counters(aggregates).items()})
+    negated.income_sum = -aggregates.income_sum
+    negated.loan_amount_sum = -aggregates.loan_amount_sum
+    negated.income_sketch.buckets = {k: -v for k, v in aggregates.income_sketch.buckets.items()}
+    negated.loan_amount_sketch.buckets = {k: -v for k, v in aggregates.loan_amount_sketch.buckets.items()}
+    return negated
+
+
+def create_application_repository():
+    # APPLICATION_STORE=sqlite (durable, default) or memory
+    if APPLICATION_STORE == 'memory':
+        return ApplicationRepository()
+    print(f"Using SQLite application store: {APPLICATION_DB_PATH}")
+    return SQLiteApplicationRepository()
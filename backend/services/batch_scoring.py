@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from services.loan_model import FEATURE_COLS, LoanScorer
+
+# Offline scoring of a directory of application PDFs:
+#   python -m services.batch_scoring malaysian_pdfs -o scores.csv
+# Signature check and extraction run across all cores, results are scored
+# in chunks with one vectorized model call and appended to the output as
+# each chunk finishes. Re-running with the same output skips files already
+# written, so an interrupted run resumes where it stopped. Files that failed
+# (status "error") are tried again; their new row is appended, so the last
+# row for a path is the current one.
+
+# Files scored and written together
+SCORING_CHUNK_SIZE = int(os.getenv('SCORING_CHUNK_SIZE', 1000))
+
+COLUMNS = ['path', 'status', 'application_id', 'applicant_name', 'decision', 'approval_probability',
+           'signature_confidence', 'missing_fields', *FEATURE_COLS, 'explanation', 'error', 'scored_at']
+NUMERIC_COLUMNS = {'approval_probability', 'signature_confidence', *FEATURE_COLS}
+
+# CSV rows end with \r\n and no field may contain it, so the last \r\n
+# marks the end of the last complete row
+CSV_ROW_END = '\r\n'
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+def find_pdfs(input_dir):
+    # Paths of every PDF under input_dir, relative and sorted
+    found = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if name.lower().endswith('.pdf'):
+                found.append(os.path.relpath(os.path.join(root, name), input_dir).replace(os.sep, '/'))
+    return sorted(found)
+
+def _quiet_worker():
+    # The regex fallback path reports progress on stdout, not useful across thousands of files
+    sys.stdout = open(os.devnull, 'w')
+
+def parse_file(input_dir, relative_path):
+    # Worker process: signature check and extraction for one file
+    from services.bulk_pipeline import parse_application_pdf
+
+    path = os.path.join(input_dir, relative_path)
+    try:
+        with open(path, 'rb') as f:
+            pdf_bytes = f.read()
+        return relative_path, parse_application_pdf(pdf_bytes, path), None
+    except Exception as e:
+        return relative_path, None, f"{type(e).__name__}: {e}"
+
+
+class CsvResultWriter:
+
+    def __init__(self, path):
+        self.path = path
+
+    def completed(self):
+        # Paths already written, other than as errors. A row cut off by an
+        # interrupted run is dropped first.
+        if not os.path.exists(self.path):
+            return set()
+
+        self._truncate_partial_row()
+        with open(self.path, newline='', encoding='utf-8') as f:
+            return {row['path'] for row in csv.DictReader(f) if row['status'] != 'error'}
+
+    def _truncate_partial_row(self):
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            position = size
+            while position > 0:
+                block = max(0, position - 65536)
+                f.seek(block)
+                # Overlap by one byte so a \r\n split across blocks is found
+                data = f.read(min(size, position + 1) - block)
+                end = data.rfind(CSV_ROW_END.encode())
+                if end != -1:
+                    complete = block + end + len(CSV_ROW_END)
+                    if complete < size:
+                        print(f"Dropping {size - complete} bytes of an incomplete row from {self.path}")
+                        f.truncate(complete)
+                    return
+                position = block
+            f.truncate(0)
+
+    def write(self, rows):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, lineterminator=CSV_ROW_END)
+            if new_file:
+                writer.writeheader()
+            writer.writerows(
+                {key: value.replace(CSV_ROW_END, '\n') if isinstance(value, str) else value
+                 for key, value in row.items()}
+                for row in rows
+            )
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetResultWriter:
+    # Parquet files cannot be appended to, so the output is a directory of
+    # part files, one per chunk, readable as one table with pd.read_parquet(dir).
+    # Each part is written under a hidden temporary name (skipped by readers)
+    # and renamed when complete.
+
+    def __init__(self, path):
+        if pyarrow is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow), or write to a .csv file")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith('.part-') and name.endswith('.tmp'):
+                os.remove(os.path.join(path, name))
+        self.parts = len(self._part_files())
+        # Fixed types so parts with all-empty columns still read as one table
+        self.schema = pyarrow.schema([
+            (column, pyarrow.float64() if column in NUMERIC_COLUMNS else pyarrow.string()) for column in COLUMNS
+        ])
+
+    def _part_files(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith('part-') and name.endswith('.parquet'))
+
+    def completed(self):
+        # Paths already written, other than as errors
+        done = set()
+        for name in self._part_files():
+            table = pq.read_table(os.path.join(self.path, name), columns=['path', 'status'])
+            done.update(path for path, status in zip(table.column('path').to_pylist(),
+                                                     table.column('status').to_pylist()) if status != 'error')
+        return done
+
+    def write(self, rows):
+        table = pyarrow.Table.from_pylist(rows, schema=self.schema)
+        name = f"part-{self.parts:05d}.parquet"
+        final_path = os.path.join(self.path, name)
+        temp_path = os.path.join(self.path, f".{name}.tmp")
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, final_path)
+        self.parts += 1
+
+
+def create_writer(output, output_format=None):
+    output_format = output_format or ('csv' if output.lower().endswith('.csv') else 'parquet')
+    if output_format == 'csv':
+        return CsvResultWriter(output)
+    return ParquetResultWriter(output)
+
+
+class Explainer:
+    # Optional explanations for scored rows: "fast" is the local rule-based
+    # assessment, "llm" calls the LLM per row (falls back to "fast" on failure)
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.llm_service = None
+        self.loop = None
+        if mode == 'llm':
+            from services.llm_service import LoanExplainerService
+            self.llm_service = LoanExplainerService()
+            self.loop = asyncio.new_event_loop()
+
+    def explain(self, items):
+        # items: [(loan_data, decision)] -> explanation texts
+        if self.mode == 'fast':
+            from services.template_explainer import template_explanation
+            return [template_explanation(loan_data, decision)["explanation"] for loan_data, decision in items]
+
+        async def explain_all():
+            # Concurrency and rate limits are applied by the service's governor
+            results = await asyncio.gather(*[
+                self.llm_service.generate_explanation_async(loan_data, decision) for loan_data, decision in items
+            ])
+            return [result["explanation"] for result in results]
+
+        return self.loop.run_until_complete(explain_all())
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.run_until_complete(self.llm_service.aclose())
+            self.loop.close()
+
+
+def build_rows(parsed_chunk, scorer, explainer=None):
+    # [(path, parsed, error)] -> output rows, signed documents scored in one call
+    scored_at = datetime.now().isoformat()
+    rows = []
+    signed = []
+
+    for relative_path, parsed, error in parsed_chunk:
+        row = dict.fromkeys(COLUMNS)
+        row.update(path=relative_path, scored_at=scored_at)
+        if error is not None:
+            row.update(status='error', error=error)
+        elif not parsed["has_signature"]:
+            row.update(status='unsigned', signature_confidence=parsed["signature_confidence"])
+        else:
+            row.update(
+                status='scored',
+                application_id=parsed["application_id"],
+                applicant_name=parsed["applicant_name"],
+                signature_confidence=parsed["signature_confidence"],
+                missing_fields=';'.join(parsed["missing_fields"]),
+                **parsed["loan_data"]
+            )
+            signed.append((row, parsed["loan_data"]))
+        rows.append(row)
+
+    if signed:
+        decisions, approval_probabilities = scorer.predict_batch([loan_data for _, loan_data in signed])
+        for (row, _), decision, probability in zip(signed, decisions, approval_probabilities):
+            row.update(decision=str(decision), approval_probability=round(float(probability), 4))
+
+        if explainer is not None:
+            explanations = explainer.explain([(loan_data, row["decision"]) for row, loan_data in signed])
+            for (row, _), explanation in zip(signed, explanations):
+                row["explanation"] = explanation
+
+    return rows
+
+def score_directory(input_dir, output, workers=None, chunk_size=SCORING_CHUNK_SIZE,
+                    explain='none', output_format=None, limit=None, verbose=False):
+
+    writer = create_writer(output, output_format)
+    done = writer.completed()
+    pending = [path for path in find_pdfs(input_dir) if path not in done]
+    if limit is not None:
+        pending = pending[:limit]
+
+    print(f"{len(done)} files already in {output}, {len(pending)} to score")
+    if not pending:
+        return
+
+    scorer = LoanScorer.load()
+    explainer = Explainer(explain) if explain != 'none' else None
+    workers = workers or os.cpu_count() or 1
+
+    # Bounded submission keeps memory flat on very large directories
+    max_in_flight = workers * 4
+    remaining = iter(pending)
+    in_flight = set()
+    chunk = []
+    processed = 0
+    counts = {"scored": 0, "unsigned": 0, "error": 0}
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal chunk, processed
+        rows = build_rows(chunk, scorer, explainer)
+        writer.write(rows)
+        for row in rows:
+            counts[row["status"]] += 1
+        processed += len(chunk)
+        chunk = []
+        elapsed = time.perf_counter() - start
+        print(f"{processed}/{len(pending)} files ({processed / elapsed:.1f} docs/sec) "
+              f"scored={counts['scored']} unsigned={counts['unsigned']} errors={counts['error']}")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=None if verbose else _quiet_worker) as pool:
+            while True:
+                for relative_path in remaining:
+                    in_flight.add(pool.submit(parse_file, input_dir, relative_path))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                chunk.extend(future.result() for future in finished)
+                if len(chunk) >= chunk_size:
+                    flush()
+
+            if chunk:
+                flush()
+    finally:
+        if explainer is not None:
+            explainer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {processed} files in {elapsed:.1f}s ({processed / elapsed:.1f} docs/sec), results in {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a directory of loan application PDFs offline")
+    parser.add_argument("input_dir", help="directory searched recursively for *.pdf")
+    parser.add_argument("-o", "--output", required=True,
+                        help="results file: .csv, otherwise a Parquet directory of part files")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="override the format implied by --output")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=SCORING_CHUNK_SIZE, help="files scored and written together")
+    parser.add_argument("--explain", choices=["none", "fast", "llm"], default="none",
+                        help="add explanations: fast = local rule-based, llm = LLM per application")
+    parser.add_argument("--limit", type=int, help="score at most this many new files")
+    parser.add_argument("--verbose", action="store_true", help="keep per-file output from the workers")
+    args = parser.parse_args()
+
+    score_directory(args.input_dir, args.output, workers=args.workers, chunk_size=args.chunk_size,
+                    explain=args.explain, output_format=args.format, limit=args.limit, verbose=args.verbose)
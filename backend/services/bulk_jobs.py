@@ -0,0 +1,180 @@
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+# Files processed at once across all running jobs
+BULK_JOB_CONCURRENCY = int(os.getenv('BULK_JOB_CONCURRENCY', 8))
+
+# Finished jobs kept for /api/jobs/{id} before the oldest are dropped
+BULK_JOB_HISTORY = int(os.getenv('BULK_JOB_HISTORY', 100))
+
+FINISHED = ("completed", "cancelled", "failed")
+
+class BulkJob:
+    # One submitted batch. Files are processed in the background; results
+    # fill in per file as they finish, in upload order, while completion
+    # order is recorded for progressive streaming.
+
+    def __init__(self, items):
+        self.id = str(uuid.uuid4())
+        self.items = items
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.results = [{"filename": item["filename"], "status": "queued"} for item in items]
+        self.completion_order = []  # indexes into results, in the order files finished
+        self._task = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def _notify(self):
+        # Wake every stream waiting on this job, then arm a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def mark_cancelled(self):
+        self.status = "cancelled"
+        for index, result in enumerate(self.results):
+            if result["status"] in ("queued", "processing"):
+                self.results[index] = {"filename": result["filename"], "status": "cancelled"}
+        self.finished_at = datetime.now().isoformat()
+        self._notify()
+
+    def set_result(self, index, result):
+        self.results[index] = result
+        self.completion_order.append(index)
+        self._notify()
+
+    async def wait(self):
+        # Returns the summary once the job has ended, cancelled jobs included.
+        # Cancelling the waiter leaves the job running.
+        while not self.finished:
+            await self._changed.wait()
+        return self.summary()
+
+    def summary(self):
+        done = [self.results[index] for index in self.completion_order]
+        successful = len([r for r in done if r['status'] == 'success'])
+        return {
+            "total_files": len(self.items),
+            "processed": len(done),
+            "successful": successful,
+            "failed": len(done) - successful,
+            "approved": len([r for r in done if r.get('decision') == 'approved']),
+            "rejected": len([r for r in done if r.get('decision') == 'rejected'])
+        }
+
+    def snapshot(self, include_results=True):
+        snapshot = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            **self.summary()
+        }
+        if include_results:
+            snapshot["results"] = self.results
+        return snapshot
+
+
+class JobManager:
+    # Runs bulk jobs as background tasks, independent of the request that
+    # submitted them, so they survive client disconnects and can be
+    # cancelled. process_item(item) -> result dict is supplied by the API.
+
+    def __init__(self, process_item, concurrency=BULK_JOB_CONCURRENCY, history=BULK_JOB_HISTORY):
+        self.process_item = process_item
+        self.history = history
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._jobs = OrderedDict()
+
+    def submit(self, items):
+        job = BulkJob(items)
+        self._jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job))
+        # A job cancelled before it started never runs _run's cleanup
+        job._task.add_done_callback(lambda _: job.finished or job.mark_cancelled())
+        self._trim()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return [job.snapshot(include_results=False) for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.finished and job._task is not None:
+            job._task.cancel()
+        return job
+
+    async def shutdown(self):
+        tasks = [job._task for job in self._jobs.values() if job._task is not None and not job.finished]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job):
+        job.status = "running"
+        job._notify()
+
+        async def run_item(index, item):
+            async with self._semaphore:
+                job.results[index] = {"filename": item["filename"], "status": "processing"}
+                try:
+                    result = await self.process_item(item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Error processing {item['filename']}: {str(e)}")
+                    result = {"filename": item["filename"], "status": "error", "message": str(e)}
+                # Release the PDF bytes once the file is done
+                item.pop("pdf_bytes", None)
+                job.set_result(index, result)
+
+        try:
+            await asyncio.gather(*[run_item(index, item) for index, item in enumerate(job.items)])
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.mark_cancelled()
+        except Exception as e:
+            print(f"Bulk job {job.id} failed: {str(e)}")
+            job.status = "failed"
+        finally:
+            for item in job.items:
+                item.pop("pdf_bytes", None)
+            job.finished_at = datetime.now().isoformat()
+            job._notify()
+
+        summary = job.summary()
+        print(f"Bulk job {job.id[:8]} {job.status}: {summary['processed']}/{summary['total_files']} files, "
+              f"{summary['successful']} successful")
+
+    def _trim(self):
+        # Drop the oldest finished jobs beyond the history limit
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+
+async def job_events(job):
+    # Yields ("file", result) as files finish (already finished ones first),
+    # then ("job", snapshot without results) once the job ends
+    sent = 0
+    while True:
+        changed = job._changed
+        while sent < len(job.completion_order):
+            yield "file", {"index": job.completion_order[sent], **job.results[job.completion_order[sent]]}
+            sent += 1
+        if job.finished:
+            yield "job", job.snapshot(include_results=False)
+            return
+        await changed.wait()
@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services.form_template import detect_signature_in_template, extract_from_template, matches_form_template
+from services.pdf_document import ParsedDocument
+from services.pdf_parser import extract_application
+from services.signature_detector import detect_signature_in_pdf
+
+# Worker processes for CPU-bound PDF work (pdfplumber, poppler, OpenCV)
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', os.cpu_count() or 1))
+
+# Maximum LLM calls in flight for bulk processing (shared by all bulk jobs)
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', 8))
+
+# template: read fields and the signature box from their known regions when
+# the PDF matches the generated form layout, regex: always full-page text
+PDF_EXTRACTION_MODE = os.getenv('PDF_EXTRACTION_MODE', 'template').lower()
+
+_process_pool = None
+
+def get_process_pool():
+    # Shared pool, created on first bulk upload
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        print(f"Started PDF process pool with {PDF_WORKERS} workers")
+    return _process_pool
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+def parse_application_pdf(pdf_bytes, source="<upload>"):
+    # CPU-bound stage of the upload pipeline, runs inside a worker process.
+    # The PDF is opened once for both steps. Known layouts are read region by
+    # region, anything else falls back to full-page text and regex patterns.
+
+    with ParsedDocument(pdf_bytes, source=source) as document:
+        template = PDF_EXTRACTION_MODE == 'template' and matches_form_template(document)
+
+        if template:
+            has_signature, sig_confidence = detect_signature_in_template(document)
+        else:
+            has_signature, sig_confidence = detect_signature_in_pdf(document)
+
+        if not has_signature:
+            return {
+                "has_signature": False,
+                "signature_confidence": sig_confidence
+            }
+
+        extracted = extract_from_template(document) if template else extract_application(document)
+
+    return {
+        "has_signature": True,
+        "signature_confidence": sig_confidence,
+        **extracted
+    }
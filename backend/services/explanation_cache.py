@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+EXPLANATION_CACHE_PATH = os.getenv('EXPLANATION_CACHE_PATH', 'explanation_cache.sqlite3')
+EXPLANATION_CACHE_TTL = float(os.getenv('EXPLANATION_CACHE_TTL_HOURS', 24 * 7)) * 3600
+EXPLANATION_CACHE_MEMORY_ITEMS = int(os.getenv('EXPLANATION_CACHE_MEMORY_ITEMS', 2048))
+
+# Disk writes committed together by the cache writer thread
+EXPLANATION_CACHE_WRITE_BATCH = int(os.getenv('EXPLANATION_CACHE_WRITE_BATCH', 64))
+
+class ExplanationCache:
+    # Two-tier cache for LLM outputs: an in-memory LRU in front of a SQLite
+    # table that survives restarts. Keys are hashes of the canonical inputs
+    # that fully determine the prompt, so identical applications share entries.
+    # Disk writes go through a writer thread that commits them in batches, so
+    # put() never waits on SQLite. Disk reads use a connection per thread and
+    # run outside the lock; async callers use get_async, which reads the disk
+    # tier in a worker thread.
+
+    def __init__(self, path=EXPLANATION_CACHE_PATH, ttl=EXPLANATION_CACHE_TTL,
+                 memory_items=EXPLANATION_CACHE_MEMORY_ITEMS, write_batch=EXPLANATION_CACHE_WRITE_BATCH):
+        self.path = path
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self.write_batch = write_batch
+        self._memory = OrderedDict()  # key -> (created_at, value)
+        self._unwritten = {}          # key -> (created_at, value) queued for the disk tier
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+        self._queue = None
+        if path:
+            conn = self._connection()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            conn.commit()
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True)
+            self._writer.start()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(kind, prompt_version, **inputs):
+        # Canonical JSON of the inputs: sorted keys, numbers normalized to floats
+        def normalize(value):
+            if isinstance(value, dict):
+                return {str(k): normalize(v) for k, v in value.items()}
+            if isinstance(value, bool) or value is None:
+                return value
+            if isinstance(value, (int, float)):
+                return round(float(value), 6)
+            return str(value)
+
+        canonical = json.dumps(
+            {"kind": kind, "version": prompt_version, "inputs": normalize(inputs)},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key):
+        value = self._get_memory(key)
+        if value is None and self._queue is not None:
+            value = self._get_disk(key)
+        if value is None:
+            self._count("misses")
+        return value
+
+    async def get_async(self, key):
+        # get() without blocking the event loop on a disk read
+        value = self._get_memory(key)
+        if value is None and self._queue is not None:
+            value = await asyncio.to_thread(self._get_disk, key)
+        if value is None:
+            self._count("misses")
+        return value
+
+    def _get_memory(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key) or self._unwritten.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+        return None
+
+    def _get_disk(self, key):
+        row = self._connection().execute(
+            "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, row[1], value)
+            self.counters["disk_hits"] += 1
+        return value
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def put(self, key, value):
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, value)
+            self.counters["writes"] += 1
+            if self._queue is not None:
+                self._unwritten[key] = (now, value)
+                self._queue.put((key, json.dumps(value), now))
+
+    def _remember(self, key, created_at, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.write_batch and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    conn = self._connection()
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)", rows
+                        )
+            except Exception as e:
+                # A lost cache write only costs a regeneration later
+                print(f"Error writing LLM cache batch: {str(e)}")
+            finally:
+                with self._lock:
+                    for key, _, created_at in rows:
+                        entry = self._unwritten.get(key)
+                        if entry is not None and entry[0] == created_at:
+                            del self._unwritten[key]
+                for _ in batch:
+                    self._queue.task_done()
+
+            if batch[-1] is None:
+                return
+
+    def flush(self):
+        # Block until queued disk writes are committed
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._queue is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._queue = None
+
+    def purge_expired(self):
+        # Drop expired rows from the disk tier
+        if self._queue is None:
+            return 0
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def stats(self):
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups * 100, 2) if lookups else 0.0,
+            "memory_items": len(self._memory)
+        }
@@ -0,0 +1,296 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Anthropic Messages API (including Message Batches),
+# used for load tests and benchmarks.
+# Point LoanExplainerService at it with base_url=f"http://127.0.0.1:{port}".
+
+FAKE_RESPONSE_TEXT = """**Risk Assessment Summary:**
+Simulated assessment from the local fake LLM server.
+
+**Recommendation:**
+CONDITIONAL APPROVAL"""
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+
+    latency = 1.0
+
+    # Prompt caching emulation: system blocks marked with cache_control are
+    # written on first sight and read afterwards, if long enough to cache.
+    # Tokens are approximated as characters / 4.
+    min_cacheable_tokens = 1024
+    cached_prefixes = set()
+    cache_lock = threading.Lock()
+
+    def _usage(self, body):
+        cacheable = 0
+        uncached = 0
+        system = body.get("system") or []
+        for block in [system] if isinstance(system, str) else system:
+            if isinstance(block, dict) and block.get("cache_control"):
+                cacheable += len(block.get("text", "")) // 4
+            else:
+                uncached += len(block.get("text", "") if isinstance(block, dict) else block) // 4
+        for message in body.get("messages", []):
+            content = message.get("content", "")
+            uncached += len(content if isinstance(content, str) else json.dumps(content)) // 4
+
+        usage = {"input_tokens": uncached, "output_tokens": 50,
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        if cacheable < self.min_cacheable_tokens:
+            usage["input_tokens"] += cacheable
+            return usage
+
+        key = json.dumps(body.get("system"), sort_keys=True)
+        with self.cache_lock:
+            hit = key in self.cached_prefixes
+            self.cached_prefixes.add(key)
+        usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = cacheable
+        return usage
+
+    # Message batches: id -> {"requests", "created", "ready_at"}, a batch ends
+    # batch_latency seconds after it is created
+    batch_latency = 1.0
+    batches = {}
+
+    # Batch requests with these custom_ids come back errored, and with
+    # expire_batches set every request in a batch expires unprocessed
+    errored_custom_ids = set()
+    expire_batches = False
+
+    # Set to 429/529/500 to make every message request fail with that status,
+    # e.g. server.RequestHandlerClass.error_status = 529
+    error_status = None
+
+    def do_POST(self):
+        length = int(self.headers.get('content-length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        if self.error_status and not self.path.startswith('/v1/messages/batches'):
+            time.sleep(self.latency * 0.1)
+            error_type = {429: "rate_limit_error", 529: "overloaded_error"}.get(self.error_status, "api_error")
+            self._send_json({"type": "error", "error": {"type": error_type, "message": "Simulated failure"}},
+                            self.error_status)
+            return
+
+        if self.path.startswith('/v1/messages/batches'):
+            self._create_batch(body)
+            return
+
+        if body.get("stream"):
+            self._stream(body)
+            return
+
+        time.sleep(self.latency)
+
+        self._send_json(self._message(body))
+
+    def do_GET(self):
+        # /v1/messages/batches/{id} and /v1/messages/batches/{id}/results
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if len(parts) < 4 or parts[:3] != ['v1', 'messages', 'batches'] or parts[3] not in self.batches:
+            self._send_json({"type": "error", "error": {"type": "not_found_error", "message": "Not found"}}, 404)
+            return
+
+        batch_id = parts[3]
+        if len(parts) == 4:
+            self._send_json(self._batch_status(batch_id))
+            return
+
+        lines = [
+            json.dumps({"custom_id": request["custom_id"], "result": self._batch_result(request)})
+            for request in self.batches[batch_id]["requests"]
+        ]
+        payload = ("\n".join(lines) + "\n").encode()
+        self.send_response(200)
+        self.send_header('content-type', 'application/binary')
+        self.send_header('content-length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _create_batch(self, body):
+        batch_id = f"msgbatch_fake_{len(self.batches) + 1}"
+        now = time.time()
+        self.batches[batch_id] = {"requests": body.get("requests", []), "created": now,
+                                  "ready_at": now + self.batch_latency}
+        self._send_json(self._batch_status(batch_id))
+
+    def _batch_result(self, request):
+        if self.expire_batches:
+            return {"type": "expired"}
+        if request["custom_id"] in self.errored_custom_ids:
+            return {"type": "errored", "error": {"type": "error", "error": {
+                "type": "invalid_request_error", "message": "Simulated request failure"}}}
+        return {"type": "succeeded", "message": self._message(request["params"])}
+
+    def _batch_status(self, batch_id):
+        batch = self.batches[batch_id]
+        ended = time.time() >= batch["ready_at"]
+        count = len(batch["requests"])
+        if self.expire_batches:
+            outcomes = {"succeeded": 0, "errored": 0, "expired": count}
+        else:
+            errored = sum(1 for request in batch["requests"] if request["custom_id"] in self.errored_custom_ids)
+            outcomes = {"succeeded": count - errored, "errored": errored, "expired": 0}
+        created = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(batch["created"]))
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else count, "canceled": 0,
+                               **{name: value if ended else 0 for name, value in outcomes.items()}},
+            "created_at": created,
+            "expires_at": created,
+            "ended_at": created if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": (f"http://{self.headers.get('host')}/v1/messages/batches/{batch_id}/results"
+                            if ended else None)
+        }
+
+    def _message(self, body):
+        return {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": FAKE_RESPONSE_TEXT}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": self._usage(body)
+        }
+
+    def _send_json(self, data, status=200):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, body):
+        # Same total latency, but the first token arrives after a tenth of it
+        self.send_response(200)
+        self.send_header('content-type', 'text/event-stream')
+        self.end_headers()
+
+        def send(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        chunks = [FAKE_RESPONSE_TEXT[i:i + 8] for i in range(0, len(FAKE_RESPONSE_TEXT), 8)]
+        time.sleep(self.latency * 0.1)
+        send("message_start", {"type": "message_start", "message": {
+            "id": "msg_fake", "type": "message", "role": "assistant", "model": body.get("model", "fake"),
+            "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {**self._usage(body), "output_tokens": 1}
+        }})
+        send("content_block_start", {"type": "content_block_start", "index": 0,
+                                     "content_block": {"type": "text", "text": ""}})
+        for chunk in chunks:
+            send("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                         "delta": {"type": "text_delta", "text": chunk}})
+            time.sleep(self.latency * 0.9 / len(chunks))
+        send("content_block_stop", {"type": "content_block_stop", "index": 0})
+        send("message_delta", {"type": "message_delta",
+                               "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                               "usage": {"output_tokens": 50}})
+        send("message_stop", {"type": "message_stop"})
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_llm_server(latency=1.0, port=0, min_cacheable_tokens=1024, batch_latency=1.0):
+    # Start the server on a background thread, returns (server, base_url)
+    handler = type('Handler', (FakeMessagesHandler,), {
+        'latency': latency,
+        'min_cacheable_tokens': min_cacheable_tokens,
+        'cached_prefixes': set(),
+        'batch_latency': batch_latency,
+        'batches': {},
+        'errored_custom_ids': set()
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# Concurrency benchmark: blocking client on the event loop vs AsyncAnthropic
+if __name__ == "__main__":
+    import asyncio
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.llm_service import LoanExplainerService
+    from services.explanation_cache import ExplanationCache
+
+    n_requests = 20
+    latency = 0.5
+    server, base_url = start_fake_llm_server(latency=latency)
+    # Caching disabled so every request reaches the server
+    service = LoanExplainerService(api_key="fake-key", base_url=base_url,
+                                   cache=ExplanationCache(path=None, memory_items=0))
+
+    test_data = {
+        'ApplicantIncome': 5000, 'CoapplicantIncome': 2000, 'LoanAmount': 200,
+        'Loan_Amount_Term': 360, 'Credit_History': 1, 'Self_Employed': 0,
+        'Dependents': 1, 'Education': 0, 'Married': 1, 'Property_Area': 0
+    }
+
+    async def reader(stop, gaps):
+        # Stands in for /api/applications/list: should tick every 10ms
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def blocking_request():
+        return service.generate_explanation(test_data, "Approved")
+
+    async def async_request():
+        return await service.generate_explanation_async(test_data, "Approved")
+
+    async def run(label, request):
+        stop = asyncio.Event()
+        gaps = []
+        reader_task = asyncio.create_task(reader(stop, gaps))
+        start = time.perf_counter()
+        await asyncio.gather(*[request() for _ in range(n_requests)])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await reader_task
+        worst = max(gaps) * 1000 if gaps else elapsed * 1000
+        print(f"  {label:10} {n_requests} explanations in {elapsed:.2f}s | worst read stall: {worst:.0f} ms")
+
+    async def time_to_first_text():
+        # Full response vs streamed: when does the officer see the first words
+        start = time.perf_counter()
+        await service.generate_explanation_async(test_data, "Approved")
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first = None
+        async for event, _ in service.stream_explanation(test_data, "Approved"):
+            if event == "delta" and first is None:
+                first = time.perf_counter() - start
+        streamed = time.perf_counter() - start
+        print(f"  full response: first text at {full * 1000:.0f} ms")
+        print(f"  streaming:     first text at {first * 1000:.0f} ms (complete at {streamed * 1000:.0f} ms)")
+
+    async def main():
+        print(f"Fake LLM latency {latency}s, {n_requests} concurrent explanations")
+        await run("blocking", blocking_request)
+        await run("async", async_request)
+        print("Time to first explanation text")
+        await time_to_first_text()
+        print(f"Token usage: {service.usage_stats()}")
+        await service.aclose()
+
+    asyncio.run(main())
+    server.shutdown()
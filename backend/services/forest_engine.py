@@ -0,0 +1,253 @@
+import numpy as np
+
+# Upper bound on (trees x rows) node indices held in memory per traversal chunk
+MAX_CHUNK_NODES = 2_000_000
+
+# Bisection steps when solving for raw-space thresholds (float64 has 52 mantissa bits)
+FUSE_BISECT_STEPS = 128
+
+class CompiledForest:
+    # RandomForestClassifier flattened into contiguous node arrays.
+    # Every tree lives in the same feature/threshold/left/right/value arrays,
+    # roots[i] is the offset of tree i. Leaves point to themselves so a fixed
+    # number of vectorized steps walks every (tree, row) pair to its leaf.
+    # A fused forest has the scaler and sklearn's float32 cast folded into its
+    # thresholds, so it consumes raw float64 features directly.
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes,
+                 feature_names=None, shift=None, scale=None, fused=False):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.feature_names = feature_names
+        self.shift = shift
+        self.scale = scale
+        self.fused = fused
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler=None, scaled_cols=None):
+
+        n_features = forest.n_features_in_
+        feature_names = list(getattr(forest, 'feature_names_in_', range(n_features)))
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves with an always-true split
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        # StandardScaler folded in as an input transform over the full feature vector
+        shift = scale = None
+        if scaler is not None:
+            shift = np.zeros(n_features)
+            scale = np.ones(n_features)
+            for col, mean, std in zip(scaled_cols, scaler.mean_, scaler.scale_):
+                idx = feature_names.index(col)
+                shift[idx] = mean
+                scale[idx] = std
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            feature_names=feature_names,
+            shift=shift,
+            scale=scale
+        )
+
+    def fuse_scaler(self):
+        # Rewrite every split "float32((x - shift) / scale) <= t" as "x <= t_raw"
+        # where t_raw is the largest float64 x satisfying the original test, so
+        # the fused forest matches the scaler + model pair bit for bit.
+
+        n_features = len(self.feature_names)
+        shift = self.shift if self.shift is not None else np.zeros(n_features)
+        scale = self.scale if self.scale is not None else np.ones(n_features)
+
+        internal = np.isfinite(self.threshold)
+        t = self.threshold[internal]
+        node_shift = shift[self.feature[internal]]
+        node_scale = scale[self.feature[internal]]
+
+        def passes(x):
+            return ((x - node_shift) / node_scale).astype(np.float32) <= t
+
+        # Bracket the boundary around the algebraic inverse, then bisect to adjacent floats
+        guess = t * node_scale + node_shift
+        delta = (np.abs(t) + 1.0) * node_scale * 1e-5 + np.abs(node_shift) * 1e-12
+        lo = guess - delta
+        hi = guess + delta
+        assert passes(lo).all() and not passes(hi).any(), "Failed to bracket fused thresholds"
+
+        for _ in range(FUSE_BISECT_STEPS):
+            mid = lo + (hi - lo) / 2
+            ok = passes(mid)
+            lo = np.where(ok, mid, lo)
+            hi = np.where(ok, hi, mid)
+
+        threshold = self.threshold.copy()
+        threshold[internal] = lo
+
+        return CompiledForest(
+            feature=self.feature,
+            threshold=threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+            classes=self.classes_,
+            feature_names=self.feature_names,
+            fused=True
+        )
+
+    def predict_proba(self, X):
+
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if not self.fused:
+            if self.shift is not None:
+                X = (X - self.shift) / self.scale
+
+            # sklearn compares float32 features against float64 thresholds
+            X = X.astype(np.float32)
+
+        n_rows = X.shape[0]
+        chunk = max(1, MAX_CHUNK_NODES // len(self.roots))
+        if n_rows <= chunk:
+            return self._traverse(X)
+
+        return np.concatenate([self._traverse(X[start:start + chunk]) for start in range(0, n_rows, chunk)])
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def _traverse(self, X):
+
+        rows = np.arange(X.shape[0])
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.value[node].sum(axis=0) / len(self.roots)
+
+
+def load_training_features(csv_path, feature_cols):
+    # Encode loan_prediction_dataset.csv the same way as the training notebook
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=['Gender', 'Dependents', 'Loan_Amount_Term'])
+    df['Self_Employed'] = df['Self_Employed'].fillna(df['Self_Employed'].mode()[0])
+    df['LoanAmount'] = df['LoanAmount'].fillna(df['LoanAmount'].median())
+    df['Credit_History'] = df['Credit_History'].fillna(df['Credit_History'].mode()[0])
+    df['Married'] = df['Married'].fillna(df['Married'].mode()[0])
+    df['Dependents'] = df['Dependents'].replace('3+', '3')
+
+    encoding = {
+        'Gender': {'Male': 1, 'Female': 0},
+        'Married': {'Yes': 1, 'No': 0},
+        'Dependents': {'0': 0, '1': 1, '2': 2, '3': 3},
+        'Education': {'Graduate': 1, 'Not Graduate': 0},
+        'Self_Employed': {'Yes': 1, 'No': 0},
+        'Property_Area': {'Rural': 0, 'Semiurban': 1, 'Urban': 2}
+    }
+    for col, mapping in encoding.items():
+        df[col] = df[col].map(mapping)
+
+    return df[feature_cols].astype(float)
+
+
+# Exactness check against the pickled sklearn model
+if __name__ == "__main__":
+    import os
+    import time
+    import joblib
+    import pandas as pd
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    model = joblib.load(os.path.join(backend_dir, 'ml_models', 'loan_status_predictor.pkl'))
+    scaler = joblib.load(os.path.join(backend_dir, 'ml_models', 'vector.pkl'))
+    num_cols = list(scaler.feature_names_in_)
+    feature_cols = list(model.feature_names_in_)
+
+    raw = load_training_features(os.path.join(backend_dir, 'database', 'loan_prediction_dataset.csv'), feature_cols)
+    scaled = raw.copy()
+    scaled[num_cols] = scaler.transform(scaled[num_cols])
+
+    engine = CompiledForest.from_sklearn(model, scaler=scaler, scaled_cols=num_cols)
+    fused = engine.fuse_scaler()
+    print(f"Compiled {len(engine.roots)} trees, {len(engine.feature)} nodes, max depth {engine.max_depth}")
+
+    # Parity on the dataset plus rows sitting exactly on and just above every fused split
+    probe = np.repeat(raw.to_numpy()[:1], 2 * len(fused.feature), axis=0)
+    internal = np.isfinite(fused.threshold)
+    idx = np.flatnonzero(np.repeat(internal, 2))
+    split_values = np.stack([fused.threshold, np.nextafter(fused.threshold, np.inf)], axis=1).ravel()
+    probe[idx, np.repeat(fused.feature, 2)[idx]] = split_values[idx]
+    rows = pd.concat([raw, pd.DataFrame(probe[idx], columns=feature_cols)], ignore_index=True)
+
+    rows_scaled = rows.copy()
+    rows_scaled[num_cols] = scaler.transform(rows_scaled[num_cols])
+    expected = model.predict_proba(rows_scaled)
+    expected_decisions = model.predict(rows_scaled)
+
+    for label, candidate in [("compiled", engine), ("fused", fused)]:
+        actual = candidate.predict_proba(rows.to_numpy())
+        max_diff = np.abs(expected - actual).max()
+        same_decisions = (expected_decisions == candidate.predict(rows.to_numpy())).all()
+        print(f"{label:10} rows: {len(rows)} | Max |proba diff|: {max_diff:.3e} | Decisions identical: {same_decisions}")
+        assert max_diff < 1e-12 and same_decisions, f"{label} forest does not match sklearn"
+
+    # Single-row latency
+    row_df = raw.iloc[[0]]
+    row = raw.to_numpy()[0]
+
+    def sklearn_pipeline():
+        input_data = row_df.copy()
+        input_data[num_cols] = scaler.transform(input_data[num_cols])
+        return model.predict_proba(input_data)
+
+    for label, fn in [("sklearn", sklearn_pipeline), ("compiled", lambda: engine.predict_proba(row)),
+                      ("fused", lambda: fused.predict_proba(row))]:
+        fn()
+        start = time.perf_counter()
+        for _ in range(50):
+            fn()
+        print(f"  {label:10} {(time.perf_counter() - start) / 50 * 1000:.3f} ms/row")
+
+    print("\nCompiled forest check complete!")
@@ -0,0 +1,186 @@
+import os
+
+import numpy as np
+
+from services.pdf_parser import FIELD_PATTERNS, convert_to_api_format, parse_field_value
+from services.signature_detector import SIGNATURE_DPI
+
+# Page regions of the application form drawn by
+# loan_pdfs/generate_loan_pdfs.create_malaysian_loan_pdf, in PDF points
+# (origin bottom-left, the coordinates the generator draws with). Keep in
+# step with the generator: any layout change there must be mirrored here.
+
+INCH = 72.0
+PAGE_WIDTH, PAGE_HEIGHT = 595.2755905511812, 841.8897637795277  # A4
+
+# Every labelled row: label at 1", value at 3.2", rows 0.25" apart
+LABEL_X = 1 * INCH
+VALUE_X = 3.2 * INCH
+ROW_STEP = 0.25 * INCH
+
+REFERENCE_BASELINE = PAGE_HEIGHT - 2 * INCH
+SECTION_A_BASELINE = REFERENCE_BASELINE - 0.6 * INCH
+PERSONAL_FIRST_ROW = SECTION_A_BASELINE - 0.4 * INCH
+SECTION_B_BASELINE = PERSONAL_FIRST_ROW - 8 * ROW_STEP - 0.3 * INCH
+EMPLOYMENT_FIRST_ROW = SECTION_B_BASELINE - 0.4 * INCH
+SECTION_C_BASELINE = EMPLOYMENT_FIRST_ROW - 5 * ROW_STEP - 0.3 * INCH
+LOAN_FIRST_ROW = SECTION_C_BASELINE - 0.4 * INCH
+DECLARATION_BASELINE = LOAN_FIRST_ROW - 4 * ROW_STEP - 0.5 * INCH
+
+# Signature box (x0, bottom, x1, top), the "Digitally signed" line sits below it
+SIGNATURE_BOX = (1 * INCH, DECLARATION_BASELINE - 1.15 * INCH,
+                 4 * INCH, DECLARATION_BASELINE - 0.55 * INCH)
+SIGNED_MARKER_BASELINE = SIGNATURE_BOX[1] - 0.15 * INCH
+
+# Inset keeps the 2pt box border out of the ink ratio
+SIGNATURE_BORDER_INSET = 3
+
+# Once the text checks rule out the "[ Unsigned ]" placeholder an empty box
+# renders blank, so any ink is a signature. Pixels darker than the level
+# count as ink; generated signatures cover 0.1-0.4% of the box.
+SIGNATURE_INK_LEVEL = 200
+SIGNATURE_BOX_MIN_INK = 0.0005
+
+# Field -> value baseline, in the same order as the form
+FIELD_ROWS = {
+    'full_name': PERSONAL_FIRST_ROW,
+    'ic_number': PERSONAL_FIRST_ROW - 1 * ROW_STEP,
+    'gender': PERSONAL_FIRST_ROW - 2 * ROW_STEP,
+    'marital_status': PERSONAL_FIRST_ROW - 3 * ROW_STEP,
+    'dependents': PERSONAL_FIRST_ROW - 4 * ROW_STEP,
+    'education': EMPLOYMENT_FIRST_ROW,
+    'self_employed': EMPLOYMENT_FIRST_ROW - 1 * ROW_STEP,
+    'applicant_income': EMPLOYMENT_FIRST_ROW - 2 * ROW_STEP,
+    'coapplicant_income': EMPLOYMENT_FIRST_ROW - 3 * ROW_STEP,
+    'total_income': EMPLOYMENT_FIRST_ROW - 4 * ROW_STEP,
+    'loan_amount': LOAN_FIRST_ROW,
+    'loan_term': LOAN_FIRST_ROW - 1 * ROW_STEP,
+    'credit_history': LOAN_FIRST_ROW - 2 * ROW_STEP,
+    'property_area': LOAN_FIRST_ROW - 3 * ROW_STEP,
+}
+
+# Text that identifies the layout, checked at its drawn position
+ANCHORS = [
+    ("SECTION A", SECTION_A_BASELINE),
+    ("SECTION B", SECTION_B_BASELINE),
+    ("SECTION C", SECTION_C_BASELINE),
+    ("DECLARATION", DECLARATION_BASELINE),
+]
+
+# Points around a baseline that hold one row of text (rows are 18pt apart)
+ROW_BELOW = 4
+ROW_ABOVE = 11
+
+# Points of page size difference still accepted as this layout
+PAGE_SIZE_TOLERANCE = 2
+
+def _row_box(baseline, x0=LABEL_X, x1=PAGE_WIDTH):
+    return x0 - 2, baseline - ROW_BELOW, x1, baseline + ROW_ABOVE
+
+def matches_form_template(document):
+    # True if the first page has the generator's size and section anchors
+
+    width, height = document.page_size
+    if abs(width - PAGE_WIDTH) > PAGE_SIZE_TOLERANCE or abs(height - PAGE_HEIGHT) > PAGE_SIZE_TOLERANCE:
+        return False
+
+    for anchor, baseline in ANCHORS:
+        if anchor not in document.text_in_box(*_row_box(baseline)):
+            return False
+    return True
+
+def extract_from_template(document):
+# Same result as pdf_parser.extract_application, reading each value from
+# its region only, so label wording or reflow elsewhere does not matter
+
+    data = {}
+
+    # The reference is drawn on one line with its label
+    reference = document.text_in_box(*_row_box(REFERENCE_BASELINE))
+    value = parse_field_value('application_id', reference.split(':', 1)[-1])
+    if value:
+        data['application_id'] = value
+
+    for key, baseline in FIELD_ROWS.items():
+        value = parse_field_value(key, document.text_in_box(*_row_box(baseline, x0=VALUE_X)))
+        if value:
+            data[key] = value
+
+    return {
+        "loan_data": convert_to_api_format(data),
+        "applicant_name": data.get('full_name', 'Unknown'),
+        "application_id": data.get('application_id', 'Unknown'),
+        "missing_fields": [key for key in FIELD_PATTERNS if key not in data]
+    }
+
+def detect_signature_in_template(document, dpi=SIGNATURE_DPI):
+    # Same text markers as signature_detector, read from the signature box
+    # and the line below it. Without a marker only the box is rendered.
+
+    x0, bottom, x1, top = SIGNATURE_BOX
+    if "Unsigned" in document.text_in_box(x0, bottom, x1, top):
+        return False, 25.0
+
+    marker = document.text_in_box(*_row_box(SIGNED_MARKER_BASELINE, x1=x1))
+    if "Digitally signed" in marker or "✓" in marker:
+        return True, 95.0
+
+    inset = SIGNATURE_BORDER_INSET
+    region = document.render_box(x0 + inset, bottom + inset, x1 - inset, top - inset, dpi=dpi)
+    if region is None:
+        return False, 0.0
+
+    ink_ratio = np.count_nonzero(region < SIGNATURE_INK_LEVEL) / region.size if region.size else 0.0
+    if ink_ratio > SIGNATURE_BOX_MIN_INK:
+        return True, min(85.0 + ink_ratio * 1000, 98.0)
+    return False, 20.0
+
+
+# Parity and speed check: python -m services.form_template [pdf_dir]
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from services.pdf_document import ParsedDocument
+    from services.pdf_parser import extract_application
+    from services.signature_detector import detect_signature_in_pdf
+
+    pdf_dir = sys.argv[1] if len(sys.argv) > 1 else "malaysian_pdfs"
+    pdf_files = sorted(os.path.join(pdf_dir, name) for name in os.listdir(pdf_dir) if name.endswith('.pdf')) \
+        if os.path.isdir(pdf_dir) else []
+    if not pdf_files:
+        print(f"No PDFs found in: {pdf_dir}")
+        sys.exit(1)
+    pdf_bytes = [open(path, "rb").read() for path in pdf_files]
+
+    def regex_path(data):
+        with ParsedDocument(data) as document:
+            return detect_signature_in_pdf(document), extract_application(document)
+
+    def template_path(data):
+        with ParsedDocument(data) as document:
+            assert matches_form_template(document)
+            return detect_signature_in_template(document), extract_from_template(document)
+
+    # Silence the regex path's progress output while timing
+    stdout = sys.stdout
+    timings = {}
+    results = {}
+    for name, parse in (("regex (full text)", regex_path), ("template regions", template_path)):
+        sys.stdout = open(os.devnull, "w")
+        start = time.perf_counter()
+        results[name] = [parse(data) for data in pdf_bytes]
+        timings[name] = time.perf_counter() - start
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    mismatches = 0
+    for path, (regex_sig, regex_fields), (template_sig, template_fields) in zip(
+            pdf_files, results["regex (full text)"], results["template regions"]):
+        if regex_sig[0] != template_sig[0] or regex_fields != template_fields:
+            mismatches += 1
+            print(f"Mismatch: {os.path.basename(path)}")
+    print(f"{len(pdf_files)} PDFs, {mismatches} mismatches between template and regex extraction\n")
+
+    for name, elapsed in timings.items():
+        print(f"{name:20} {elapsed / len(pdf_files) * 1000:7.2f} ms/doc")
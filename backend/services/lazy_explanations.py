@@ -0,0 +1,176 @@
+import asyncio
+import os
+import time
+
+# Background workers that fill in pending explanations (0 = only on first read)
+EXPLANATION_BACKGROUND_WORKERS = int(os.getenv('EXPLANATION_BACKGROUND_WORKERS', 1))
+
+# Batch mode: queued explanations are sent as one Message Batch once this many
+# are waiting, or after the wait time, whichever comes first
+EXPLANATION_BATCH_SIZE = int(os.getenv('EXPLANATION_BATCH_SIZE', 100))
+EXPLANATION_BATCH_WAIT_SECONDS = float(os.getenv('EXPLANATION_BATCH_WAIT_SECONDS', 60))
+
+# Explanations that fell back to the local assessment are regenerated on read,
+# at most once per this many seconds per application
+EXPLANATION_RETRY_SECONDS = float(os.getenv('EXPLANATION_RETRY_SECONDS', 300))
+
+class LazyExplanations:
+    # Generates deferred explanations on demand. Records stored with
+    # explanation_status "pending" are explained on their first read, or by
+    # a small pool of background workers when nobody asks first. Concurrent
+    # requests for the same application share one LLM call (single-flight).
+    # With use_batches the background queue is drained through the Message
+    # Batches API instead, off the interactive concurrency budget.
+    # When the LLM fails, the local assessment is stored with explanation_status
+    # "fallback" and regenerated on a later read (see EXPLANATION_RETRY_SECONDS).
+    # on_ready(record) is called with each record once its explanation is in.
+
+    def __init__(self, llm_service, repository, workers=EXPLANATION_BACKGROUND_WORKERS,
+                 use_batches=False, batch_size=EXPLANATION_BATCH_SIZE, batch_wait=EXPLANATION_BATCH_WAIT_SECONDS,
+                 on_ready=None, retry_seconds=EXPLANATION_RETRY_SECONDS):
+        self.llm_service = llm_service
+        self.repository = repository
+        self.workers = workers
+        self.use_batches = use_batches
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.on_ready = on_ready
+        self.retry_seconds = retry_seconds
+        self._last_attempt = {}  # uuid -> monotonic time its explanation last fell back
+        self._inflight = {}  # uuid -> task generating its explanation
+        self._queue = None
+        self._worker_tasks = []
+        self._batch_tasks = set()
+
+    def start(self):
+        # Call from a running event loop (app startup)
+        self._queue = asyncio.Queue()
+        if self.use_batches:
+            self._worker_tasks = [asyncio.create_task(self._collect_batches())]
+        else:
+            self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        tasks = [*self._worker_tasks, *self._batch_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *self._inflight.values(), return_exceptions=True)
+        self._worker_tasks = []
+
+    def enqueue(self, application_uuid):
+        # Low priority: only the background workers pick these up
+        if self._queue is not None and (self.workers > 0 or self.use_batches):
+            self._queue.put_nowait(application_uuid)
+
+    async def ensure(self, application_id):
+        # Returns the record with its explanation filled in, or None if unknown.
+        # Pending explanations are generated, fallbacks regenerated once the
+        # retry interval has passed. A record whose explanation is still being
+        # streamed (explanation_status "streaming") is returned as it is, with
+        # explanation None until the stream finishes and stores it.
+        application_uuid, record = self.repository.get_with_id(application_id)
+        if record is None or not self._needs_explanation(application_uuid, record):
+            return record
+
+        task = self._inflight.get(application_uuid)
+        if task is None:
+            task = asyncio.create_task(self._generate(application_uuid, record))
+            self._inflight[application_uuid] = task
+            task.add_done_callback(lambda _: self._inflight.pop(application_uuid, None))
+
+        # Shielded so a reader disconnecting does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def _needs_explanation(self, application_uuid, record):
+        status = record.get("explanation_status")
+        if status == "fallback":
+            last_attempt = self._last_attempt.get(application_uuid)
+            return last_attempt is None or time.monotonic() - last_attempt >= self.retry_seconds
+        return status == "pending"
+
+    async def _generate(self, application_uuid, record):
+        explanation_data = await self.llm_service.generate_explanation_async(record["data"], record["prediction"])
+        if explanation_data.get("fallback"):
+            self._last_attempt[application_uuid] = time.monotonic()
+            return self._attach(application_uuid, explanation_data, "fallback")
+        self._last_attempt.pop(application_uuid, None)
+        return self._attach(application_uuid, explanation_data, "ready")
+
+    def _attach(self, application_uuid, explanation_data, status):
+        record = self.repository.update_fields(
+            application_uuid,
+            explanation=explanation_data["explanation"],
+            metrics=explanation_data.get("metrics", {}),
+            explanation_status=status
+        )
+        if record is not None and self.on_ready is not None:
+            try:
+                self.on_ready(record)
+            except Exception as e:
+                print(f"Error in explanation callback: {str(e)}")
+        return record
+
+    async def _work(self):
+        while True:
+            application_uuid = await self._queue.get()
+            try:
+                await self.ensure(application_uuid)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error generating deferred explanation: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _collect_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            for _ in batch:
+                self._queue.task_done()
+
+            # Batches can take minutes, keep collecting while this one runs
+            task = asyncio.create_task(self._explain_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _explain_batch(self, application_uuids):
+        items = {}
+        for application_uuid in application_uuids:
+            record = self.repository.get(application_uuid)
+            if record is not None and record.get("explanation_status") == "pending":
+                items[application_uuid] = (record["data"], record["prediction"])
+        if not items:
+            return
+
+        try:
+            results = await self.llm_service.generate_explanations_batch(items)
+        except Exception as e:
+            print(f"Error generating batch explanations: {str(e)}")
+            return
+
+        # Anything explained on demand in the meantime is left alone; failures
+        # stay pending and are generated on first read
+        for application_uuid, explanation_data in results.items():
+            record = self.repository.get(application_uuid)
+            if record is not None and record.get("explanation_status") == "pending":
+                self._attach(application_uuid, explanation_data, "ready")
+        print(f"Attached {len(results)}/{len(items)} batch explanations")
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": len(self._inflight),
+            "workers": self.workers,
+            "batches_in_flight": len(self._batch_tasks) if self.use_batches else 0
+        }
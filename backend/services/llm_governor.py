@@ -0,0 +1,309 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import anthropic
+
+# Rate limits (0 = unlimited), set these to the account's API tier
+LLM_REQUESTS_PER_MINUTE = float(os.getenv('LLM_REQUESTS_PER_MINUTE', 0))
+LLM_INPUT_TOKENS_PER_MINUTE = float(os.getenv('LLM_INPUT_TOKENS_PER_MINUTE', 0))
+LLM_OUTPUT_TOKENS_PER_MINUTE = float(os.getenv('LLM_OUTPUT_TOKENS_PER_MINUTE', 0))
+
+# Adaptive concurrency: starts at the max, halves on 429/overload, creeps back up on success
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 32))
+LLM_MIN_CONCURRENCY = int(os.getenv('LLM_MIN_CONCURRENCY', 1))
+
+# Total time budget per call, including time spent waiting for capacity
+LLM_CALL_TIMEOUT = float(os.getenv('LLM_CALL_TIMEOUT', 60))
+
+# Circuit breaker: consecutive upstream failures before opening, seconds before a probe
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_COOLDOWN = float(os.getenv('LLM_BREAKER_COOLDOWN', 30))
+
+# 429 rate limited, 503 unavailable, 529 overloaded
+BACKOFF_STATUS_CODES = (429, 503, 529)
+
+class CircuitOpenError(Exception):
+    pass
+
+class CapacityTimeoutError(Exception):
+    pass
+
+
+class TokenBucket:
+    # Refills continuously at rate_per_minute, holds up to one minute's worth.
+    # take() may drive the level negative so an oversized request still runs.
+
+    def __init__(self, rate_per_minute):
+        self.rate = rate_per_minute / 60
+        self.capacity = rate_per_minute
+        self.level = rate_per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # Seconds until amount is available (0 if it is now)
+        self._refill()
+        needed = min(amount, self.capacity) - self.level
+        return needed / self.rate if needed > 0 else 0.0
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class CallSlot:
+    # Handed to the caller while a governed request runs
+
+    def __init__(self, governor, deadline, input_tokens, output_tokens):
+        self.governor = governor
+        self.deadline = deadline
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.is_probe = False  # admitted as the half-open probe, only its outcome moves the breaker
+
+    def remaining(self):
+        return max(0.001, self.deadline - time.monotonic())
+
+    def record_usage(self, usage):
+        # Settle the token reservation against what the API actually counted
+        self.governor._settle(self, usage)
+
+
+class LLMGovernor:
+    # Shared admission control for Anthropic calls. Each call must pass the
+    # circuit breaker, the request and token buckets and the adaptive
+    # concurrency limit before its deadline. While the breaker is open,
+    # calls fail immediately so callers serve their fallback without waiting.
+    # Calls waiting for a concurrency slot sleep until a running call releases
+    # one. Thread-safe so the sync and async clients can share one governor.
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 input_tokens_per_minute=LLM_INPUT_TOKENS_PER_MINUTE,
+                 output_tokens_per_minute=LLM_OUTPUT_TOKENS_PER_MINUTE,
+                 max_concurrency=LLM_MAX_CONCURRENCY, min_concurrency=LLM_MIN_CONCURRENCY,
+                 call_timeout=LLM_CALL_TIMEOUT, breaker_failures=LLM_BREAKER_FAILURES,
+                 breaker_cooldown=LLM_BREAKER_COOLDOWN):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.input_tokens = TokenBucket(input_tokens_per_minute) if input_tokens_per_minute else None
+        self.output_tokens = TokenBucket(output_tokens_per_minute) if output_tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.call_timeout = call_timeout
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+
+        self._lock = threading.Lock()
+        self._waiters = set()  # wake callbacks of calls waiting for a concurrency slot
+        self.in_flight = 0
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.counters = {"calls": 0, "succeeded": 0, "failed": 0, "backoffs": 0,
+                         "short_circuited": 0, "deadline_exceeded": 0}
+
+    # Admission
+
+    def _try_admit(self, slot, waiter):
+        # Returns (slot acquired, seconds to wait before retrying). The wait is
+        # None when every slot is taken: waiter() is then called on the next release.
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.breaker_cooldown:
+                    self.counters["short_circuited"] += 1
+                    raise CircuitOpenError("LLM circuit breaker is open")
+                self.state = "half_open"
+
+            if self.state == "half_open" and self._probe_in_flight:
+                self.counters["short_circuited"] += 1
+                raise CircuitOpenError("LLM circuit breaker is half-open, probe in flight")
+
+            if self.in_flight >= int(self.concurrency_limit):
+                self._waiters.add(waiter)
+                return False, None
+
+            wait = max(
+                bucket.wait_time(amount)
+                for bucket, amount in ((self.requests, 1), (self.input_tokens, slot.input_tokens),
+                                       (self.output_tokens, slot.output_tokens))
+                if bucket is not None
+            ) if (self.requests or self.input_tokens or self.output_tokens) else 0.0
+            if wait > 0:
+                return False, wait
+
+            for bucket, amount in ((self.requests, 1), (self.input_tokens, slot.input_tokens),
+                                   (self.output_tokens, slot.output_tokens)):
+                if bucket is not None:
+                    bucket.take(amount)
+            self.in_flight += 1
+            self.counters["calls"] += 1
+            if self.state == "half_open":
+                self._probe_in_flight = True
+                slot.is_probe = True
+            return True, 0.0
+
+    def _admit_wait(self, slot, waiter):
+        acquired, wait = self._try_admit(slot, waiter)
+        if acquired:
+            return 0.0
+        remaining = slot.deadline - time.monotonic()
+        if remaining <= 0 or (wait is not None and wait >= remaining):
+            with self._lock:
+                self._waiters.discard(waiter)
+                self.counters["deadline_exceeded"] += 1
+            raise CapacityTimeoutError("No LLM capacity before the call deadline")
+        # Slots all taken: wait for a release, at most until the deadline
+        return remaining if wait is None else wait
+
+    def _forget(self, waiter):
+        with self._lock:
+            self._waiters.discard(waiter)
+
+    @asynccontextmanager
+    async def slot(self, input_tokens, output_tokens, timeout=None):
+        # async with governor.slot(...) as slot: await call(timeout=slot.remaining())
+        slot = CallSlot(self, time.monotonic() + (timeout or self.call_timeout), input_tokens, output_tokens)
+        loop = asyncio.get_running_loop()
+        while True:
+            released = loop.create_future()
+
+            def wake(released=released):
+                if not released.done():
+                    released.set_result(None)
+
+            def waiter(wake=wake):
+                # Called from whichever thread released the slot
+                loop.call_soon_threadsafe(wake)
+
+            try:
+                wait = self._admit_wait(slot, waiter)
+                if wait == 0.0:
+                    break
+                await asyncio.wait_for(released, wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._forget(waiter)
+
+        try:
+            yield slot
+        except BaseException as e:
+            self._release(slot, e)
+            raise
+        else:
+            self._release(slot, None)
+
+    @contextmanager
+    def sync_slot(self, input_tokens, output_tokens, timeout=None):
+        slot = CallSlot(self, time.monotonic() + (timeout or self.call_timeout), input_tokens, output_tokens)
+        while True:
+            released = threading.Event()
+            try:
+                wait = self._admit_wait(slot, released.set)
+                if wait == 0.0:
+                    break
+                released.wait(wait)
+            finally:
+                self._forget(released.set)
+
+        try:
+            yield slot
+        except BaseException as e:
+            self._release(slot, e)
+            raise
+        else:
+            self._release(slot, None)
+
+    # Outcome
+
+    def _release(self, slot, error):
+        with self._lock:
+            self.in_flight -= 1
+            was_probe = slot.is_probe
+            if was_probe:
+                self._probe_in_flight = False
+            # Calls admitted before the breaker opened finish without deciding it
+            decides_breaker = was_probe or self.state == "closed"
+            # Every waiter retries admission, the limit may also have changed
+            waiters, self._waiters = self._waiters, set()
+            for waiter in waiters:
+                try:
+                    waiter()
+                except RuntimeError:
+                    pass  # event loop already closed
+
+            if error is None:
+                self.counters["succeeded"] += 1
+                if decides_breaker:
+                    self.consecutive_failures = 0
+                    self.state = "closed"
+                # Additive increase: about +1 per limit's worth of successes
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1 / self.concurrency_limit)
+                return
+
+            if isinstance(error, asyncio.CancelledError):
+                # Caller went away, says nothing about upstream health
+                if was_probe:
+                    self.state = "open"
+                    self.opened_at = time.monotonic() - self.breaker_cooldown
+                return
+
+            self.counters["failed"] += 1
+            status = getattr(error, "status_code", None)
+            if status in BACKOFF_STATUS_CODES:
+                # Multiplicative decrease on rate limiting / overload
+                self.counters["backoffs"] += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+
+            if not decides_breaker:
+                return
+            if self._is_upstream_failure(error):
+                self.consecutive_failures += 1
+                if was_probe or self.consecutive_failures >= self.breaker_failures:
+                    if self.state != "open":
+                        print(f"LLM circuit breaker opened after {self.consecutive_failures} failures")
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+            elif was_probe:
+                self.state = "closed"
+
+    def _is_upstream_failure(self, error):
+        if isinstance(error, (anthropic.APITimeoutError, anthropic.APIConnectionError, asyncio.TimeoutError)):
+            return True
+        status = getattr(error, "status_code", None)
+        return status is not None and (status >= 500 or status in BACKOFF_STATUS_CODES)
+
+    def _settle(self, slot, usage):
+        if usage is None:
+            return
+        actual_input = ((getattr(usage, "input_tokens", 0) or 0)
+                        + (getattr(usage, "cache_creation_input_tokens", 0) or 0))
+        actual_output = getattr(usage, "output_tokens", 0) or 0
+        with self._lock:
+            if self.input_tokens is not None:
+                self.input_tokens.give_back(slot.input_tokens - actual_input)
+            if self.output_tokens is not None:
+                self.output_tokens.give_back(slot.output_tokens - actual_output)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                "state": self.state,
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "consecutive_failures": self.consecutive_failures
+            }
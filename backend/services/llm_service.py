@@ -1,60 +1,46 @@
 import anthropic
+import asyncio
+import httpx
 import os
 import re
+import threading
+import time
 from dotenv import load_dotenv
 
+from services.explanation_cache import ExplanationCache
+from services.llm_governor import LLMGovernor
+from services.template_explainer import application_facts, facts_metrics, template_explanation
+
 load_dotenv()
 
-class LoanExplainerService:
-    
-    def __init__(self):
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-        self.client = anthropic.Anthropic(api_key=api_key)
-    
-    def generate_explanation(self, loan_data, prediction):
-        
-        # Calculate key metrics
-        income = loan_data.get('ApplicantIncome', 0)
-        coapplicant_income = loan_data.get('CoapplicantIncome', 0)
-        total_income = income + coapplicant_income
-        loan_amount = loan_data.get('LoanAmount', 0) * 1000  # Convert to full amount
-        loan_term_months = loan_data.get('Loan_Amount_Term', 360)
-        
-        # Calculate DTI (simplified - monthly loan payment / monthly income)
-        monthly_payment = loan_amount / loan_term_months if loan_term_months > 0 else 0
-        dti_ratio = (monthly_payment / total_income * 100) if total_income > 0 else 0
-        
-        # Get other details
-        credit_history = 'Good Standing' if loan_data.get('Credit_History', 0) == 1 else 'Poor Standing'
-        employment = 'Self-Employed' if loan_data.get('Self_Employed', 0) == 1 else 'Employed'
-        dependents = int(loan_data.get('Dependents', 0))
-        property_areas = ['Urban', 'Semiurban', 'Rural']
-        property_area = property_areas[int(loan_data.get('Property_Area', 0))]
-        education = 'Graduate' if loan_data.get('Education', 0) == 0 else 'Not Graduate'
-        married = 'Yes' if loan_data.get('Married', 0) == 1 else 'No'
-        
-        prompt = f"""You are an AI assistant providing decision support to a bank loan officer reviewing a loan application.
+MODEL_NAME = "claude-sonnet-4-20250514"
 
-Your role is to provide objective, professional risk assessment to help the officer make informed lending decisions.
+# Bump whenever a prompt template changes so cached outputs are not reused
+PROMPT_VERSION = 2
 
-APPLICATION DATA:
-- Applicant Income: RM {income:,.2f}/month
-- Co-applicant Income: RM {coapplicant_income:,.2f}/month
-- Total Household Income: RM {total_income:,.2f}/month
-- Loan Amount Requested: RM {loan_amount:,.2f}
-- Loan Term: {loan_term_months} months ({loan_term_months/12:.1f} years)
-- Monthly Payment (approx): RM {monthly_payment:,.2f}
-- Debt-to-Income Ratio: {dti_ratio:.1f}%
-- Credit History: {credit_history}
-- Employment Status: {employment}
-- Education Level: {education}
-- Marital Status: {married}
-- Number of Dependents: {dependents}
-- Property Location: {property_area}
+QUESTION_FALLBACK = "I apologize, but I'm having trouble processing your question right now. Please try again or contact technical support."
+ALTERNATIVE_TERMS_FALLBACK = "Unable to generate alternative terms at this time."
 
-ML MODEL DECISION: {prediction}
+# Shared connection pool for the async client
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', 100))
+
+# Retries of a blocking call after a connection error, 429 or 5xx, made only
+# while the governor's call deadline leaves room for the backoff. The SDK's
+# own retries are off on the blocking client, they can outlive the deadline.
+LLM_SYNC_MAX_RETRIES = int(os.getenv('LLM_SYNC_MAX_RETRIES', 2))
+
+# Message Batches API: seconds between status checks while a batch runs
+BATCH_POLL_SECONDS = float(os.getenv('BATCH_POLL_SECONDS', 30))
+
+# Static instruction blocks, sent as the system prompt ahead of the
+# per-application data so the prefix is identical on every call.
+# Changing any of these requires bumping PROMPT_VERSION.
+
+EXPLANATION_SYSTEM_PROMPT = """You are an AI assistant providing decision support to a bank loan officer reviewing a loan application.
+
+Your role is to provide objective, professional risk assessment to help the officer make informed lending decisions.
+
+You will be given the APPLICATION DATA and the ML MODEL DECISION for one application.
 
 INSTRUCTIONS:
 Provide a professional risk assessment for the loan officer in the following format:
@@ -71,9 +57,9 @@ Provide a professional risk assessment for the loan officer in the following for
 • [Focus on factors that support approval]
 
 **Financial Analysis:**
-• DTI Ratio: [Comment on the {dti_ratio:.1f}% ratio - is it acceptable? Industry standard is <40%]
+• DTI Ratio: [Comment on the application's Debt-to-Income Ratio - is it acceptable? Industry standard is <40%]
 • Income Stability: [Assess based on employment status and income level]
-• Repayment Capacity: [Can applicant afford RM {monthly_payment:,.2f}/month?]
+• Repayment Capacity: [Can applicant afford the approximate monthly payment?]
 
 **Recommendation:**
 [Clear recommendation: APPROVE / REJECT / CONDITIONAL APPROVAL]
@@ -84,45 +70,372 @@ Provide a professional risk assessment for the loan officer in the following for
 
 Keep the tone professional, objective, and data-driven. This is for internal bank use, not customer communication."""
 
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1000,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
+QUESTION_SYSTEM_PROMPT = """You are an AI assistant helping a bank loan officer analyze a loan application.
+
+You will be given the OFFICER'S QUESTION, an APPLICATION SUMMARY and the PREVIOUS RISK ASSESSMENT.
+
+INSTRUCTIONS:
+- Provide a clear, professional answer from the loan officer's perspective
+- Be specific and data-driven
+- Include numbers and calculations when relevant
+- Suggest actionable next steps if applicable
+- Keep response concise (3-5 short paragraphs maximum)
+- Use bullet points when listing multiple items"""
+
+ALTERNATIVE_TERMS_SYSTEM_PROMPT = """You are helping a loan officer find alternative solutions for a rejected loan application.
+
+You will be given the CURRENT APPLICATION.
+
+TASK:
+Suggest 3 alternative options that might make this application approvable:
+
+**Option 1: Reduced Loan Amount**
+[Calculate and suggest appropriate loan amount based on 30% DTI ratio]
+
+**Option 2: Extended Loan Term**
+[Suggest longer term to reduce monthly payments]
+
+**Option 3: Additional Requirements**
+[Suggest conditions like: co-signer, higher down payment, collateral, etc.]
+
+For each option, include:
+- Specific numbers and terms
+- Why this would improve approval chances
+- Any trade-offs or additional requirements
+
+Keep suggestions practical and realistic."""
+
+# How long an unclosed '<' holds back streamed text before it is treated as
+# a plain character (e.g. "DTI <40%") rather than the start of an HTML tag
+STREAM_TAG_HOLD_CHARS = 100
+
+# Trailing characters the next token can still change: ".X" gains a space,
+# backticks may open a fence, newlines may join a run that gets collapsed
+STREAM_HELD_CHARS = '.` \t\r\n\x0b\x0c'
+
+class StreamingCleaner:
+    # Applies _clean_text to a token stream. Text is released only up to a
+    # point later tokens cannot change: an open HTML tag, an unmatched code
+    # fence, and trailing periods, backticks and whitespace are held back.
+    # Each released piece is cleaned once and never revisited, so only the
+    # held-back tail is rescanned per token. The deltas add up to exactly
+    # self.emitted, which callers store, so what was streamed is what is kept.
+
+    def __init__(self, clean):
+        self.clean = clean
+        self.raw = ""      # held-back tail, not cleaned yet
+        self._parts = []   # cleaned text released so far
+
+    @property
+    def emitted(self):
+        return "".join(self._parts)
+
+    def feed(self, text):
+        self.raw += text
+        return self._release(self._safe_end())
+
+    def finish(self):
+        # Remaining text, afterwards self.emitted is the full cleaned response
+        return self._release(len(self.raw), final=True)
+
+    def _release(self, end, final=False):
+        if end <= 0 and not final:
+            return ""
+
+        cleaned = self.clean(self.raw[:end])
+        rest = self.raw[end:]
+        if not self._parts:
+            cleaned = cleaned.lstrip()
+        if final:
+            delta = cleaned.rstrip()
+        else:
+            # A removed tag can leave whitespace, a period or a backtick at the
+            # end, those wait to be cleaned together with what follows
+            delta = cleaned.rstrip(STREAM_HELD_CHARS)
+            rest = cleaned[len(delta):] + rest
+        self.raw = rest
+        if delta:
+            self._parts.append(delta)
+        return delta
+
+    def _safe_end(self):
+        raw = self.raw
+        end = len(raw)
+
+        # A tag runs from the first '<' after the last '>' to the next '>'
+        tag_start = raw.find('<', raw.rfind('>') + 1)
+        if tag_start != -1 and end - tag_start < STREAM_TAG_HOLD_CHARS:
+            end = tag_start
+
+        end = len(raw[:end].rstrip(STREAM_HELD_CHARS))
+
+        fences = [match.start() for match in re.finditer('```', raw[:end])]
+        if len(fences) % 2:
+            end = len(raw[:fences[-1]].rstrip(STREAM_HELD_CHARS))
+        return end
+
+class LoanExplainerService:
+    
+    def __init__(self, api_key=None, base_url=None, cache=None, governor=None):
+        api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+        base_url = base_url or os.getenv('ANTHROPIC_BASE_URL') or None
+        
+        self.client = anthropic.Anthropic(api_key=api_key, base_url=base_url, max_retries=0)
+        self.async_client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS
+                )
             )
+        )
+        self.cache = cache if cache is not None else ExplanationCache()
+        # Rate limits, adaptive concurrency, deadlines and circuit breaker for all live calls
+        self.governor = governor if governor is not None else LLMGovernor()
+        self._usage_lock = threading.Lock()
+        self.usage = {
+            "calls": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0
+        }
+    
+    def generate_explanation(self, loan_data, prediction):
+        
+        cache_key = self._explanation_cache_key(loan_data, prediction)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt, metrics = self._explanation_prompt(loan_data, prediction)
+        
+        try:
+            explanation = self._create_message(prompt, EXPLANATION_SYSTEM_PROMPT, max_tokens=1000)
+            result = self._explanation_result(explanation, metrics)
+            self.cache.put(cache_key, result)
+            return result
             
-            explanation = response.content[0].text
+        except Exception as e:
+            print(f"Error generating explanation: {str(e)}")
+            return self._explanation_fallback(loan_data, prediction)
+    
+    async def generate_explanation_async(self, loan_data, prediction):
+        
+        cache_key = self._explanation_cache_key(loan_data, prediction)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt, metrics = self._explanation_prompt(loan_data, prediction)
+        
+        try:
+            explanation = await self._create_message_async(prompt, EXPLANATION_SYSTEM_PROMPT, max_tokens=1000)
+            result = self._explanation_result(explanation, metrics)
+            self.cache.put(cache_key, result)
+            return result
+            
+        except Exception as e:
+            print(f"Error generating explanation: {str(e)}")
+            return self._explanation_fallback(loan_data, prediction)
+    
+    async def stream_explanation(self, loan_data, prediction):
+        # Yields (event, data): "metrics" first, then "delta" chunks of cleaned
+        # text, then "done" with the same result generate_explanation returns
+        
+        prompt, metrics = self._explanation_prompt(loan_data, prediction)
+        yield "metrics", {"metrics": metrics}
+        
+        cache_key = self._explanation_cache_key(loan_data, prediction)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            yield "delta", {"text": cached["explanation"]}
+            yield "done", cached
+            return
+        
+        cleaner = StreamingCleaner(self._clean_text)
+        try:
+            async for text in self._stream_message_async(prompt, EXPLANATION_SYSTEM_PROMPT, max_tokens=1000):
+                delta = cleaner.feed(text)
+                if delta:
+                    yield "delta", {"text": delta}
+            delta = cleaner.finish()
+            if delta:
+                yield "delta", {"text": delta}
             
-            # Clean up formatting
-            explanation = self._clean_text(explanation)
+            result = {"explanation": cleaner.emitted, "metrics": metrics}
+            self.cache.put(cache_key, result)
+            yield "done", result
             
-            return {
-                "explanation": explanation.strip(),
-                "metrics": {
-                    "dti_ratio": round(dti_ratio, 2),
-                    "monthly_payment": round(monthly_payment, 2),
-                    "total_income": round(total_income, 2),
-                    "loan_to_income_ratio": round((loan_amount / (total_income * 12)) * 100, 2) if total_income > 0 else 0
-                }
-            }
+        except Exception as e:
+            print(f"Error streaming explanation: {str(e)}")
+            yield "done", self._explanation_fallback(loan_data, prediction)
+    
+    async def generate_explanations_batch(self, items, poll_interval=BATCH_POLL_SECONDS):
+        # items: {custom_id: (loan_data, prediction)}, returns {custom_id: result}.
+        # Cached explanations are returned directly, the rest go out as one
+        # Message Batch that is polled until it ends. Requests that errored or
+        # expired are left out so the caller can retry them another way.
+        # custom_id must be 1-64 chars of [A-Za-z0-9_-].
+        
+        results = {}
+        requests = []
+        pending = {}
+        
+        for custom_id, (loan_data, prediction) in items.items():
+            cache_key = self._explanation_cache_key(loan_data, prediction)
+            cached = await self.cache.get_async(cache_key)
+            if cached is not None:
+                results[custom_id] = cached
+                continue
+            
+            prompt, metrics = self._explanation_prompt(loan_data, prediction)
+            requests.append({
+                "custom_id": custom_id,
+                "params": self._request(prompt, EXPLANATION_SYSTEM_PROMPT, max_tokens=1000)
+            })
+            pending[custom_id] = (cache_key, metrics)
+        
+        if not requests:
+            return results
+        
+        try:
+            batch = await self.async_client.messages.batches.create(requests=requests)
+            print(f"Submitted explanation batch {batch.id} ({len(requests)} requests)")
+            
+            while batch.processing_status != "ended":
+                await asyncio.sleep(poll_interval)
+                batch = await self.async_client.messages.batches.retrieve(batch.id)
+            
+            async for entry in await self.async_client.messages.batches.results(batch.id):
+                if entry.custom_id not in pending or entry.result.type != "succeeded":
+                    continue
+                cache_key, metrics = pending.pop(entry.custom_id)
+                message = entry.result.message
+                self._record_usage(message.usage)
+                result = self._explanation_result(message.content[0].text, metrics)
+                self.cache.put(cache_key, result)
+                results[entry.custom_id] = result
             
         except Exception as e:
-            print(f"Error generating explanation: {str(e)}")
-            return {
-                "explanation": f"**Decision: {prediction}**\n\nUnable to generate detailed risk assessment at this time. Please review application manually.",
-                "metrics": {
-                    "dti_ratio": round(dti_ratio, 2),
-                    "monthly_payment": round(monthly_payment, 2),
-                    "total_income": round(total_income, 2),
-                    "loan_to_income_ratio": 0
-                }
-            }
+            print(f"Error running explanation batch: {str(e)}")
+        
+        if pending:
+            print(f"{len(pending)} batch explanations did not succeed")
+        
+        return results
+    
+    def explanation_metrics(self, loan_data):
+        # Metrics returned alongside an explanation, without calling the LLM
+        return facts_metrics(application_facts(loan_data))
+    
+    def _explanation_cache_key(self, loan_data, prediction):
+        return self.cache.make_key("explanation", PROMPT_VERSION, loan_data=loan_data, prediction=prediction)
+    
+    def _alternative_terms_cache_key(self, loan_data, decision):
+        # The alternative-terms prompt only uses these inputs
+        total_income = loan_data.get('ApplicantIncome', 0) + loan_data.get('CoapplicantIncome', 0)
+        return self.cache.make_key(
+            "alternative_terms",
+            PROMPT_VERSION,
+            total_income=total_income,
+            loan_amount=loan_data.get('LoanAmount', 0),
+            credit_history=loan_data.get('Credit_History', 0) == 1,
+            decision=decision.lower()
+        )
+    
+    def _explanation_prompt(self, loan_data, prediction):
+        
+        # Same derived figures as the local template explanation
+        facts = application_facts(loan_data)
+        loan_term_months = facts["loan_term_months"]
+        
+        prompt = f"""APPLICATION DATA:
+- Applicant Income: RM {facts['income']:,.2f}/month
+- Co-applicant Income: RM {facts['coapplicant_income']:,.2f}/month
+- Total Household Income: RM {facts['total_income']:,.2f}/month
+- Loan Amount Requested: RM {facts['loan_amount']:,.2f}
+- Loan Term: {loan_term_months} months ({loan_term_months/12:.1f} years)
+- Monthly Payment (approx): RM {facts['monthly_payment']:,.2f}
+- Debt-to-Income Ratio: {facts['dti_ratio']:.1f}%
+- Credit History: {facts['credit_history']}
+- Employment Status: {facts['employment']}
+- Education Level: {facts['education']}
+- Marital Status: {facts['married']}
+- Number of Dependents: {facts['dependents']}
+- Property Location: {facts['property_area']}
+
+ML MODEL DECISION: {prediction}
+
+Provide the risk assessment for this application."""
+        
+        return prompt, facts_metrics(facts)
+    
+    def _explanation_result(self, explanation, metrics):
+        
+        # Clean up formatting
+        explanation = self._clean_text(explanation)
+        
+        return {
+            "explanation": explanation.strip(),
+            "metrics": metrics
+        }
+    
+    def _explanation_fallback(self, loan_data, prediction):
+        # Local rule-based assessment, never cached so the LLM is retried next time.
+        # Marked so callers can tell it from an LLM explanation.
+        return {**template_explanation(loan_data, prediction), "fallback": True}
     
     def answer_question(self, question, application_context):
         
+        prompt = self._question_prompt(question, application_context)
+        
+        try:
+            answer = self._create_message(prompt, QUESTION_SYSTEM_PROMPT, max_tokens=600)
+            return self._clean_text(answer).strip()
+            
+        except Exception as e:
+            print(f"Error generating answer: {str(e)}")
+            return QUESTION_FALLBACK
+    
+    async def answer_question_async(self, question, application_context):
+        
+        prompt = self._question_prompt(question, application_context)
+        
+        try:
+            answer = await self._create_message_async(prompt, QUESTION_SYSTEM_PROMPT, max_tokens=600)
+            return self._clean_text(answer).strip()
+            
+        except Exception as e:
+            print(f"Error generating answer: {str(e)}")
+            return QUESTION_FALLBACK
+    
+    async def stream_answer(self, question, application_context):
+        # Yields ("delta", {"text"}) chunks then ("done", {"answer"})
+        
+        prompt = self._question_prompt(question, application_context)
+        cleaner = StreamingCleaner(self._clean_text)
+        
+        try:
+            async for text in self._stream_message_async(prompt, QUESTION_SYSTEM_PROMPT, max_tokens=600):
+                delta = cleaner.feed(text)
+                if delta:
+                    yield "delta", {"text": delta}
+            delta = cleaner.finish()
+            if delta:
+                yield "delta", {"text": delta}
+            yield "done", {"answer": cleaner.emitted}
+            
+        except Exception as e:
+            print(f"Error streaming answer: {str(e)}")
+            yield "done", {"answer": QUESTION_FALLBACK}
+    
+    def _question_prompt(self, question, application_context):
+        
         data = application_context.get('data', {})
         prediction = application_context.get('prediction', 'Unknown')
         
@@ -137,9 +450,7 @@ Keep the tone professional, objective, and data-driven. This is for internal ban
         
         credit_history = 'Good' if data.get('Credit_History', 0) == 1 else 'Poor'
         
-        prompt = f"""You are an AI assistant helping a bank loan officer analyze a loan application.
-
-OFFICER'S QUESTION: "{question}"
+        prompt = f"""OFFICER'S QUESTION: "{question}"
 
 APPLICATION SUMMARY:
 - Decision: {prediction}
@@ -153,92 +464,157 @@ APPLICATION SUMMARY:
 PREVIOUS RISK ASSESSMENT:
 {application_context.get('explanation', 'No previous assessment available')}
 
-INSTRUCTIONS:
-- Provide a clear, professional answer from the loan officer's perspective
-- Be specific and data-driven
-- Include numbers and calculations when relevant
-- Suggest actionable next steps if applicable
-- Keep response concise (3-5 short paragraphs maximum)
-- Use bullet points when listing multiple items
-
 Answer the officer's question:"""
 
+        return prompt
+    
+    def suggest_alternative_terms(self, loan_data, original_decision):
+        # Suggest alternative loan terms if application was rejected
+        
+        if original_decision.lower() == "approved":
+            return "Application already approved. No alternative terms needed."
+        
+        cache_key = self._alternative_terms_cache_key(loan_data, original_decision)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = self._alternative_terms_prompt(loan_data)
+        
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=600,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            
-            answer = response.content[0].text
-            answer = self._clean_text(answer)
-            
-            return answer.strip()
+            suggestions = self._create_message(prompt, ALTERNATIVE_TERMS_SYSTEM_PROMPT, max_tokens=600)
+            suggestions = self._clean_text(suggestions).strip()
+            self.cache.put(cache_key, suggestions)
+            return suggestions
             
         except Exception as e:
-            print(f"Error generating answer: {str(e)}")
-            return "I apologize, but I'm having trouble processing your question right now. Please try again or contact technical support."
+            print(f"Error generating suggestions: {str(e)}")
+            return ALTERNATIVE_TERMS_FALLBACK
     
-    def suggest_alternative_terms(self, loan_data, original_decision):
-        # Suggest alternative loan terms if application was rejected
+    async def suggest_alternative_terms_async(self, loan_data, original_decision):
         
         if original_decision.lower() == "approved":
             return "Application already approved. No alternative terms needed."
         
+        cache_key = self._alternative_terms_cache_key(loan_data, original_decision)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = self._alternative_terms_prompt(loan_data)
+        
+        try:
+            suggestions = await self._create_message_async(prompt, ALTERNATIVE_TERMS_SYSTEM_PROMPT, max_tokens=600)
+            suggestions = self._clean_text(suggestions).strip()
+            self.cache.put(cache_key, suggestions)
+            return suggestions
+            
+        except Exception as e:
+            print(f"Error generating suggestions: {str(e)}")
+            return ALTERNATIVE_TERMS_FALLBACK
+    
+    def _alternative_terms_prompt(self, loan_data):
+        
         income = loan_data.get('ApplicantIncome', 0)
         coapplicant_income = loan_data.get('CoapplicantIncome', 0)
         total_income = income + coapplicant_income
         loan_amount = loan_data.get('LoanAmount', 0) * 1000
         credit_history = 'Good' if loan_data.get('Credit_History', 0) == 1 else 'Poor'
         
-        prompt = f"""You are helping a loan officer find alternative solutions for a rejected loan application.
-
-CURRENT APPLICATION:
+        prompt = f"""CURRENT APPLICATION:
 - Total Income: RM {total_income:,.2f}
 - Requested Loan: RM {loan_amount:,.2f}
 - Credit History: {credit_history}
 - Original Decision: REJECTED
 
-TASK:
-Suggest 3 alternative options that might make this application approvable:
-
-**Option 1: Reduced Loan Amount**
-[Calculate and suggest appropriate loan amount based on 30% DTI ratio]
-
-**Option 2: Extended Loan Term**
-[Suggest longer term to reduce monthly payments]
-
-**Option 3: Additional Requirements**
-[Suggest conditions like: co-signer, higher down payment, collateral, etc.]
+Suggest the 3 alternative options for this application."""
 
-For each option, include:
-- Specific numbers and terms
-- Why this would improve approval chances
-- Any trade-offs or additional requirements
-
-Keep suggestions practical and realistic."""
-
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=600,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
+        return prompt
+    
+    def _request(self, prompt, system, max_tokens):
+        # Static instructions in the system prompt, only the data changes per call.
+        # No cache_control: the system prompts are well under the 1024-token
+        # minimum cacheable prefix, so a breakpoint would never be used.
+        return {
+            "model": MODEL_NAME,
+            "max_tokens": max_tokens,
+            "system": system,
+            "messages": [{
+                "role": "user",
+                "content": prompt
+            }]
+        }
+    
+    def _estimate_input_tokens(self, prompt, system):
+        # Rough count for rate limiting, settled against real usage afterwards
+        return (len(prompt) + len(system)) // 4
+    
+    def _create_message(self, prompt, system, max_tokens):
+        
+        request = self._request(prompt, system, max_tokens)
+        with self.governor.sync_slot(self._estimate_input_tokens(prompt, system), max_tokens) as slot:
+            attempt = 0
+            while True:
+                try:
+                    response = self.client.messages.create(**request, timeout=slot.remaining())
+                    break
+                except (anthropic.APIConnectionError, anthropic.APIStatusError) as e:
+                    status = getattr(e, "status_code", None)
+                    retryable = status is None or status in (408, 409, 429) or status >= 500
+                    backoff = 0.5 * 2 ** attempt
+                    if not retryable or attempt >= LLM_SYNC_MAX_RETRIES or slot.remaining() <= backoff + 1:
+                        raise
+                    attempt += 1
+                    time.sleep(backoff)
+            slot.record_usage(response.usage)
+        self._record_usage(response.usage)
+        
+        return response.content[0].text
+    
+    async def _create_message_async(self, prompt, system, max_tokens):
+        
+        request = self._request(prompt, system, max_tokens)
+        async with self.governor.slot(self._estimate_input_tokens(prompt, system), max_tokens) as slot:
+            # wait_for also bounds the SDK's own retries by the deadline
+            response = await asyncio.wait_for(
+                self.async_client.messages.create(**request, timeout=slot.remaining()),
+                slot.remaining()
             )
-            
-            suggestions = response.content[0].text
-            suggestions = self._clean_text(suggestions)
-            
-            return suggestions.strip()
-            
-        except Exception as e:
-            print(f"Error generating suggestions: {str(e)}")
-            return "Unable to generate alternative terms at this time."
+            slot.record_usage(response.usage)
+        self._record_usage(response.usage)
+        
+        return response.content[0].text
+    
+    async def _stream_message_async(self, prompt, system, max_tokens):
+        
+        request = self._request(prompt, system, max_tokens)
+        async with self.governor.slot(self._estimate_input_tokens(prompt, system), max_tokens) as slot:
+            async with self.async_client.messages.stream(**request, timeout=slot.remaining()) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                usage = (await stream.get_final_message()).usage
+            slot.record_usage(usage)
+        self._record_usage(usage)
+    
+    def _record_usage(self, usage):
+        # Token counts from the API, including prompt-cache reads and writes
+        if usage is None:
+            return
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            for field in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+                self.usage[field] += getattr(usage, field, None) or 0
+    
+    def usage_stats(self):
+        with self._usage_lock:
+            usage = dict(self.usage)
+        prompt_tokens = usage["input_tokens"] + usage["cache_read_input_tokens"] + usage["cache_creation_input_tokens"]
+        usage["cache_read_rate"] = round(usage["cache_read_input_tokens"] / prompt_tokens * 100, 2) if prompt_tokens else 0.0
+        return usage
+    
+    async def aclose(self):
+        await self.async_client.close()
+        await asyncio.to_thread(self.cache.close)
     
     def _clean_text(self, text):
         
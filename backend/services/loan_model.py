@@ -0,0 +1,92 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+
+from services.forest_engine import CompiledForest
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NUM_COLS = ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount', 'Loan_Amount_Term']
+FEATURE_COLS = ['Gender', 'Married', 'Dependents', 'Education', 'Self_Employed', 'ApplicantIncome',
+                'CoapplicantIncome', 'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area']
+
+# Inference engine: "sklearn" (default), "compiled" (flattened array forest)
+# or "fused" (compiled forest with the scaler folded into its thresholds)
+MODEL_ENGINE = os.getenv('MODEL_ENGINE', 'sklearn').lower()
+
+def load_model():
+    model_path = os.path.join(backend_dir, 'ml_models', 'loan_status_predictor.pkl')
+    print(f"Loading model from: {model_path}")
+
+    if not os.path.exists(model_path):
+        model_path = os.path.join(backend_dir, 'loan_status_predictor.pkl')
+        print(f"Trying alternative: {model_path}")
+
+    if os.path.exists(model_path):
+        print(f"Model found at: {model_path}")
+        return joblib.load(model_path)
+    else:
+        raise FileNotFoundError(f"Model not found at {model_path}")
+
+def load_scaler():
+    scaler_path = os.path.join(backend_dir, 'ml_models', 'vector.pkl')
+    print(f"Loading scaler from: {scaler_path}")
+
+    if not os.path.exists(scaler_path):
+        scaler_path = os.path.join(backend_dir, 'vector.pkl')
+        print(f"Trying alternative: {scaler_path}")
+
+    if os.path.exists(scaler_path):
+        print(f"Scaler found at: {scaler_path}")
+        return joblib.load(scaler_path)
+    else:
+        raise FileNotFoundError(f"Scaler not found at {scaler_path}")
+
+class LoanScorer:
+    # The trained model and scaler behind one vectorized predict call, shared
+    # by the API and the offline tools
+
+    def __init__(self, model, scaler, engine=MODEL_ENGINE):
+        self.model = model
+        self.scaler = scaler
+        self.engine = engine
+        self.compiled_model = None
+        if engine in ('compiled', 'fused'):
+            self.compiled_model = CompiledForest.from_sklearn(model, scaler=scaler, scaled_cols=NUM_COLS)
+            if engine == 'fused':
+                self.compiled_model = self.compiled_model.fuse_scaler()
+            print(f"Serving predictions from {engine} forest ({len(self.compiled_model.roots)} trees)")
+
+    @classmethod
+    def load(cls, engine=MODEL_ENGINE):
+        return cls(load_model(), load_scaler(), engine=engine)
+
+    def predict_batch(self, records):
+        # Score many applications with a single scaler.transform and predict_proba call
+
+        if self.compiled_model is not None:
+            input_data = np.array([[record[col] for col in FEATURE_COLS] for record in records], dtype=np.float64)
+            return self._decide(self.compiled_model.predict_proba(input_data))
+
+        return self.predict_frame(pd.DataFrame.from_records(records, columns=FEATURE_COLS))
+
+    def predict_frame(self, frame):
+        # Same as predict_batch for a DataFrame holding FEATURE_COLS
+
+        if self.compiled_model is not None:
+            input_data = frame[FEATURE_COLS].to_numpy(dtype=np.float64)
+            return self._decide(self.compiled_model.predict_proba(input_data))
+
+        input_data = frame[FEATURE_COLS].copy()
+        input_data[NUM_COLS] = self.scaler.transform(input_data[NUM_COLS])
+        return self._decide(self.model.predict_proba(input_data))
+
+    def _decide(self, probabilities):
+        # Same decision rule as model.predict (argmax over classes_)
+        classes = self.model.classes_
+        predicted = classes[probabilities.argmax(axis=1)]
+        decisions = np.where(predicted == 1, "Approved", "Rejected")
+        approval_probabilities = probabilities[:, list(classes).index(1)]
+
+        return decisions, approval_probabilities
@@ -0,0 +1,160 @@
+import io
+import numpy as np
+import pdfplumber
+from pdf2image import convert_from_bytes
+
+# In-process renderer (ships with pdfplumber), pdf2image/poppler is the fallback
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+class ParsedDocument:
+    # A loan application PDF opened once per upload and shared by the
+    # signature detector and the field extractor. The pdfplumber page,
+    # extracted text and rendered image are each produced on first use.
+
+    def __init__(self, pdf_bytes, source="<memory>"):
+        self.pdf_bytes = pdf_bytes
+        self.source = source
+        self._pdf = None
+        self._page = None
+        self._text = None
+        self._images = {}
+        self._words = None
+        self._pdfium_doc = None
+        self._pdfium_first_page = None
+        self._pdfium_text = None
+
+    @classmethod
+    def from_path(cls, pdf_path):
+        with open(pdf_path, "rb") as f:
+            return cls(f.read(), source=pdf_path)
+
+    @property
+    def page(self):
+        # First page, application forms are single-page
+        if self._page is None:
+            self._pdf = pdfplumber.open(io.BytesIO(self.pdf_bytes))
+            self._page = self._pdf.pages[0]
+        return self._page
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.page.extract_text() or ""
+        return self._text
+
+    @property
+    def page_size(self):
+        # (width, height) of the first page in points
+        if pdfium is not None:
+            return tuple(self._pdfium_page().get_size())
+        return self.page.width, self.page.height
+
+    def text_in_box(self, x0, bottom, x1, top):
+        # Text inside a box given in PDF points (origin bottom-left, as drawn).
+        # pdfium extracts only the characters in the box; without it the
+        # box is filled from pdfplumber word bounding boxes.
+        
+        if pdfium is not None:
+            if self._pdfium_text is None:
+                self._pdfium_text = self._pdfium_page().get_textpage()
+            return self._pdfium_text.get_text_bounded(left=x0, bottom=bottom, right=x1, top=top).strip()
+        
+        if self._words is None:
+            self._words = self.page.extract_words()
+        page_height = self.page.height
+        # pdfplumber measures top/bottom from the top of the page
+        words = [word for word in self._words
+                 if word["x0"] >= x0 and word["x1"] <= x1
+                 and page_height - word["bottom"] >= bottom and page_height - word["top"] <= top]
+        return " ".join(word["text"] for word in words)
+
+    def page_image(self, dpi=150):
+        # Rendered first page as a PIL image, cached per DPI
+        if dpi not in self._images:
+            images = convert_from_bytes(self.pdf_bytes, dpi=dpi, first_page=1, last_page=1)
+            self._images[dpi] = images[0] if images else None
+        return self._images[dpi]
+
+    def render_region(self, top=0.0, bottom=1.0, dpi=150):
+        # Grayscale uint8 array of a horizontal band of the first page.
+        # top/bottom are fractions of the page height measured from the top.
+        # pdfium renders only the band, in-process, with no temp files.
+        
+        if pdfium is not None:
+            page = self._pdfium_page()
+            page_height = page.get_height()
+            
+            # crop = points removed from (left, bottom, right, top)
+            bitmap = page.render(
+                scale=dpi / 72,
+                crop=(0, page_height * (1 - bottom), 0, page_height * top),
+                grayscale=True
+            )
+            region = bitmap.to_numpy()
+            return region.reshape(region.shape[0], region.shape[1])
+        
+        image = self.page_image(dpi=dpi)
+        if image is None:
+            return None
+        gray = np.array(image.convert('L'))
+        height = gray.shape[0]
+        return gray[int(height * top):int(height * bottom), :]
+
+    def render_box(self, x0, bottom, x1, top, dpi=150):
+        # Grayscale uint8 array of a box given in PDF points, only the box is rendered
+        
+        if pdfium is not None:
+            page = self._pdfium_page()
+            page_width, page_height = page.get_size()
+            bitmap = page.render(
+                scale=dpi / 72,
+                crop=(x0, bottom, page_width - x1, page_height - top),
+                grayscale=True
+            )
+            region = bitmap.to_numpy()
+            return region.reshape(region.shape[0], region.shape[1])
+        
+        image = self.page_image(dpi=dpi)
+        if image is None:
+            return None
+        gray = np.array(image.convert('L'))
+        scale = dpi / 72
+        page_height = self.page.height
+        return gray[int((page_height - top) * scale):int((page_height - bottom) * scale),
+                    int(x0 * scale):int(x1 * scale)]
+
+    def _pdfium_page(self):
+        if self._pdfium_first_page is None:
+            self._pdfium_doc = pdfium.PdfDocument(self.pdf_bytes)
+            self._pdfium_first_page = self._pdfium_doc[0]
+        return self._pdfium_first_page
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+            self._page = None
+        if self._pdfium_text is not None:
+            self._pdfium_text.close()
+            self._pdfium_text = None
+        if self._pdfium_first_page is not None:
+            self._pdfium_first_page.close()
+            self._pdfium_first_page = None
+        if self._pdfium_doc is not None:
+            self._pdfium_doc.close()
+            self._pdfium_doc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def as_document(pdf):
+    # Accept either a file path or an already parsed document
+    if isinstance(pdf, ParsedDocument):
+        return pdf
+    return ParsedDocument.from_path(pdf)
@@ -1,128 +1,260 @@
-import pdfplumber
 import re
 import os
+import sys
+import time
+
+import pandas as pd
+
+from services.pdf_document import as_document
+
+# Label and value pattern for each field of the application form. A value
+# pattern is matched right after its label (label + value is the full
+# search pattern used when a label is not at the start of a line).
+FIELD_PATTERNS = {
+    'application_id': (r'Application Reference:', r'\s*(\S+)'),
+    'full_name': (r'Full Name \(as per IC\):', r'\s*(.+)'),
+    'ic_number': (r'IC Number:', r'\s*([\d-]+)'),
+    'gender': (r'Gender:', r'\s*(\w+)'),
+    'marital_status': (r'Marital Status:', r'\s*(\w+)'),
+    'dependents': (r'Number of Dependents:', r'\s*(\d+)'),
+    'education': (r'Education Level:', r'\s*(.+?)(?=\n|Employment)'),
+    'self_employed': (r'Employment Status:', r'\s*(.+?)(?=\n|Monthly)'),
+    'applicant_income': (r'Monthly Income:', r'\s*RM\s*([\d,]+)'),
+    'coapplicant_income': (r'Co-applicant Income:', r'\s*RM\s*([\d,]+)'),
+    'total_income': (r'Total Household Income:', r'\s*RM\s*([\d,]+)'),
+    'loan_amount': (r'Loan Amount Requested:', r'\s*RM\s*([\d,]+)'),
+    'loan_term': (r'Loan Tenure:', r'\s*(\d+)\s*months'),
+    'credit_history': (r'Credit History Status:', r'\s*(.+?)(?=\n|Property)'),
+    'property_area': (r'Property Location Type:', r'\s*(\w+)'),
+}
+
+_VALUES = {key: re.compile(value, re.IGNORECASE) for key, (_, value) in FIELD_PATTERNS.items()}
+
+# Line-start label -> field, for the dispatch pass (labels are "Label:" with no regex syntax
+# other than escaped parentheses)
+_LINE_LABELS = {label.replace('\\', '').lower(): key for key, (label, _) in FIELD_PATTERNS.items()}
+
+# Full pattern per field, for labels that are not at the start of a line (reflowed text)
+_SEARCH_PATTERNS = {
+    key: re.compile(label + value, re.IGNORECASE) for key, (label, value) in FIELD_PATTERNS.items()
+}
+
+AREA_MAP = {'urban': 0.0, 'semiurban': 1.0, 'rural': 2.0}
+
+def extract_fields(text):
+# Returns (fields, missing field names). One pass over the lines dispatches
+# each "Label:" prefix to its field; fields not found that way are searched
+# for anywhere in the text.
 
-def extract_loan_data_from_pdf(pdf_path):
-    
-    print(f"Extracting data from: {pdf_path}")
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        # Extract text from first page
-        text = pdf.pages[0].extract_text()
-    
-    print(f"Extracted text length: {len(text)} characters")
-    
-    # Parse the text using regex patterns
     data = {}
-    
-    # Define patterns to match the PDF format
-    patterns = {
-        'application_id': r'Application Reference:\s*(\S+)',
-        'full_name': r'Full Name \(as per IC\):\s*(.+)',
-        'ic_number': r'IC Number:\s*([\d-]+)',
-        'gender': r'Gender:\s*(\w+)',
-        'marital_status': r'Marital Status:\s*(\w+)',
-        'dependents': r'Number of Dependents:\s*(\d+)',
-        'education': r'Education Level:\s*(.+?)(?:\n|Employment)',
-        'self_employed': r'Employment Status:\s*(.+?)(?:\n|Monthly)',
-        'applicant_income': r'Monthly Income:\s*RM\s*([\d,]+)',
-        'coapplicant_income': r'Co-applicant Income:\s*RM\s*([\d,]+)',
-        'total_income': r'Total Household Income:\s*RM\s*([\d,]+)',
-        'loan_amount': r'Loan Amount Requested:\s*RM\s*([\d,]+)',
-        'loan_term': r'Loan Tenure:\s*(\d+)\s*months',
-        'credit_history': r'Credit History Status:\s*(.+?)(?:\n|Property)',
-        'property_area': r'Property Location Type:\s*(\w+)',
+    line_start = 0
+    for line in text.split('\n'):
+        colon = line.find(':')
+        if colon != -1:
+            key = _LINE_LABELS.get(line[:colon + 1].lower())
+            if key is not None and key not in data:
+                # Matched against the full text so values may continue past the line
+                value = _VALUES[key].match(text, line_start + colon + 1)
+                if value:
+                    data[key] = value.group(1).strip()
+        line_start += len(line) + 1
+
+    missing = []
+    if len(data) < len(FIELD_PATTERNS):
+        for key, pattern in _SEARCH_PATTERNS.items():
+            if key in data:
+                continue
+            match = pattern.search(text)
+            if match:
+                data[key] = match.group(1).strip()
+            else:
+                missing.append(key)
+
+    return data, missing
+
+def parse_field_value(key, text):
+# Value of one field from text that starts right after its label (or from
+# a region holding only the value), None if it does not parse
+
+    value = _VALUES[key].match(text + '\n')
+    return value.group(1).strip() if value else None
+
+def extract_application(pdf):
+# pdf is a file path or a ParsedDocument shared with the signature detector.
+# Returns loan_data in API format, applicant name and ID, and the fields
+# that were not found (their defaults were used).
+
+    document = as_document(pdf)
+
+    # Text from first page, extracted once per document
+    text = document.text
+    if document is not pdf:
+        document.close()
+
+    data, missing = extract_fields(text)
+
+    return {
+        "loan_data": convert_to_api_format(data),
+        "applicant_name": data.get('full_name', 'Unknown'),
+        "application_id": data.get('application_id', 'Unknown'),
+        "missing_fields": missing
     }
-    
-    for key, pattern in patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            value = match.group(1).strip()
-            data[key] = value
-            print(f"Found {key}: {value}")
-        else:
-            print(f"Missing {key}")
-    
-    # Convert to API format
-    api_data = convert_to_api_format(data)
-    
-    return api_data, data.get('full_name', 'Unknown'), data.get('application_id', 'Unknown')
+
+def extract_loan_data_from_pdf(pdf):
+
+    extracted = extract_application(pdf)
+    return extracted["loan_data"], extracted["applicant_name"], extracted["application_id"]
+
+def _clean_number(value, default=0.0):
+    if isinstance(value, str):
+        value = value.replace(',', '').replace('RM', '').replace('k', '').strip()
+        try:
+            return float(value)
+        except ValueError:
+            return default
+    return float(value) if value else default
 
 def convert_to_api_format(data):
-    
+
     # Gender mapping
     gender = data.get('gender', 'Male')
     gender_value = 1.0 if gender.lower() == 'male' else 0.0
-    
+
     # Marital status mapping
     marital = data.get('marital_status', 'Single')
     married_value = 1.0 if marital.lower() == 'married' else 0.0
-    
+
     # Education mapping
-    education = data.get('education', 'Graduate')
-    education_value = 0.0 if 'graduate' in education.lower() and 'not' not in education.lower() else 1.0
-    
+    education = data.get('education', 'Graduate').lower()
+    education_value = 0.0 if 'graduate' in education and 'not' not in education else 1.0
+
     # Employment mapping
     employment = data.get('self_employed', 'Employed')
     self_employed_value = 0.0 if 'self' in employment.lower() else 1.0
-    
+
     # Credit history mapping
     credit = data.get('credit_history', 'Good')
     credit_value = 1.0 if 'good' in credit.lower() else 0.0
-    
+
     # Property area mapping
     property_area = data.get('property_area', 'Urban')
-    area_map = {'urban': 0.0, 'semiurban': 1.0, 'rural': 2.0}
-    property_value = area_map.get(property_area.lower(), 0.0)
-    
-    # Clean numeric values
-    def clean_number(value, default=0.0):
-        if isinstance(value, str):
-            value = value.replace(',', '').replace('RM', '').replace('k', '').strip()
-            try:
-                return float(value)
-            except:
-                return default
-        return float(value) if value else default
-    
+    property_value = AREA_MAP.get(property_area.lower(), 0.0)
+
     # Get loan amount and convert to thousands if needed
-    loan_amount_raw = clean_number(data.get('loan_amount', 0))
+    loan_amount_raw = _clean_number(data.get('loan_amount', 0))
     # If extracted as full amount (> 1000), convert to thousands
     loan_amount = loan_amount_raw / 1000 if loan_amount_raw > 1000 else loan_amount_raw
-    
-    api_data = {
+
+    return {
         'Gender': gender_value,
         'Married': married_value,
         'Dependents': float(data.get('dependents', 0)),
         'Education': education_value,
         'Self_Employed': self_employed_value,
-        'ApplicantIncome': clean_number(data.get('applicant_income', 0)),
-        'CoapplicantIncome': clean_number(data.get('coapplicant_income', 0)),
-        'LoanAmount': loan_amount,  
+        'ApplicantIncome': _clean_number(data.get('applicant_income', 0)),
+        'CoapplicantIncome': _clean_number(data.get('coapplicant_income', 0)),
+        'LoanAmount': loan_amount,
         'Loan_Amount_Term': float(data.get('loan_term', 360)),
         'Credit_History': credit_value,
         'Property_Area': property_value
     }
-    
-    print(f"\n{'='*60}")
-    print(f"DEBUG: Extracted Data from PDF:")
-    print(f"{'='*60}")
-    
-    for key, value in api_data.items():
-        print(f"  {key:20} = {value}")
-    print(f"{'='*60}\n")
-    
-    return api_data
-
-# Test function
+
+def _text_values(frame, key, default):
+    # Column as stripped strings, default where the column or the value is missing
+    if key not in frame:
+        return pd.Series(default, index=frame.index, dtype='string')
+    values = frame[key].astype('string').str.strip()
+    return values.mask(values.isna() | (values == ''), default)
+
+def _number_values(frame, key, default):
+    # Vectorized _clean_number
+    if key not in frame:
+        return pd.Series(default, index=frame.index, dtype=float)
+    values = frame[key]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.astype('string').str.replace(r',|RM|k', '', regex=True).str.strip()
+        values = pd.to_numeric(values, errors='coerce')
+    return values.astype(float).fillna(default)
+
+def convert_frame_to_api_format(frame):
+# convert_to_api_format for many applications at once: frame has one column
+# per form field (missing columns or empty cells take the same defaults),
+# returns a DataFrame of model features with the same index
+
+    gender = _text_values(frame, 'gender', 'Male').str.lower()
+    marital = _text_values(frame, 'marital_status', 'Single').str.lower()
+    education = _text_values(frame, 'education', 'Graduate').str.lower()
+    employment = _text_values(frame, 'self_employed', 'Employed').str.lower()
+    credit = _text_values(frame, 'credit_history', 'Good').str.lower()
+    property_area = _text_values(frame, 'property_area', 'Urban').str.lower()
+
+    graduate = education.str.contains('graduate', regex=False) & ~education.str.contains('not', regex=False)
+    loan_amount_raw = _number_values(frame, 'loan_amount', 0.0)
+
+    return pd.DataFrame({
+        'Gender': (gender == 'male').astype(float),
+        'Married': (marital == 'married').astype(float),
+        'Dependents': _number_values(frame, 'dependents', 0.0),
+        'Education': (~graduate).astype(float),
+        'Self_Employed': (~employment.str.contains('self', regex=False)).astype(float),
+        'ApplicantIncome': _number_values(frame, 'applicant_income', 0.0),
+        'CoapplicantIncome': _number_values(frame, 'coapplicant_income', 0.0),
+        'LoanAmount': loan_amount_raw.where(loan_amount_raw <= 1000, loan_amount_raw / 1000),
+        'Loan_Amount_Term': _number_values(frame, 'loan_term', 360.0),
+        'Credit_History': credit.str.contains('good', regex=False).astype(float),
+        'Property_Area': property_area.map(AREA_MAP).astype(float).fillna(0.0)
+    }, index=frame.index)
+
+# Benchmark: python -m services.pdf_parser [pdf_dir]
 if __name__ == "__main__":
-    # Test with one of your generated PDFs
-    test_pdf = "malaysian_pdfs/loan_app_MYS20241000.pdf"
-    
-    if os.path.exists(test_pdf):
-        print(f"Testing PDF extraction on: {test_pdf}\n")
-        api_data, name, app_id = extract_loan_data_from_pdf(test_pdf)
-        
-    else:
-        print(f"Test PDF not found: {test_pdf}")
-        print("Please run the PDF generation script first!")
\ No newline at end of file
+    pdf_dir = sys.argv[1] if len(sys.argv) > 1 else "malaysian_pdfs"
+    pdf_files = sorted(os.path.join(pdf_dir, name) for name in os.listdir(pdf_dir) if name.endswith('.pdf')) \
+        if os.path.isdir(pdf_dir) else []
+
+    if not pdf_files:
+        print(f"No PDFs found in: {pdf_dir}")
+        print("Please run the PDF generation script first!")
+        sys.exit(1)
+
+    # Page text is extracted up front, this measures field extraction only
+    texts = [as_document(path).text for path in pdf_files]
+    print(f"Loaded text of {len(texts)} PDFs from {pdf_dir}\n")
+
+    # Previous implementation: one re.search per field over the whole text
+    reference_patterns = {
+        key: label + value.replace('(?=', '(?:') for key, (label, value) in FIELD_PATTERNS.items()
+    }
+
+    def reference_extract(text):
+        data = {}
+        for key, pattern in reference_patterns.items():
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                data[key] = match.group(1).strip()
+        return convert_to_api_format(data)
+
+    for path, text in zip(pdf_files, texts):
+        data, missing = extract_fields(text)
+        assert convert_to_api_format(data) == reference_extract(text), path
+        if missing:
+            print(f"{os.path.basename(path)}: missing {missing}")
+    print("Parity with per-field search: OK")
+
+    # Frame conversion against the per-record one, on the extracted fields
+    # and on copies with fields dropped so every default is exercised
+    extracted = [extract_fields(text)[0] for text in texts]
+    records = extracted + [{key: value for key, value in data.items() if key != dropped}
+                           for data in extracted for dropped in FIELD_PATTERNS]
+    expected = pd.DataFrame([convert_to_api_format(data) for data in records])
+    pd.testing.assert_frame_equal(convert_frame_to_api_format(pd.DataFrame(records)), expected)
+    print(f"Parity of convert_frame_to_api_format on {len(records)} records: OK\n")
+
+    rounds = max(1, 20000 // len(texts))
+    for name, extract in (("per-field re.search", reference_extract),
+                          ("single-pass", lambda text: convert_to_api_format(extract_fields(text)[0]))):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                extract(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:20} {rounds * len(texts) / elapsed:12,.0f} docs/sec")
@@ -0,0 +1,205 @@
+import argparse
+import os
+import time
+from itertools import islice
+
+import pandas as pd
+
+from services.loan_model import FEATURE_COLS, LoanScorer
+from services.pdf_parser import convert_frame_to_api_format
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Streaming import of application registers, the CSV/XLSX sheets branches
+# send (malaysian_loan_applications.xlsx from the PDF generator is one):
+#   python -m services.register_import malaysian_loan_applications.xlsx -o register_scores.csv
+# The register is read chunk by chunk, never whole. Each chunk is mapped to
+# model features with the same rules as PDF uploads and scored with one
+# vectorized model call.
+
+# Register rows mapped and scored together
+REGISTER_CHUNK_SIZE = int(os.getenv('REGISTER_CHUNK_SIZE', 5000))
+
+REGISTER_KINDS = {'.csv': 'csv', '.xlsx': 'xlsx', '.xlsm': 'xlsx'}
+
+# Form field -> accepted register headings, compared lowercased with spaces
+# and dashes as underscores ("Monthly Income" matches monthly_income)
+REGISTER_COLUMNS = {
+    'application_id': ('application_id', 'application_reference', 'reference', 'loan_id'),
+    'full_name': ('full_name', 'full_name_(as_per_ic)', 'name', 'applicant_name'),
+    'gender': ('gender',),
+    'marital_status': ('marital_status', 'married'),
+    'dependents': ('dependents', 'number_of_dependents'),
+    'education': ('education', 'education_level'),
+    'self_employed': ('self_employed', 'employment_status'),
+    'applicant_income': ('applicant_income', 'monthly_income', 'applicantincome'),
+    'coapplicant_income': ('coapplicant_income', 'co_applicant_income', 'coapplicantincome'),
+    'loan_amount': ('loan_amount', 'loan_amount_requested', 'loanamount'),
+    'loan_term': ('loan_term', 'loan_tenure', 'loan_amount_term'),
+    'credit_history': ('credit_history', 'credit_history_status'),
+    'property_area': ('property_area', 'property_location_type'),
+}
+IDENTITY_FIELDS = ('application_id', 'full_name')
+
+# Register values -> the wording generate_loan_pdfs prints on the form, so
+# convert_frame_to_api_format reads them like extracted PDF fields
+FORM_WORDING = {
+    'marital_status': {'yes': 'Married', 'no': 'Single'},
+    'self_employed': {'yes': 'Self-Employed', 'no': 'Employed', 'true': 'Self-Employed', 'false': 'Employed'},
+    'credit_history': {'1': 'Good Standing', '1.0': 'Good Standing', 'yes': 'Good Standing', 'true': 'Good Standing',
+                       '0': 'Poor Standing', '0.0': 'Poor Standing', 'no': 'Poor Standing', 'false': 'Poor Standing'},
+    'property_area': {'semi-urban': 'Semiurban', 'semi urban': 'Semiurban'},
+}
+
+RESULT_COLUMNS = ['row', 'application_id', 'applicant_name', 'decision', 'approval_probability',
+                  'missing_fields', *FEATURE_COLS]
+
+def register_kind(filename):
+    kind = REGISTER_KINDS.get(os.path.splitext(filename or '')[1].lower())
+    if kind is None:
+        raise ValueError("Registers must be .csv or .xlsx files")
+    return kind
+
+def _heading(name):
+    return str(name).strip().lower().replace(' ', '_').replace('-', '_') if name is not None else ''
+
+def register_fields(columns):
+    # Form field -> register column, for the headings that are recognised
+
+    headings = {}
+    for column in columns:
+        headings.setdefault(_heading(column), column)
+
+    fields = {}
+    for field, aliases in REGISTER_COLUMNS.items():
+        for alias in aliases:
+            if alias in headings:
+                fields[field] = headings[alias]
+                break
+
+    if not set(fields) - set(IDENTITY_FIELDS):
+        raise ValueError(f"No application columns found in the register header: {', '.join(map(str, columns))}")
+    return fields
+
+def read_register(source, kind, chunk_size=REGISTER_CHUNK_SIZE):
+# DataFrames of at most chunk_size rows, every column as read. source is a
+# path or a binary file. The index is the row's position in the register
+# (0 = first row under the header) and blank rows are skipped.
+
+    if kind == 'csv':
+        with pd.read_csv(source, dtype=str, chunksize=chunk_size, encoding='utf-8-sig',
+                         skip_blank_lines=False) as reader:
+            for frame in reader:
+                yield frame.dropna(how='all')
+        return
+
+    if openpyxl is None:
+        raise RuntimeError("XLSX registers need openpyxl (pip install openpyxl), or export the register as .csv")
+
+    # Read-only mode streams rows from the sheet XML instead of building the workbook
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        width = len(header)
+        columns = [name if name is not None else f"column_{i + 1}" for i, name in enumerate(header)]
+
+        position = 0
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            # Read-only rows can be shorter or longer than the header
+            batch = [row if len(row) == width else (row + (None,) * width)[:width] for row in batch]
+            frame = pd.DataFrame(batch, columns=columns, index=range(position, position + len(batch)))
+            position += len(batch)
+            yield frame.dropna(how='all')
+    finally:
+        workbook.close()
+
+def _form_values(chunk, fields):
+    # Register columns renamed to form fields, values reworded like the printed form
+
+    form = pd.DataFrame(index=chunk.index)
+    for field, column in fields.items():
+        values = chunk[column].astype('string').str.strip()
+        wording = FORM_WORDING.get(field)
+        if wording:
+            values = values.str.lower().map(wording).fillna(values)
+        if field == 'dependents':
+            # The form prints a count, "3+" in a register reads as 3
+            values = values.str.extract(r'(\d+)', expand=False)
+        form[field] = values.mask(values.eq('').fillna(False))
+    return form
+
+def score_chunk(chunk, fields, scorer):
+    # One register chunk -> result DataFrame in RESULT_COLUMNS order
+
+    form = _form_values(chunk, fields)
+    features = convert_frame_to_api_format(form)
+    decisions, approval_probabilities = scorer.predict_frame(features)
+
+    # Fields absent from the register or empty in the row, "a;b" per row
+    blank = pd.DataFrame({
+        field: form[field].isna() if field in form else pd.Series(True, index=form.index)
+        for field in REGISTER_COLUMNS
+    })
+    missing_fields = blank.dot(blank.columns + ';').str.rstrip(';')
+
+    result = pd.DataFrame({
+        # Spreadsheet row number, the header is row 1
+        'row': chunk.index + 2,
+        'application_id': form.get('application_id', pd.Series(index=form.index, dtype='string')).fillna('Unknown'),
+        'applicant_name': form.get('full_name', pd.Series(index=form.index, dtype='string')).fillna('Unknown'),
+        'decision': decisions,
+        'approval_probability': approval_probabilities.round(4),
+        'missing_fields': missing_fields,
+    }, index=chunk.index)
+    return pd.concat([result, features], axis=1)
+
+def score_register(source, kind, scorer, chunk_size=REGISTER_CHUNK_SIZE):
+    # Result DataFrames, one per chunk. Raises ValueError on the first chunk if
+    # the header has no application columns.
+
+    fields = None
+    for chunk in read_register(source, kind, chunk_size):
+        if fields is None:
+            fields = register_fields(chunk.columns)
+        if not chunk.empty:
+            yield score_chunk(chunk, fields, scorer)
+
+def import_register(path, output, chunk_size=REGISTER_CHUNK_SIZE):
+# Score a register file into a CSV, written chunk by chunk
+
+    scorer = LoanScorer.load()
+    rows = 0
+    counts = {"Approved": 0, "Rejected": 0}
+    start = time.perf_counter()
+
+    with open(path, 'rb') as source, open(output, 'w', newline='', encoding='utf-8') as out:
+        for result in score_register(source, register_kind(path), scorer, chunk_size):
+            result.to_csv(out, header=rows == 0, index=False)
+            rows += len(result)
+            for decision, count in result['decision'].value_counts().items():
+                counts[decision] += int(count)
+            elapsed = time.perf_counter() - start
+            print(f"{rows} rows ({rows / elapsed * 60:,.0f} rows/min) "
+                  f"approved={counts['Approved']} rejected={counts['Rejected']}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9) * 60:,.0f} rows/min), results in {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/XLSX application register")
+    parser.add_argument("register", help="register file (.csv or .xlsx), one application per row")
+    parser.add_argument("-o", "--output", required=True, help="results CSV")
+    parser.add_argument("--chunk-size", type=int, default=REGISTER_CHUNK_SIZE, help="rows mapped and scored together")
+    args = parser.parse_args()
+
+    import_register(args.register, args.output, chunk_size=args.chunk_size)
@@ -1,43 +1,53 @@
-import pdfplumber
-from pdf2image import convert_from_path
+import os
+import time
 import cv2
 import numpy as np
-from PIL import Image
+from pdf2image import convert_from_path
+
+from services.pdf_document import as_document
+
+# Render resolution for the image-based check
+SIGNATURE_DPI = int(os.getenv('SIGNATURE_DPI', 150))
+
+# Signature area = bottom 30% of the page
+SIGNATURE_REGION_TOP = 0.7
 
-def detect_signature_in_pdf(pdf_path):
+def detect_signature_in_pdf(pdf):
+    # pdf is a file path or a ParsedDocument shared with the field extractor
     
-    print(f"Checking signature in: {pdf_path}")
+    document = as_document(pdf)
+    try:
+        return _detect_signature(document)
+    finally:
+        if document is not pdf:
+            document.close()
+
+def _detect_signature(document):
+    
+    print(f"Checking signature in: {document.source}")
     
     try:
         # First, check text for "Unsigned" marker
-        with pdfplumber.open(pdf_path) as pdf:
-            text = pdf.pages[0].extract_text()
-            
-            print(f"Extracted text length: {len(text)} chars")
-            
-            # If we find explicit unsigned marker, return immediately
-            if "[ Unsigned ]" in text or "Unsigned" in text:
-                print("  ✗ Found 'Unsigned' text marker")
-                return False, 25.0
-            
-            # Check for "Digitally signed" marker
-            if "Digitally signed" in text or "✓" in text:
-                print("  ✓ Found 'Digitally signed' text marker")
-                return True, 95.0
+        text = document.text
         
-        # If no text markers, fall back to image analysis
-        images = convert_from_path(pdf_path, dpi=150, first_page=1, last_page=1)
+        print(f"Extracted text length: {len(text)} chars")
         
-        if not images:
-            print("Could not convert PDF to image")
-            return False, 0.0
+        # If we find explicit unsigned marker, return immediately
+        if "[ Unsigned ]" in text or "Unsigned" in text:
+            print("  ✗ Found 'Unsigned' text marker")
+            return False, 25.0
         
-        page_image = np.array(images[0])
-        gray = cv2.cvtColor(page_image, cv2.COLOR_RGB2GRAY)
+        # Check for "Digitally signed" marker
+        if "Digitally signed" in text or "✓" in text:
+            print("  ✓ Found 'Digitally signed' text marker")
+            return True, 95.0
         
-        # Focus on signature area (bottom 30%)
-        height = gray.shape[0]
-        signature_area = gray[int(height * 0.7):height, :]
+        # If no text markers, fall back to image analysis of the signature area only
+        signature_area = document.render_region(top=SIGNATURE_REGION_TOP, bottom=1.0, dpi=SIGNATURE_DPI)
+        
+        if signature_area is None:
+            print("Could not convert PDF to image")
+            return False, 0.0
         
         # Apply threshold
         _, thresh = cv2.threshold(signature_area, 200, 255, cv2.THRESH_BINARY_INV)
@@ -65,21 +75,42 @@ def detect_signature_in_pdf(pdf_path):
         
     except Exception as e:
         print(f"Error detecting signature: {str(e)}")
-        # If error, check for text markers as fallback
+        # If error, check for text markers as fallback (text is cached on the document)
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                text = pdf.pages[0].extract_text()
-                if "Digitally signed" in text:
-                    return True, 90.0
-                elif "[ Unsigned ]" in text:
-                    return False, 20.0
+            text = document.text
+            if "Digitally signed" in text:
+                return True, 90.0
+            elif "[ Unsigned ]" in text:
+                return False, 20.0
         except:
             pass
         return False, 0.0
     
+def benchmark_renderers(pdf_paths, dpi=SIGNATURE_DPI):
+    # Images/sec for the full-page poppler path vs the in-process region render
+    
+    def poppler_region(pdf_path):
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=1, last_page=1)
+        gray = cv2.cvtColor(np.array(images[0]), cv2.COLOR_RGB2GRAY)
+        return gray[int(gray.shape[0] * SIGNATURE_REGION_TOP):, :]
+    
+    def pdfium_region(pdf_path):
+        with as_document(pdf_path) as document:
+            return document.render_region(top=SIGNATURE_REGION_TOP, bottom=1.0, dpi=dpi)
+    
+    for label, render in [("pdf2image", poppler_region), ("in-process", pdfium_region)]:
+        try:
+            start = time.perf_counter()
+            for pdf_path in pdf_paths:
+                render(pdf_path)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:12} {len(pdf_paths) / elapsed:8.1f} images/sec ({len(pdf_paths)} PDFs @ {dpi} dpi)")
+        except Exception as e:
+            print(f"  {label:12} unavailable: {str(e)}")
+
 # Test function
 if __name__ == "__main__":
-    import os
+    import glob
     
     # Test with a few PDFs
     test_pdfs = [
@@ -96,4 +127,9 @@ if __name__ == "__main__":
         else:
             print(f"\nFile not found: {pdf_path}")
     
+    corpus = sorted(glob.glob("malaysian_pdfs/*.pdf"))
+    if corpus:
+        print(f"\nRenderer benchmark:")
+        benchmark_renderers(corpus)
+    
     print("\nSignature detection test complete!")
\ No newline at end of file
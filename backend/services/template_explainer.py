@@ -0,0 +1,222 @@
+import time
+
+# Rule-based risk assessment in the same sections as the LLM prompt
+# (EXPLANATION_SYSTEM_PROMPT). Deterministic and local: used as the "fast"
+# explanation tier and as the fallback whenever the LLM call fails.
+
+DTI_LIMIT = 40  # industry standard upper bound
+DTI_COMFORTABLE = 30  # target used when suggesting a reduced loan amount
+HIGH_LOAN_TO_INCOME = 300  # loan above 3x annual household income
+MANY_DEPENDENTS = 3
+
+PROPERTY_AREAS = ['Urban', 'Semiurban', 'Rural']
+
+def application_facts(loan_data):
+# Derived figures shared by the LLM prompt and the template
+
+    income = loan_data.get('ApplicantIncome', 0)
+    coapplicant_income = loan_data.get('CoapplicantIncome', 0)
+    total_income = income + coapplicant_income
+    loan_amount = loan_data.get('LoanAmount', 0) * 1000  # Convert to full amount
+    loan_term_months = loan_data.get('Loan_Amount_Term', 360)
+
+    # Calculate DTI (simplified - monthly loan payment / monthly income)
+    monthly_payment = loan_amount / loan_term_months if loan_term_months > 0 else 0
+    dti_ratio = (monthly_payment / total_income * 100) if total_income > 0 else 0
+
+    good_credit = loan_data.get('Credit_History', 0) == 1
+    self_employed = loan_data.get('Self_Employed', 0) == 1
+    graduate = loan_data.get('Education', 0) == 0
+    married = loan_data.get('Married', 0) == 1
+
+    return {
+        "income": income,
+        "coapplicant_income": coapplicant_income,
+        "total_income": total_income,
+        "loan_amount": loan_amount,
+        "loan_term_months": loan_term_months,
+        "monthly_payment": monthly_payment,
+        "dti_ratio": dti_ratio,
+        "loan_to_income_ratio": (loan_amount / (total_income * 12)) * 100 if total_income > 0 else 0,
+        "good_credit": good_credit,
+        "self_employed": self_employed,
+        "graduate": graduate,
+        "credit_history": 'Good Standing' if good_credit else 'Poor Standing',
+        "employment": 'Self-Employed' if self_employed else 'Employed',
+        "education": 'Graduate' if graduate else 'Not Graduate',
+        "married": 'Yes' if married else 'No',
+        "dependents": int(loan_data.get('Dependents', 0)),
+        "property_area": PROPERTY_AREAS[int(loan_data.get('Property_Area', 0))]
+    }
+
+def facts_metrics(facts):
+# Metrics returned alongside every explanation
+
+    return {
+        "dti_ratio": round(facts["dti_ratio"], 2),
+        "monthly_payment": round(facts["monthly_payment"], 2),
+        "total_income": round(facts["total_income"], 2),
+        "loan_to_income_ratio": round(facts["loan_to_income_ratio"], 2)
+    }
+
+def _risk_factors(facts):
+    dti = facts["dti_ratio"]
+    risks = []
+
+    if facts["total_income"] <= 0:
+        risks.append("No verifiable household income declared, repayment capacity cannot be established")
+    elif dti > DTI_LIMIT:
+        risks.append(f"DTI ratio of {dti:.1f}% exceeds the {DTI_LIMIT}% industry standard")
+    elif dti > DTI_COMFORTABLE:
+        risks.append(f"DTI ratio of {dti:.1f}% is close to the {DTI_LIMIT}% limit, leaving little headroom")
+    if not facts["good_credit"]:
+        risks.append("Credit history does not meet lending guidelines (Poor Standing)")
+    if facts["loan_to_income_ratio"] > HIGH_LOAN_TO_INCOME:
+        risks.append(f"Loan amount is {facts['loan_to_income_ratio'] / 100:.1f}x annual household income")
+    if facts["self_employed"]:
+        risks.append("Self-employed income may be irregular and needs documentary verification")
+    if facts["dependents"] >= MANY_DEPENDENTS:
+        risks.append(f"{facts['dependents']} dependents add to household expenses")
+    if facts["coapplicant_income"] <= 0 and dti > DTI_COMFORTABLE:
+        risks.append("Single income source with no co-applicant support")
+
+    return risks[:4] or ["No material risk factors identified in the submitted data"]
+
+def _positive_factors(facts):
+    positives = []
+
+    if facts["good_credit"]:
+        positives.append("Credit history in good standing")
+    if facts["total_income"] > 0 and facts["dti_ratio"] <= DTI_COMFORTABLE:
+        positives.append(f"Comfortable DTI ratio of {facts['dti_ratio']:.1f}%, well below the {DTI_LIMIT}% standard")
+    if facts["coapplicant_income"] > 0:
+        positives.append(f"Co-applicant income of RM {facts['coapplicant_income']:,.2f}/month supports repayment")
+    if not facts["self_employed"] and facts["income"] > 0:
+        positives.append("Salaried employment provides predictable income")
+    if 0 < facts["loan_to_income_ratio"] <= 100:
+        positives.append("Loan amount is within one year of household income")
+    if facts["graduate"]:
+        positives.append("Graduate education supports long-term earning potential")
+
+    return positives[:3] or ["No notable strengths beyond the submitted income"]
+
+def _financial_analysis(facts):
+    dti = facts["dti_ratio"]
+    total_income = facts["total_income"]
+    monthly_payment = facts["monthly_payment"]
+
+    if total_income <= 0:
+        dti_comment = "Cannot be assessed without declared income"
+    elif dti > DTI_LIMIT:
+        dti_comment = f"{dti:.1f}%, above the {DTI_LIMIT}% standard and not acceptable as submitted"
+    elif dti > DTI_COMFORTABLE:
+        dti_comment = f"{dti:.1f}%, acceptable but above the {DTI_COMFORTABLE}% comfort level"
+    else:
+        dti_comment = f"{dti:.1f}%, comfortably within the {DTI_LIMIT}% standard"
+
+    income_sources = "dual income" if facts["coapplicant_income"] > 0 else "single income"
+    stability = "variable, verify business records" if facts["self_employed"] else "stable salaried employment"
+    income_comment = f"{facts['employment']}, RM {total_income:,.2f}/month household income ({income_sources}); {stability}"
+
+    remaining = total_income - monthly_payment
+    if total_income <= 0:
+        capacity = "not demonstrated"
+    elif dti > DTI_LIMIT:
+        capacity = "insufficient at the requested amount and term"
+    elif dti > DTI_COMFORTABLE:
+        capacity = "adequate but tight"
+    else:
+        capacity = "adequate"
+    repayment_comment = (f"Approx. RM {monthly_payment:,.2f}/month over {facts['loan_term_months']} months, "
+                         f"leaving RM {remaining:,.2f}/month; capacity is {capacity}")
+
+    return dti_comment, income_comment, repayment_comment
+
+def _recommendation(facts, approved):
+    conditions = []
+    if facts["total_income"] > 0 and facts["dti_ratio"] > DTI_LIMIT:
+        affordable = facts["total_income"] * DTI_COMFORTABLE / 100 * facts["loan_term_months"]
+        conditions.append(f"reduce the loan amount to about RM {affordable:,.0f} ({DTI_COMFORTABLE}% DTI) or extend the term")
+    if not facts["good_credit"]:
+        conditions.append("require a guarantor or additional collateral")
+    if facts["self_employed"]:
+        conditions.append("verify at least two years of business income")
+
+    major_risk = facts["total_income"] <= 0 or facts["dti_ratio"] > DTI_LIMIT or not facts["good_credit"]
+
+    if approved and not major_risk:
+        return "APPROVE", "Application meets DTI and credit requirements.", conditions
+    if approved:
+        return "CONDITIONAL APPROVAL", "Approve subject to the conditions below.", conditions
+    if major_risk:
+        return "REJECT", "Application does not meet DTI or credit requirements as submitted.", conditions
+    return "REJECT", "Model rejection is not explained by DTI or credit history alone, manual review advised.", conditions
+
+def template_explanation(loan_data, prediction):
+# {"explanation", "metrics"} in the same format generate_explanation returns
+
+    facts = application_facts(loan_data)
+    approved = str(prediction).lower().startswith("approv")
+    risks = _risk_factors(facts)
+    positives = _positive_factors(facts)
+    dti_comment, income_comment, repayment_comment = _financial_analysis(facts)
+    decision, reason, conditions = _recommendation(facts, approved)
+
+    # Conditions for a conditional approval, or what would need to change after a rejection
+    condition_label = "To reconsider" if decision == "REJECT" else "Condition"
+    risk_count = 0 if risks[0].startswith("No material") else len(risks)
+    summary = (f"The model {'approved' if approved else 'rejected'} this application with a DTI ratio of "
+               f"{facts['dti_ratio']:.1f}% and credit history in {'good' if facts['good_credit'] else 'poor'} standing; "
+               f"{risk_count} risk factor{'' if risk_count == 1 else 's'} identified. Recommendation: {decision}.")
+
+    lines = [
+        "**Risk Assessment Summary:**",
+        summary,
+        "",
+        "**Key Risk Factors:**",
+        *[f"• {risk}" for risk in risks],
+        "",
+        "**Positive Factors:**",
+        *[f"• {positive}" for positive in positives],
+        "",
+        "**Financial Analysis:**",
+        f"• DTI Ratio: {dti_comment}",
+        f"• Income Stability: {income_comment}",
+        f"• Repayment Capacity: {repayment_comment}",
+        "",
+        "**Recommendation:**",
+        f"{decision} - {reason}",
+        *[f"• {condition_label}: {condition[0].upper()}{condition[1:]}" for condition in conditions if decision != "APPROVE"],
+        "",
+        "**Officer Notes:**",
+        "Generated by the local rule-based assessment from the submitted figures, no LLM review was performed. "
+        "Verify income documents and credit report before finalising."
+    ]
+
+    return {"explanation": "\n".join(lines), "metrics": facts_metrics(facts)}
+
+
+if __name__ == "__main__":
+    # Timing check: python -m services.template_explainer
+    import random
+
+    rng = random.Random(0)
+    applications = [{
+        "Gender": 1, "Married": rng.randint(0, 1), "Dependents": rng.randint(0, 3),
+        "Education": rng.randint(0, 1), "Self_Employed": rng.randint(0, 1),
+        "ApplicantIncome": rng.choice([0, rng.uniform(1500, 20000)]),
+        "CoapplicantIncome": rng.choice([0, rng.uniform(0, 8000)]),
+        "LoanAmount": rng.uniform(20, 700), "Loan_Amount_Term": rng.choice([120, 180, 240, 360, 480]),
+        "Credit_History": rng.randint(0, 1), "Property_Area": rng.randint(0, 2)
+    } for _ in range(10000)]
+    predictions = [rng.choice(["Approved", "Rejected"]) for _ in applications]
+
+    print(template_explanation(applications[0], predictions[0])["explanation"])
+
+    start = time.perf_counter()
+    for loan_data, prediction in zip(applications, predictions):
+        template_explanation(loan_data, prediction)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(applications)} explanations in {elapsed:.3f}s "
+          f"({elapsed / len(applications) * 1e6:.1f} us each)")
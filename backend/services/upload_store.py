@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', 'uploads')
+
+# Retention bound for stored PDFs plus their cached results
+UPLOAD_STORE_MAX_BYTES = int(float(os.getenv('UPLOAD_STORE_MAX_MB', 1024)) * 1024 * 1024)
+
+CHUNK_SIZE = 1024 * 1024
+
+class UploadStore:
+    # Content-addressed store for uploaded PDFs.
+    # Files live at <root>/<sha[:2]>/<sha>.pdf with the processed result for
+    # that content next to them as <sha>.json, so resubmitting an identical
+    # document returns the earlier decision without reprocessing.
+    # Entries are evicted least-recently-used once the store exceeds max_bytes.
+
+    def __init__(self, root=UPLOAD_DIR, max_bytes=UPLOAD_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # sha -> bytes on disk, oldest first
+        self._results = {}
+        os.makedirs(self.root, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        # Rebuild the LRU index from disk once at startup
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith('.pdf'):
+                    continue
+                sha = name[:-4]
+                size = os.path.getsize(os.path.join(dirpath, name))
+                result_path = self._result_path(sha)
+                if os.path.exists(result_path):
+                    size += os.path.getsize(result_path)
+                found.append((os.path.getmtime(os.path.join(dirpath, name)), sha, size))
+
+        for _, sha, size in sorted(found):
+            self._entries[sha] = size
+            self.total_bytes += size
+
+    def _pdf_path(self, sha):
+        return os.path.join(self.root, sha[:2], f"{sha}.pdf")
+
+    def _result_path(self, sha):
+        return os.path.join(self.root, sha[:2], f"{sha}.json")
+
+    async def save(self, upload_file):
+        # Stream the upload to disk while hashing it, returns (sha, path, bytes).
+        # Disk work runs in a worker thread so the event loop keeps serving.
+        digest = hashlib.sha256()
+        chunks = []
+
+        tmp = await asyncio.to_thread(tempfile.NamedTemporaryFile, dir=self.root, prefix='incoming-', delete=False)
+        stored = False
+        try:
+            with tmp:
+                while True:
+                    chunk = await upload_file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    await asyncio.to_thread(tmp.write, chunk)
+                    chunks.append(chunk)
+
+            sha = digest.hexdigest()
+            path = self._pdf_path(sha)
+
+            if sha not in self._entries:
+                size = await asyncio.to_thread(self._place, tmp.name, path)
+                stored = True
+                # Another upload of the same content may have landed meanwhile
+                if sha not in self._entries:
+                    self._entries[sha] = size
+                    self.total_bytes += size
+                    self._evict(keep=sha)
+                    return sha, path, b"".join(chunks)
+
+            self._touch(sha)
+            return sha, path, b"".join(chunks)
+        finally:
+            # Duplicate content, or reading the upload or writing it failed
+            if not stored:
+                try:
+                    os.remove(tmp.name)
+                except OSError:
+                    pass
+
+    def _place(self, tmp_path, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def get_result(self, sha):
+        # Processed result for this content, or None
+        if sha not in self._entries:
+            return None
+
+        if sha not in self._results:
+            result_path = self._result_path(sha)
+            if not os.path.exists(result_path):
+                return None
+            with open(result_path) as f:
+                self._results[sha] = json.load(f)
+
+        self._touch(sha)
+        return self._results[sha]
+
+    def put_result(self, sha, result):
+        if sha not in self._entries:
+            return
+
+        result_path = self._result_path(sha)
+        previous = os.path.getsize(result_path) if os.path.exists(result_path) else 0
+        with open(result_path, 'w') as f:
+            json.dump(result, f, default=str)
+
+        self._results[sha] = result
+        size_change = os.path.getsize(result_path) - previous
+        self._entries[sha] += size_change
+        self.total_bytes += size_change
+        self._evict(keep=sha)
+
+    def _touch(self, sha):
+        self._entries.move_to_end(sha)
+        now = time.time()
+        try:
+            os.utime(self._pdf_path(sha), (now, now))
+        except OSError:
+            pass
+
+    def _evict(self, keep=None):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            sha, size = next(iter(self._entries.items()))
+            if sha == keep:
+                self._entries.move_to_end(sha)
+                continue
+
+            del self._entries[sha]
+            self._results.pop(sha, None)
+            self.total_bytes -= size
+            for path in (self._pdf_path(sha), self._result_path(sha)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            print(f"Evicted upload {sha[:12]} ({size} bytes)")
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from services.application_repository import ApplicationRepository, SQLiteApplicationRepository
+
+def application(original_id, prediction="Approved", status="pending_review", income=5000, loan_amount=120,
+                created_at="2024-01-01T00:00:00"):
+    return {
+        "original_application_id": original_id,
+        "filename": f"{original_id}.pdf" if original_id else None,
+        "prediction": prediction,
+        "status": status,
+        "created_at": created_at,
+        "data": {"ApplicantIncome": income, "LoanAmount": loan_amount},
+    }
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "memory":
+        yield ApplicationRepository()
+        return
+    repository = SQLiteApplicationRepository(str(tmp_path / "applications.db"))
+    yield repository
+    repository.close()
+
+def test_aggregates_stay_consistent(repository):
+    uuids = [
+        repository.insert(application("LA-1")),
+        repository.insert(application("LA-2", prediction="Rejected", income=0)),
+        repository.insert(application("LA-3", status="approved", loan_amount=0)),
+        # Not listed: no original ID, and no prediction
+        repository.insert(application(None, income=12000)),
+        repository.insert({"original_application_id": "LA-4", "status": "pending_review"}),
+    ]
+    assert repository.check_consistency() == {}
+
+    repository.update_status("LA-1", "approved")
+    repository.update_status(uuids[1], "rejected")
+    repository.update_status(uuids[1], "pending_review")
+    repository.update_status(uuids[3], "approved")
+    repository.add_note("LA-2", {"note": "call the applicant"})
+    repository.update_fields("LA-3", explanation="Stable income")
+    assert repository.check_consistency() == {}
+
+    repository.delete("LA-2")
+    repository.delete(uuids[4])
+    # Re-uploading an ID keeps the older record alongside the new one
+    repository.insert(application("LA-1", prediction="Rejected", created_at="2024-02-01T00:00:00"))
+    repository.update_status("LA-1", "rejected")
+    repository.delete("LA-1")
+    assert repository.check_consistency() == {}
+
+    for application_uuid in uuids:
+        repository.delete(application_uuid)
+    assert repository.check_consistency() == {}
+    assert repository.summary() == ApplicationRepository().summary()
+
+def test_concurrent_status_updates_do_not_drift(tmp_path):
+    # Two workers sharing one database both move the same application from pending
+    path = str(tmp_path / "applications.db")
+    first = SQLiteApplicationRepository(path)
+    application_uuid = first.insert(application("LA-1"))
+    first.flush()
+    second = SQLiteApplicationRepository(path)
+
+    barrier = threading.Barrier(2)
+
+    def update(repository, status):
+        barrier.wait()
+        repository.update_status(application_uuid, status)
+        repository.flush()
+
+    workers = [threading.Thread(target=update, args=(first, "approved")),
+               threading.Thread(target=update, args=(second, "rejected"))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    for repository in (first, second):
+        assert repository.check_consistency() == {}
+        repository.close()
+
+def test_pending_delete_uncovers_older_record(tmp_path):
+    # Long flush interval so the delete is still queued when we look the ID up
+    repository = SQLiteApplicationRepository(str(tmp_path / "applications.db"), flush_interval=1.0)
+    older = repository.insert(application("LA-1", created_at="2024-01-01T00:00:00"))
+    repository.flush()
+    newer = repository.insert(application("LA-1", created_at="2024-02-01T00:00:00"))
+    repository.flush()
+
+    repository.delete(newer)
+    assert repository.get_with_id("LA-1")[0] == older
+
+    repository.flush()
+    assert repository.get_with_id("LA-1")[0] == older
+    repository.close()
@@ -0,0 +1,58 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.forest_engine import CompiledForest, load_training_features
+from services.loan_model import NUM_COLS, backend_dir
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(os.path.join(backend_dir, 'ml_models', 'loan_status_predictor.pkl'))
+
+@pytest.fixture(scope="module")
+def scaler():
+    return joblib.load(os.path.join(backend_dir, 'ml_models', 'vector.pkl'))
+
+@pytest.fixture(scope="module")
+def raw_features(model):
+    # loan_prediction_dataset.csv encoded like the training notebook, unscaled
+    return load_training_features(os.path.join(backend_dir, 'database', 'loan_prediction_dataset.csv'),
+                                  list(model.feature_names_in_))
+
+def scaled(frame, scaler):
+    frame = frame.copy()
+    frame[NUM_COLS] = scaler.transform(frame[NUM_COLS])
+    return frame
+
+def test_compiled_forest_matches_sklearn(model, scaler, raw_features):
+    X = scaled(raw_features, scaler)
+
+    engine = CompiledForest.from_sklearn(model)
+
+    np.testing.assert_array_equal(engine.predict_proba(X.to_numpy()), model.predict_proba(X))
+    np.testing.assert_array_equal(engine.predict(X.to_numpy()), model.predict(X))
+
+def threshold_probes(fused, base_row):
+    # Copies of base_row with one feature set exactly on a fused threshold and
+    # one ULP either side of it, for every split
+    internal = np.flatnonzero(np.isfinite(fused.threshold))
+    features = fused.feature[internal]
+    thresholds = fused.threshold[internal]
+    values = np.concatenate([np.nextafter(thresholds, -np.inf), thresholds, np.nextafter(thresholds, np.inf)])
+
+    probes = np.repeat(base_row[None, :], len(values), axis=0)
+    probes[np.arange(len(values)), np.tile(features, 3)] = values
+    return probes
+
+def test_fused_forest_matches_scaler_and_model(model, scaler, raw_features):
+    fused = CompiledForest.from_sklearn(model, scaler=scaler, scaled_cols=NUM_COLS).fuse_scaler()
+
+    probes = threshold_probes(fused, raw_features.to_numpy()[0])
+    rows = np.concatenate([raw_features.to_numpy(), probes])
+    expected = model.predict_proba(scaled(pd.DataFrame(rows, columns=raw_features.columns), scaler))
+
+    np.testing.assert_array_equal(fused.predict_proba(rows), expected)
+    np.testing.assert_array_equal(fused.predict(rows), model.classes_[expected.argmax(axis=1)])
@@ -0,0 +1,78 @@
+import asyncio
+import functools
+
+import pytest
+
+from services.application_repository import ApplicationRepository
+from services.explanation_cache import ExplanationCache
+from services.fake_llm_server import FAKE_RESPONSE_TEXT, start_fake_llm_server
+from services.lazy_explanations import LazyExplanations
+from services.llm_service import LoanExplainerService
+from services.template_explainer import template_explanation
+
+LOAN_DATA = {
+    'ApplicantIncome': 5000, 'CoapplicantIncome': 2000, 'LoanAmount': 200,
+    'Loan_Amount_Term': 360, 'Credit_History': 1, 'Self_Employed': 0,
+    'Dependents': 1, 'Education': 0, 'Married': 1, 'Property_Area': 0
+}
+
+@pytest.fixture
+def server():
+    server, base_url = start_fake_llm_server(latency=0.01, batch_latency=0.1)
+    server.base_url = base_url
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def service(server):
+    # Caching disabled so every request reaches the server
+    return LoanExplainerService(api_key="fake-key", base_url=server.base_url,
+                                cache=ExplanationCache(path=None, memory_items=0))
+
+def items(count):
+    return {f"app-{i}": ({**LOAN_DATA, 'ApplicantIncome': 5000 + i}, "Approved") for i in range(count)}
+
+def test_batch_success(service):
+    results = asyncio.run(service.generate_explanations_batch(items(3), poll_interval=0.05))
+
+    assert sorted(results) == ["app-0", "app-1", "app-2"]
+    for result in results.values():
+        assert "Simulated assessment from the local fake LLM server" in result["explanation"]
+        assert not result.get("fallback")
+        assert result["metrics"]
+
+def test_batch_errored_request_falls_back_to_template(server, service, monkeypatch):
+    server.RequestHandlerClass.errored_custom_ids.add("app-1")
+    # LazyExplanations polls at the default interval
+    monkeypatch.setattr(service, "generate_explanations_batch",
+                        functools.partial(service.generate_explanations_batch, poll_interval=0.05))
+
+    # Through the deferred explanations the errored application stays
+    # pending, and with the API down its first read stores the local assessment
+    repository = ApplicationRepository()
+    data, prediction = items(3)["app-1"]
+    application_uuid = repository.insert({"original_application_id": "app-1", "data": data,
+                                          "prediction": prediction, "status": "pending_review",
+                                          "explanation": None, "explanation_status": "pending"})
+    server.RequestHandlerClass.errored_custom_ids.add(application_uuid)
+    explanations = LazyExplanations(service, repository, workers=0)
+
+    async def explain():
+        results = await service.generate_explanations_batch(items(3))
+        assert sorted(results) == ["app-0", "app-2"]
+
+        await explanations._explain_batch([application_uuid])
+        assert repository.get(application_uuid)["explanation_status"] == "pending"
+        server.RequestHandlerClass.error_status = 500
+        return await explanations.ensure(application_uuid)
+
+    record = asyncio.run(explain())
+    assert record["explanation_status"] == "fallback"
+    assert record["explanation"] == template_explanation(data, prediction)["explanation"]
+    assert FAKE_RESPONSE_TEXT not in record["explanation"]
+
+def test_batch_expiry_returns_nothing(server, service):
+    server.RequestHandlerClass.expire_batches = True
+
+    assert asyncio.run(service.generate_explanations_batch(items(3), poll_interval=0.05)) == {}